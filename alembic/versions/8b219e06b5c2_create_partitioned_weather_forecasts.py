@@ -0,0 +1,138 @@
+"""create_partitioned_weather_forecasts
+
+Revision ID: 8b219e06b5c2
+Revises: ccdcbd31fdd2
+Create Date: 2025-09-18 10:12:41.204518
+
+"""
+
+from collections.abc import Sequence
+
+import sqlalchemy as sa
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "8b219e06b5c2"
+down_revision: str | Sequence[str] | None = "ccdcbd31fdd2"
+branch_labels: str | Sequence[str] | None = None
+depends_on: str | Sequence[str] | None = None
+
+
+ENSURE_PARTITIONS_FUNCTION = """
+CREATE OR REPLACE FUNCTION weather_forecasts_ensure_partitions(
+    range_start timestamptz, range_end timestamptz
+) RETURNS integer AS $$
+DECLARE
+    current_day date := (range_start AT TIME ZONE 'UTC')::date;
+    last_day date := (range_end AT TIME ZONE 'UTC')::date;
+    partition_name text;
+    created integer := 0;
+BEGIN
+    WHILE current_day <= last_day LOOP
+        partition_name := 'weather_forecasts_p' || to_char(current_day, 'YYYYMMDD');
+        IF to_regclass(partition_name) IS NULL THEN
+            EXECUTE format(
+                'CREATE TABLE %I PARTITION OF weather_forecasts FOR VALUES FROM (%L) TO (%L)',
+                partition_name,
+                current_day::timestamp AT TIME ZONE 'UTC',
+                (current_day + 1)::timestamp AT TIME ZONE 'UTC'
+            );
+            created := created + 1;
+        END IF;
+        current_day := current_day + 1;
+    END LOOP;
+    RETURN created;
+END;
+$$ LANGUAGE plpgsql;
+"""
+
+DROP_PARTITIONS_FUNCTION = """
+CREATE OR REPLACE FUNCTION weather_forecasts_drop_partitions(
+    retention interval
+) RETURNS integer AS $$
+DECLARE
+    cutoff date := ((now() - retention) AT TIME ZONE 'UTC')::date;
+    part record;
+    dropped integer := 0;
+BEGIN
+    FOR part IN
+        SELECT c.relname
+        FROM pg_inherits i
+        JOIN pg_class c ON c.oid = i.inhrelid
+        WHERE i.inhparent = 'weather_forecasts'::regclass
+          AND c.relname ~ '^weather_forecasts_p[0-9]{8}$'
+    LOOP
+        IF to_date(right(part.relname, 8), 'YYYYMMDD') < cutoff THEN
+            EXECUTE format('DROP TABLE %I', part.relname);
+            dropped := dropped + 1;
+        END IF;
+    END LOOP;
+    RETURN dropped;
+END;
+$$ LANGUAGE plpgsql;
+"""
+
+
+def upgrade() -> None:
+    """Create partitioned weather_forecasts, its latest-issue table and helpers."""
+    op.create_table(
+        "weather_forecasts",
+        sa.Column("latitude", sa.Float(), nullable=False),
+        sa.Column("longitude", sa.Float(), nullable=False),
+        sa.Column("forecast_time", sa.DateTime(timezone=True), nullable=False),
+        sa.Column("issue_time", sa.DateTime(timezone=True), nullable=False),
+        sa.Column("wind_speed", sa.Float(), nullable=False),
+        sa.Column("wave_height", sa.Float(), nullable=False),
+        sa.Column("wave_period", sa.Float(), nullable=True),
+        sa.Column(
+            "source", sa.String(100), nullable=False, server_default="external_api"
+        ),
+        sa.Column(
+            "created_at",
+            sa.DateTime(timezone=True),
+            server_default=sa.text("now()"),
+            nullable=False,
+        ),
+        sa.Column(
+            "updated_at",
+            sa.DateTime(timezone=True),
+            server_default=sa.text("now()"),
+            nullable=False,
+        ),
+        sa.PrimaryKeyConstraint("latitude", "longitude", "forecast_time", "issue_time"),
+        postgresql_partition_by="RANGE (forecast_time)",
+    )
+    op.execute(ENSURE_PARTITIONS_FUNCTION)
+    op.execute(DROP_PARTITIONS_FUNCTION)
+    op.create_table(
+        "weather_forecasts_latest",
+        sa.Column("latitude", sa.Float(), nullable=False),
+        sa.Column("longitude", sa.Float(), nullable=False),
+        sa.Column("forecast_time", sa.DateTime(timezone=True), nullable=False),
+        sa.Column("issue_time", sa.DateTime(timezone=True), nullable=False),
+        sa.Column("wind_speed", sa.Float(), nullable=False),
+        sa.Column("wave_height", sa.Float(), nullable=False),
+        sa.Column("wave_period", sa.Float(), nullable=True),
+        sa.PrimaryKeyConstraint("latitude", "longitude", "forecast_time"),
+    )
+    op.create_index(
+        "ix_weather_forecasts_latest_forecast_time",
+        "weather_forecasts_latest",
+        ["forecast_time"],
+    )
+
+
+def downgrade() -> None:
+    """Drop weather_forecasts, its partitions and the latest-issue table."""
+    op.drop_index(
+        "ix_weather_forecasts_latest_forecast_time",
+        table_name="weather_forecasts_latest",
+    )
+    op.drop_table("weather_forecasts_latest")
+    op.execute("DROP FUNCTION IF EXISTS weather_forecasts_drop_partitions(interval)")
+    op.execute(
+        "DROP FUNCTION IF EXISTS "
+        "weather_forecasts_ensure_partitions(timestamptz, timestamptz)"
+    )
+    op.drop_table("weather_forecasts")
@@ -0,0 +1,36 @@
+"""create_rate_limit_buckets
+
+Revision ID: c52e8d17a0b4
+Revises: 3f6d2a9c41e7
+Create Date: 2025-09-29 14:12:47.603915
+
+"""
+
+from collections.abc import Sequence
+
+import sqlalchemy as sa
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "c52e8d17a0b4"
+down_revision: str | Sequence[str] | None = "3f6d2a9c41e7"
+branch_labels: str | Sequence[str] | None = None
+depends_on: str | Sequence[str] | None = None
+
+
+def upgrade() -> None:
+    """Create the (unlogged) shared rate limit table."""
+    op.create_table(
+        "rate_limit_buckets",
+        sa.Column("key", sa.String(200), nullable=False),
+        sa.Column("tokens", sa.Float(), nullable=False),
+        sa.Column("updated_at", sa.Float(), nullable=False),
+        sa.PrimaryKeyConstraint("key"),
+        prefixes=["UNLOGGED"],
+    )
+
+
+def downgrade() -> None:
+    """Drop the shared rate limit table."""
+    op.drop_table("rate_limit_buckets")
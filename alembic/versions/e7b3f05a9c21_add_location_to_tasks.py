@@ -0,0 +1,44 @@
+"""add_location_to_tasks
+
+Revision ID: e7b3f05a9c21
+Revises: c52e8d17a0b4
+Create Date: 2025-10-06 10:21:33.518204
+
+"""
+
+from collections.abc import Sequence
+
+import sqlalchemy as sa
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "e7b3f05a9c21"
+down_revision: str | Sequence[str] | None = "c52e8d17a0b4"
+branch_labels: str | Sequence[str] | None = None
+depends_on: str | Sequence[str] | None = None
+
+
+def upgrade() -> None:
+    """Add work site columns and their indexes."""
+    op.add_column("tasks", sa.Column("latitude", sa.Float(), nullable=True))
+    op.add_column("tasks", sa.Column("longitude", sa.Float(), nullable=True))
+    op.add_column("tasks", sa.Column("site_id", sa.String(100), nullable=True))
+    op.create_index(op.f("ix_tasks_site_id"), "tasks", ["site_id"], unique=False)
+    # GiST on the built-in point type: spatial lookups without PostGIS
+    op.create_index(
+        "ix_tasks_location",
+        "tasks",
+        [sa.text("point(longitude, latitude)")],
+        postgresql_using="gist",
+        postgresql_where=sa.text("latitude IS NOT NULL"),
+    )
+
+
+def downgrade() -> None:
+    """Remove work site columns and their indexes."""
+    op.drop_index("ix_tasks_location", table_name="tasks")
+    op.drop_index(op.f("ix_tasks_site_id"), table_name="tasks")
+    op.drop_column("tasks", "site_id")
+    op.drop_column("tasks", "longitude")
+    op.drop_column("tasks", "latitude")
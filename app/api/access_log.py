@@ -0,0 +1,114 @@
+"""Request IDs and the sampled access log."""
+
+import random
+import re
+import time
+import uuid
+from collections.abc import Callable, Collection
+
+import structlog
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.metrics import request_db_stats
+
+REQUEST_ID_HEADER = "x-request-id"
+
+# Statuses from here on are always logged, at error level
+SERVER_ERROR = 500
+
+# Accept a caller's ID (e.g. from a proxy) only if it is safe to log and echo
+_VALID_REQUEST_ID = re.compile(r"[A-Za-z0-9._:-]{1,64}")
+
+logger = structlog.get_logger("app.access")
+
+
+def request_id_of(scope: Scope) -> str | None:
+    """Request ID assigned to the request of ``scope``."""
+    request_id = scope.get("state", {}).get("request_id")
+    return None if request_id is None else str(request_id)
+
+
+class AccessLogMiddleware:
+    """ASGI middleware assigning request IDs and logging requests.
+
+    The request ID is taken from ``X-Request-ID`` when valid, generated otherwise,
+    bound to the logging context, stored in ``request.state.request_id`` and
+    echoed in the response. Requests to ``sampled_routes`` are logged with
+    probability ``sample_rate``, unless they failed with a 5xx or were slow.
+    """
+
+    def __init__(
+        self,
+        app: ASGIApp,
+        sampled_routes: Collection[str] = (),
+        sample_rate: float = 1.0,
+        slow_request_ms: float = 1000.0,
+        random_source: Callable[[], float] = random.random,
+    ):
+        self.app = app
+        self.sampled_routes = frozenset(sampled_routes)
+        self.sample_rate = sample_rate
+        self.slow_request_ms = slow_request_ms
+        self.random = random_source
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        request_id = self._request_id(scope)
+        scope.setdefault("state", {})["request_id"] = request_id
+        structlog.contextvars.clear_contextvars()
+        structlog.contextvars.bind_contextvars(request_id=request_id)
+        header = (REQUEST_ID_HEADER.encode(), request_id.encode())
+
+        status = 500
+
+        async def send_with_id(message: Message) -> None:
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+                message["headers"] = [*message.get("headers", []), header]
+            await send(message)
+
+        started = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_with_id)
+        finally:
+            self._log(scope, status, (time.perf_counter() - started) * 1000)
+
+    @staticmethod
+    def _request_id(scope: Scope) -> str:
+        for name, value in scope["headers"]:
+            if name == REQUEST_ID_HEADER.encode():
+                candidate = str(value.decode("latin-1"))
+                if _VALID_REQUEST_ID.fullmatch(candidate):
+                    return candidate
+        return uuid.uuid4().hex
+
+    def _log(self, scope: Scope, status: int, duration_ms: float) -> None:
+        route = getattr(scope.get("route"), "path", None)
+        if (
+            route in self.sampled_routes
+            and status < SERVER_ERROR
+            and duration_ms < self.slow_request_ms
+            and self.random() >= self.sample_rate
+        ):
+            return
+
+        fields = {
+            "method": scope["method"],
+            "path": scope["path"],
+            "route": route,
+            "status": status,
+            "duration_ms": round(duration_ms, 2),
+        }
+        # Filled by the metrics middleware when it runs outside of this one
+        db = request_db_stats.get()
+        if db is not None:
+            fields["db_queries"] = db[0]
+            fields["db_ms"] = round(db[1] * 1000, 2)
+        if status >= SERVER_ERROR:
+            logger.error("request", **fields)
+        else:
+            logger.info("request", **fields)
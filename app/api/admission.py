@@ -0,0 +1,277 @@
+"""Rate limiting and admission control.
+
+Every request first takes a token from its client's bucket (``X-API-Key`` when
+sent, the client address otherwise); an empty bucket answers 429. Expensive
+routes are then admitted through their own concurrency limit: a few requests may
+wait briefly for a slot, the rest get 503 right away, so a burst of WoW analyses
+can't queue up behind each other and starve task CRUD.
+
+Both rejections carry ``Retry-After``. Buckets live in worker memory by default;
+``RATE_LIMIT_STORE=database`` shares them between workers through Postgres.
+"""
+
+import asyncio
+import hashlib
+import logging
+import math
+import time
+from collections import OrderedDict
+from collections.abc import Callable
+from typing import Any, Protocol
+
+from sqlalchemy import bindparam, delete, func
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.ext.asyncio import AsyncEngine
+from starlette.datastructures import Headers
+from starlette.responses import JSONResponse
+from starlette.types import ASGIApp, Receive, Scope, Send
+
+from app.config import Settings
+from app.database import get_engine
+from app.models.rate_limit import RateLimitBucket
+
+logger = logging.getLogger(__name__)
+
+API_KEY_HEADER = "x-api-key"
+
+
+class TokenBuckets(Protocol):
+    """Per-client token buckets."""
+
+    async def take(self, key: str) -> float:
+        """
+        Take one token from the bucket of ``key``.
+
+        Returns:
+            0 when the request is allowed, otherwise seconds until a token is available
+        """
+        ...
+
+
+class MemoryBuckets:
+    """Token buckets of one worker, keeping the most recently seen clients."""
+
+    def __init__(
+        self,
+        rate: float,
+        burst: int,
+        max_clients: int = 10_000,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.rate = rate
+        self.burst = burst
+        self.max_clients = max_clients
+        self.clock = clock
+        # key -> (tokens, updated_at), least recently used first
+        self._buckets: OrderedDict[str, tuple[float, float]] = OrderedDict()
+
+    async def take(self, key: str) -> float:
+        now = self.clock()
+        tokens, updated_at = self._buckets.pop(key, (self.burst, now))
+        tokens = min(self.burst, tokens + (now - updated_at) * self.rate)
+
+        retry_after = 0.0
+        if tokens >= 1:
+            tokens -= 1
+        else:
+            retry_after = (1 - tokens) / self.rate
+
+        self._buckets[key] = (tokens, now)
+        if len(self._buckets) > self.max_clients:
+            # Forgetting a client only hands it a full bucket again
+            self._buckets.popitem(last=False)
+        return retry_after
+
+
+class DatabaseBuckets:
+    """Token buckets shared by all workers, one atomic upsert per request.
+
+    If the database is unreachable requests are let through: rate limiting must
+    not turn a database outage into a full API outage.
+    """
+
+    def __init__(
+        self,
+        rate: float,
+        burst: int,
+        engine: AsyncEngine | None = None,
+        prune_every: int = 1000,
+    ):
+        self.rate = rate
+        self.burst = burst
+        self.engine = engine
+        self.prune_every = prune_every
+        self._calls = 0
+
+        now = func.extract("epoch", func.clock_timestamp())
+        bucket = RateLimitBucket.__table__.c
+        stmt = insert(RateLimitBucket).values(
+            key=bindparam("key"), tokens=burst - 1, updated_at=now
+        )
+        refilled = func.least(
+            burst,
+            bucket.tokens + rate * func.greatest(now - bucket.updated_at, 0),
+        )
+        # Denied requests update nothing and therefore return no row
+        self._take = stmt.on_conflict_do_update(
+            index_elements=[bucket.key],
+            set_={"tokens": refilled - 1, "updated_at": now},
+            where=refilled >= 1,
+        ).returning(bucket.tokens)
+        # A bucket idle for this long is full, which is the same as no row at all
+        self._prune = delete(RateLimitBucket).where(
+            RateLimitBucket.updated_at < now - burst / rate
+        )
+
+    async def take(self, key: str) -> float:
+        self._calls += 1
+        try:
+            async with (self.engine or get_engine()).begin() as conn:
+                allowed = (
+                    await conn.execute(self._take, {"key": key})
+                ).first() is not None
+                if self._calls % self.prune_every == 0:
+                    await conn.execute(self._prune)
+        except Exception:
+            logger.warning("Rate limit store unavailable, admitting", exc_info=True)
+            return 0.0
+        # Less than one token left: one is back within 1 / rate seconds
+        return 0.0 if allowed else 1 / self.rate
+
+
+class ConcurrencyLimit:
+    """Caps concurrent requests of a route, with a short bounded wait for a slot."""
+
+    def __init__(self, limit: int, queue_size: int, max_wait: float):
+        self.limit = limit
+        self.queue_size = queue_size
+        self.max_wait = max_wait
+        self.waiting = 0
+        self._slots = asyncio.Semaphore(limit)
+
+    async def acquire(self) -> bool:
+        """Take a slot; False when the queue is full or no slot frees up in time."""
+        if not self._slots.locked():
+            await self._slots.acquire()
+            return True
+        if self.waiting >= self.queue_size:
+            return False
+
+        self.waiting += 1
+        try:
+            async with asyncio.timeout(self.max_wait):
+                await self._slots.acquire()
+            return True
+        except TimeoutError:
+            return False
+        finally:
+            self.waiting -= 1
+
+    def release(self) -> None:
+        """Give the slot back."""
+        self._slots.release()
+
+
+def client_key(scope: Scope, trust_forwarded: bool = False) -> str:
+    """Identify the client of a request for rate limiting."""
+    headers = Headers(scope=scope)
+    api_key = headers.get(API_KEY_HEADER)
+    if api_key:
+        # Buckets (possibly stored in the database) never hold the key itself
+        return "key:" + hashlib.sha256(api_key.encode()).hexdigest()[:32]
+
+    forwarded = headers.get("x-forwarded-for") if trust_forwarded else None
+    if forwarded:
+        return "ip:" + forwarded.split(",")[0].strip()
+    client = scope.get("client")
+    return "ip:" + (client[0] if client else "unknown")
+
+
+def _reject(status_code: int, detail: str, retry_after: float) -> JSONResponse:
+    return JSONResponse(
+        {"detail": detail},
+        status_code=status_code,
+        headers={"Retry-After": str(max(1, math.ceil(retry_after)))},
+    )
+
+
+class AdmissionMiddleware:
+    """ASGI middleware applying rate limits and per-route concurrency limits."""
+
+    def __init__(
+        self,
+        app: ASGIApp,
+        *,
+        buckets: TokenBuckets | None = None,
+        concurrency: dict[tuple[str, str], ConcurrencyLimit] | None = None,
+        exempt_paths: frozenset[str] = frozenset({"/health", "/metrics"}),
+        trust_forwarded: bool = False,
+        retry_after: float = 1.0,
+    ):
+        self.app = app
+        self.buckets = buckets
+        self.concurrency = concurrency or {}
+        self.exempt_paths = exempt_paths
+        self.trust_forwarded = trust_forwarded
+        self.retry_after = retry_after
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or scope["path"] in self.exempt_paths:
+            await self.app(scope, receive, send)
+            return
+
+        if self.buckets is not None:
+            wait = await self.buckets.take(client_key(scope, self.trust_forwarded))
+            if wait > 0:
+                response = _reject(429, "Rate limit exceeded", wait)
+                await response(scope, receive, send)
+                return
+
+        limit = self.concurrency.get((scope["method"], scope["path"]))
+        if limit is None:
+            await self.app(scope, receive, send)
+            return
+
+        if not await limit.acquire():
+            response = _reject(503, "Server busy, retry later", self.retry_after)
+            await response(scope, receive, send)
+            return
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            limit.release()
+
+
+def admission_options(settings: Settings) -> dict[str, Any]:
+    """Middleware arguments for the configured limits."""
+    buckets: TokenBuckets | None = None
+    if settings.rate_limit_enabled:
+        if settings.rate_limit_store == "database":
+            buckets = DatabaseBuckets(
+                settings.rate_limit_per_second, settings.rate_limit_burst
+            )
+        else:
+            buckets = MemoryBuckets(
+                settings.rate_limit_per_second, settings.rate_limit_burst
+            )
+
+    def limit(max_concurrency: int) -> ConcurrencyLimit:
+        return ConcurrencyLimit(
+            max_concurrency,
+            settings.admission_queue_size,
+            settings.admission_max_wait_seconds,
+        )
+
+    # The WoW analyses share one limit
+    wow = limit(settings.wow_max_concurrency)
+    return {
+        "buckets": buckets,
+        "concurrency": {
+            ("POST", "/wow/analyze"): wow,
+            ("POST", "/wow/route"): wow,
+            ("POST", "/wow/sweep"): wow,
+            ("POST", "/tasks"): limit(settings.bulk_create_max_concurrency),
+        },
+        "trust_forwarded": settings.rate_limit_trust_forwarded,
+        "retry_after": settings.admission_max_wait_seconds,
+    }
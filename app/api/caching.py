@@ -0,0 +1,123 @@
+"""HTTP caching for forecast endpoints.
+
+A forecast response only depends on the forecast snapshot and the query, so its
+ETag is the snapshot version plus the normalized query parameters (and the
+representation). A request whose ``If-None-Match`` matches gets a 304 before the
+forecast is looked up or serialized.
+
+``Cache-Control: max-age`` runs until the next expected forecast issue, so shared
+caches (CDN, vessel-side proxies) can absorb repeated polling. Once that issue is
+overdue, max-age drops to ``FORECAST_CACHE_MIN_AGE_SECONDS`` until it arrives.
+"""
+
+import math
+import zlib
+from dataclasses import dataclass
+from datetime import UTC, datetime, timedelta
+from typing import Any
+
+from fastapi import Request
+from fastapi.responses import Response
+
+from app.config import get_settings
+from app.metrics import record_cache
+from app.services.forecast_snapshot import ForecastSnapshot, to_epoch
+from app.services.weather import WeatherService
+
+
+@dataclass(frozen=True, slots=True)
+class CachePolicy:
+    """Validator and freshness of one cacheable response."""
+
+    etag: str
+    max_age: int
+
+    @property
+    def headers(self) -> dict[str, str]:
+        """Headers sent with both full and 304 responses."""
+        return {
+            "ETag": self.etag,
+            "Cache-Control": f"public, max-age={self.max_age}",
+            "Vary": "Accept",
+        }
+
+    def matches(self, request: Request) -> bool:
+        """Whether the client's ``If-None-Match`` already holds this response."""
+        header = request.headers.get("if-none-match")
+        if header is None:
+            matched = False
+        else:
+            # Weak comparison, as required for If-None-Match
+            tags = {tag.strip().removeprefix("W/") for tag in header.split(",")}
+            matched = header.strip() == "*" or self.etag in tags
+        record_cache("http_etag", matched)
+        return matched
+
+    def not_modified(self) -> Response:
+        """Empty 304 response carrying the validator."""
+        return Response(status_code=304, headers=self.headers)
+
+
+def _normalize(value: Any) -> str:
+    """Canonical text of a query parameter, so equivalent queries share an ETag."""
+    if value is None:
+        return ""
+    if isinstance(value, datetime):
+        return repr(to_epoch(value))
+    if isinstance(value, float):
+        return repr(value)
+    return str(value)
+
+
+def make_etag(version: str, *params: Any) -> str:
+    """Strong ETag for a forecast version and query."""
+    key = "&".join(_normalize(param) for param in params)
+    return f'"{version}-{zlib.crc32(key.encode()):08x}"'
+
+
+def seconds_until_next_issue(issue_time: datetime, now: datetime) -> int:
+    """
+    Seconds until the issue following ``issue_time`` is expected.
+
+    Returns the configured minimum once that issue is overdue.
+    """
+    settings = get_settings()
+    next_issue = issue_time + timedelta(hours=settings.forecast_issue_interval_hours)
+    remaining = (next_issue - now).total_seconds()
+    if remaining <= 0:
+        return settings.forecast_cache_min_age_seconds
+    return math.ceil(remaining)
+
+
+def weather_cache_policy(
+    weather_service: WeatherService,
+    *params: Any,
+    now: datetime | None = None,
+    expires_in: int | None = None,
+) -> tuple[ForecastSnapshot | None, CachePolicy | None]:
+    """
+    Grab the current snapshot and the cache policy of a response computed from it.
+
+    The response must be computed from the returned snapshot, so a forecast
+    swapped in meanwhile can't end up under the previous version's ETag.
+    Forecasts read from the database have no snapshot version and aren't cached.
+
+    Args:
+        weather_service: Service the response is computed with
+        params: Everything else the response depends on
+        now: Current time (defaults to now)
+        expires_in: Upper bound on max-age, e.g. the end of a rolling window
+
+    Returns:
+        tuple: (snapshot, policy), both None for database-backed forecasts
+    """
+    if weather_service.source != "file":
+        return None, None
+
+    snapshot = weather_service.snapshot
+    now = now or datetime.now(UTC)
+    max_age = seconds_until_next_issue(snapshot.issue_time, now)
+    if expires_in is not None:
+        max_age = min(max_age, expires_in)
+    policy = CachePolicy(etag=make_etag(snapshot.version, *params), max_age=max_age)
+    return snapshot, policy
@@ -0,0 +1,239 @@
+"""Columnar binary responses.
+
+Analytics clients turn the per-point JSON of ``/weather`` and ``/wow/analyze`` straight
+back into arrays. Sending ``Accept: application/vnd.roop.columnar`` returns the
+same data as packed little-endian columns instead; JSON stays the default.
+
+Layout (little-endian, every block padded to 8 bytes)::
+
+    header    magic "ROOPCOLS", format version u16, column count u16,
+              row count u32, metadata length u32, reserved u32
+    metadata  UTF-8 JSON object with the scalar fields of the response
+    columns   per column: name (16 bytes, NUL padded), type u8, 3 reserved bytes,
+              data length u32, followed by the data
+
+Column types: ``q`` int64 (epoch seconds), ``f`` float32 and ``b`` bitset
+(bit ``i`` of the column is bit ``i % 8`` of byte ``i // 8``). With numpy a
+column reads as ``np.frombuffer(body, "<f4", count, offset)``, and a bitset as
+``np.unpackbits(..., bitorder="little")[:rows]``.
+"""
+
+import json
+import struct
+import sys
+from array import array
+from collections.abc import Sequence
+from dataclasses import dataclass
+from datetime import UTC, datetime
+from typing import Any
+
+from fastapi import Request
+from fastapi.responses import Response
+
+from app.models.task import Task
+from app.services.forecast_snapshot import (
+    TIMESTAMP_TYPECODE,
+    VALUE_TYPECODE,
+    ForecastSeries,
+)
+from app.services.go_no_go import pack_bits
+from app.services.wow import WoWEvaluation
+
+COLUMNAR_MEDIA_TYPE = "application/vnd.roop.columnar"
+MAGIC = b"ROOPCOLS"
+FORMAT_VERSION = 1
+
+HEADER = struct.Struct("<8sHHIII")
+COLUMN = struct.Struct("<16sBxxxI")
+
+INT64 = "q"
+FLOAT32 = "f"
+BITSET = "b"
+
+# Both representations live at the same URL
+VARY_ACCEPT = {"Vary": "Accept"}
+
+# Documents the alternative representation in the OpenAPI schema
+COLUMNAR_RESPONSES: dict[int | str, dict[str, Any]] = {
+    200: {
+        "content": {COLUMNAR_MEDIA_TYPE: {}},
+        "description": f"JSON, or packed columns with `Accept: {COLUMNAR_MEDIA_TYPE}`",
+    }
+}
+
+
+@dataclass(frozen=True, slots=True)
+class Column:
+    """One encoded column."""
+
+    name: str
+    kind: str
+    data: bytes
+
+
+def _pad(data: bytes) -> bytes:
+    return data + b"\0" * (-len(data) % 8)
+
+
+def _packed(values: Sequence[Any], typecode: str) -> bytes:
+    """Raw little-endian bytes of a typed column."""
+    if sys.byteorder == "little" and (
+        (isinstance(values, memoryview) and values.format == typecode)
+        or (isinstance(values, array) and values.typecode == typecode)
+    ):
+        return values.tobytes()
+    packed = array(typecode, values)
+    if sys.byteorder != "little":
+        packed.byteswap()
+    return packed.tobytes()
+
+
+def int64_column(name: str, values: Sequence[int]) -> Column:
+    """Encode an int64 column."""
+    return Column(name, INT64, _packed(values, TIMESTAMP_TYPECODE))
+
+
+def float32_column(name: str, values: Sequence[float]) -> Column:
+    """Encode a float32 column."""
+    return Column(name, FLOAT32, _packed(values, VALUE_TYPECODE))
+
+
+def bitset_column(name: str, values: Sequence[bool]) -> Column:
+    """Encode booleans as a bitset, least significant bit first."""
+    return mask_column(name, pack_bits(values), len(values))
+
+
+def mask_column(name: str, mask: int, rows: int) -> Column:
+    """Encode a packed go/no-go mask of ``rows`` points as a bitset."""
+    return Column(name, BITSET, mask.to_bytes((rows + 7) // 8, "little"))
+
+
+def encode_columnar(
+    metadata: dict[str, Any], rows: int, columns: Sequence[Column]
+) -> bytes:
+    """Encode metadata and columns into a columnar body."""
+    meta = json.dumps(metadata, separators=(",", ":")).encode("utf-8")
+    parts = [
+        HEADER.pack(MAGIC, FORMAT_VERSION, len(columns), rows, len(meta), 0),
+        _pad(meta),
+    ]
+    for column in columns:
+        parts.append(
+            COLUMN.pack(column.name.encode("ascii"), ord(column.kind), len(column.data))
+        )
+        parts.append(_pad(column.data))
+    return b"".join(parts)
+
+
+def decode_columnar(body: bytes) -> tuple[dict[str, Any], dict[str, list[Any]]]:
+    """
+    Decode a columnar body (reference implementation for clients and tests).
+
+    Returns:
+        tuple: (metadata, columns)
+    """
+    magic, version, count, rows, meta_length, _ = HEADER.unpack_from(body, 0)
+    if magic != MAGIC:
+        raise ValueError("Not a columnar response body")
+    if version != FORMAT_VERSION:
+        raise ValueError(f"Unsupported columnar format version {version}")
+
+    offset = HEADER.size
+    metadata = json.loads(body[offset : offset + meta_length])
+    offset += meta_length + (-meta_length % 8)
+
+    columns: dict[str, list[Any]] = {}
+    for _ in range(count):
+        raw_name, kind, length = COLUMN.unpack_from(body, offset)
+        offset += COLUMN.size
+        data = body[offset : offset + length]
+        offset += length + (-length % 8)
+
+        name = raw_name.rstrip(b"\0").decode("ascii")
+        if chr(kind) == BITSET:
+            bits = int.from_bytes(data, "little")
+            columns[name] = [bool(bits >> i & 1) for i in range(rows)]
+        else:
+            values = array(chr(kind), data)
+            if sys.byteorder != "little":
+                values.byteswap()
+            columns[name] = values.tolist()
+    return metadata, columns
+
+
+def forecast_columns(
+    series: ForecastSeries | None, lat: float, lon: float
+) -> tuple[dict[str, Any], int, list[Column]]:
+    """Columnar payload of a forecast: the snapshot columns as they are stored."""
+    if series is None:
+        return {"location": {"lat": lat, "lon": lon}}, 0, []
+    return (
+        {"location": {"lat": series.lat, "lon": series.lon}},
+        len(series),
+        [
+            int64_column("timestamp", series.timestamps),
+            float32_column("wind_speed", series.wind_speed),
+            float32_column("wave_height", series.wave_height),
+            float32_column("wave_period", series.wave_period),
+        ],
+    )
+
+
+def wow_columns(
+    task: Task, evaluation: WoWEvaluation
+) -> tuple[dict[str, Any], int, list[Column]]:
+    """
+    Columnar payload of a WoW analysis.
+
+    Operational windows are the set bits of ``window_start``, each spanning
+    ``task_duration_points`` points.
+    """
+    series = evaluation.series
+    metadata: dict[str, Any] = {
+        "task_id": task.id,
+        "task_name": task.name,
+        "task_duration_hours": task.duration_hours,
+        "task_duration_points": evaluation.task_duration_points,
+        "wave_height_limit": task.wave_height_limit,
+        "can_proceed": bool(evaluation.start_mask),
+        "analysis_time": datetime.now(UTC).isoformat(),
+        "forecast_data_points": len(evaluation.wave_heights),
+        "suitable_windows_count": evaluation.start_mask.bit_count(),
+    }
+    if series is None or not evaluation.wave_heights:
+        return metadata, 0, []
+
+    metadata["weather_location"] = {"lat": series.lat, "lon": series.lon}
+    return (
+        metadata,
+        len(series),
+        [
+            int64_column("timestamp", series.timestamps),
+            float32_column("wave_height", series.wave_height),
+            mask_column("go_no_go", evaluation.go_mask, len(series)),
+            mask_column("window_start", evaluation.start_mask, len(series)),
+        ],
+    )
+
+
+def wants_columnar(request: Request) -> bool:
+    """Whether the client asked for the columnar format (JSON otherwise)."""
+    for item in request.headers.get("accept", "").split(","):
+        media_type, *params = (part.strip() for part in item.split(";"))
+        if media_type.lower() == COLUMNAR_MEDIA_TYPE:
+            return not any(p.replace(" ", "") in ("q=0", "q=0.0") for p in params)
+    return False
+
+
+def columnar_response(
+    metadata: dict[str, Any],
+    rows: int,
+    columns: Sequence[Column],
+    headers: dict[str, str] | None = None,
+) -> Response:
+    """Render a columnar body."""
+    return Response(
+        content=encode_columnar(metadata, rows, columns),
+        media_type=COLUMNAR_MEDIA_TYPE,
+        headers=headers,
+    )
@@ -0,0 +1,78 @@
+"""Request instrumentation and the ``/metrics`` exposition."""
+
+import time
+from typing import Any
+
+from starlette.responses import Response
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.metrics import (
+    CONTENT_TYPE,
+    DB_QUERIES_PER_REQUEST,
+    DB_TIME_PER_REQUEST,
+    HTTP_REQUEST_DURATION,
+    HTTP_REQUESTS_IN_FLIGHT,
+    REGISTRY,
+    request_db_stats,
+)
+
+# Label of requests no route matched, so unknown paths can't blow up cardinality
+UNMATCHED_ROUTE = "unmatched"
+
+
+class MetricsMiddleware:
+    """ASGI middleware recording latency and database usage per route template."""
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+        self.in_flight = HTTP_REQUESTS_IN_FLIGHT.labels()
+        # Histogram children per (method, route, status): one lookup per request
+        self._children: dict[tuple[str, str, int], tuple[Any, Any, Any]] = {}
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        status = 500
+
+        async def send_with_status(message: Message) -> None:
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        stats = [0, 0.0]
+        token = request_db_stats.set(stats)
+        self.in_flight.inc()
+        started = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            elapsed = time.perf_counter() - started
+            self.in_flight.inc(-1)
+            request_db_stats.reset(token)
+
+            # The router leaves the matched route in the scope
+            route = scope.get("route")
+            key = (scope["method"], getattr(route, "path", UNMATCHED_ROUTE), status)
+            children = self._children.get(key)
+            if children is None:
+                children = self._children[key] = self._new_children(*key)
+            duration, queries, db_time = children
+            duration.observe(elapsed)
+            queries.observe(stats[0])
+            db_time.observe(stats[1])
+
+    @staticmethod
+    def _new_children(method: str, path: str, status: int) -> tuple[Any, Any, Any]:
+        return (
+            HTTP_REQUEST_DURATION.labels(method, path, str(status)),
+            DB_QUERIES_PER_REQUEST.labels(path),
+            DB_TIME_PER_REQUEST.labels(path),
+        )
+
+
+def metrics_response() -> Response:
+    """The registry in Prometheus text format."""
+    return Response(REGISTRY.render(), media_type=CONTENT_TYPE)
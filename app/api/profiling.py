@@ -0,0 +1,111 @@
+"""Admin-only profiling hooks (mounted only when ``PROFILING_ENABLED``)."""
+
+import asyncio
+import secrets
+import tempfile
+from functools import lru_cache
+from pathlib import Path
+
+from fastapi import Header, HTTPException
+from starlette.datastructures import Headers
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.config import get_settings
+from app.profiling import ProfileStore, start_request_profile, stop_request_profile
+
+PROFILE_HEADER = "x-profile"
+ADMIN_TOKEN_HEADER = "x-admin-token"
+
+
+def is_admin_token(token: str | None) -> bool:
+    """Whether ``token`` is the configured admin token."""
+    expected = get_settings().profiling_token
+    if not token or not expected:
+        return False
+    return secrets.compare_digest(token.encode(), expected.encode())
+
+
+async def require_admin(x_admin_token: str | None = Header(None)) -> None:
+    """Dependency rejecting requests without the admin token."""
+    if not is_admin_token(x_admin_token):
+        # Same answer as a disabled endpoint, so probing reveals nothing
+        raise HTTPException(status_code=404, detail="Not Found")
+
+
+class RequestProfilerMiddleware:
+    """ASGI middleware running requests sent with ``X-Profile: 1`` under cProfile.
+
+    The request must carry the admin token. The response gets an
+    ``X-Profile-Id`` header naming the saved profile (``/admin/profiles/{id}``),
+    or ``X-Profile-Id: busy`` when another request is being profiled.
+    """
+
+    def __init__(self, app: ASGIApp, store: ProfileStore):
+        self.app = app
+        self.store = store
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        headers = Headers(scope=scope)
+        if PROFILE_HEADER not in headers or not is_admin_token(
+            headers.get(ADMIN_TOKEN_HEADER)
+        ):
+            await self.app(scope, receive, send)
+            return
+
+        started = start_request_profile()
+        if started is None:
+            await self.app(scope, receive, self._with_profile_id(send, "busy"))
+            return
+
+        profile_id, profiler = started
+        finished = False
+
+        async def finish() -> None:
+            nonlocal finished
+            finished = True
+            stop_request_profile(profiler)
+            query = scope.get("query_string", b"").decode("latin-1")
+            label = f"{scope['method']} {scope['path']}"
+            if query:
+                label += f"?{query}"
+            await asyncio.to_thread(self.store.save, profile_id, profiler, label)
+
+        send_with_profile_id = self._with_profile_id(send, profile_id)
+
+        async def send_after_saving(message: Message) -> None:
+            # Save before the response completes, so the profile can be fetched
+            # as soon as the client has the ID
+            if message["type"] == "http.response.body" and not message.get(
+                "more_body", False
+            ):
+                await finish()
+            await send_with_profile_id(message)
+
+        try:
+            await self.app(scope, receive, send_after_saving)
+        finally:
+            if not finished:
+                await finish()
+
+    @staticmethod
+    def _with_profile_id(send: Send, profile_id: str) -> Send:
+        async def send_with_profile_id(message: Message) -> None:
+            if message["type"] == "http.response.start":
+                message["headers"] = [
+                    *message.get("headers", []),
+                    (b"x-profile-id", profile_id.encode()),
+                ]
+            await send(message)
+
+        return send_with_profile_id
+
+
+@lru_cache
+def get_profile_store() -> ProfileStore:
+    """Store of request profiles, in ``PROFILE_DIR`` or a temporary directory."""
+    settings = get_settings()
+    directory = settings.profile_dir or Path(tempfile.gettempdir()) / "roop-profiles"
+    return ProfileStore(directory, keep=settings.profile_keep)
@@ -0,0 +1,48 @@
+"""Read-your-writes for replica reads (mounted only with ``DATABASE_REPLICA_URL``)."""
+
+import math
+import time
+
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.database import PRIMARY_COOKIE, request_wrote
+
+
+class ReadYourWritesMiddleware:
+    """ASGI middleware pinning clients that wrote to the primary for a while.
+
+    When a request wrote to the database, the response sets a cookie with the
+    time until which ``get_read_db`` keeps that client on the primary, so its
+    next reads see the write even if the replica lags behind.
+    """
+
+    def __init__(self, app: ASGIApp, sticky_seconds: float):
+        self.app = app
+        self.sticky_seconds = sticky_seconds
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        wrote = [False]
+
+        async def send_with_cookie(message: Message) -> None:
+            # Routes commit before responding, so writes are known by now
+            if message["type"] == "http.response.start" and wrote[0]:
+                until = time.time() + self.sticky_seconds
+                cookie = (
+                    f"{PRIMARY_COOKIE}={until:.3f}; Max-Age={math.ceil(self.sticky_seconds)}; "
+                    "Path=/; HttpOnly; SameSite=Lax"
+                )
+                message["headers"] = [
+                    *message.get("headers", []),
+                    (b"set-cookie", cookie.encode()),
+                ]
+            await send(message)
+
+        token = request_wrote.set(wrote)
+        try:
+            await self.app(scope, receive, send_with_cookie)
+        finally:
+            request_wrote.reset(token)
@@ -0,0 +1,103 @@
+"""Fast JSON response path.
+
+FastAPI's default path runs the returned value through ``jsonable_encoder`` (a
+pure-Python walk of the whole payload) before ``json.dumps``. For large
+forecasts and WoW results that dominates request time. Here:
+
+- ``FastJSONResponse`` renders with orjson when it is installed, falling back to
+  a compact ``json.dumps``. Either way NaN and infinity become ``null``, as in
+  orjson and pydantic, so a payload renders the same with or without orjson;
+- ``model_response`` serializes a Pydantic model with ``model_dump_json``
+  (pydantic-core, no Python-level walk) and returns it as-is, so FastAPI skips
+  both response-model validation and encoding.
+"""
+
+import json
+import math
+from collections.abc import Callable
+from functools import partial
+from typing import Any
+
+from fastapi.responses import JSONResponse, Response
+from pydantic import BaseModel
+
+from app.config import get_settings
+
+
+def _json_dumps(content: Any) -> bytes:
+    """Compact ``json.dumps``, rendering NaN and infinity as null."""
+    try:
+        return _strict_json_dumps(content)
+    except ValueError:
+        # Only payloads with non-finite floats pay for the extra walk
+        return _strict_json_dumps(_finite(content))
+
+
+def _strict_json_dumps(content: Any) -> bytes:
+    """Compact ``json.dumps``, refusing NaN and infinity."""
+    return json.dumps(
+        content, ensure_ascii=False, allow_nan=False, separators=(",", ":")
+    ).encode("utf-8")
+
+
+def _finite(content: Any) -> Any:
+    """Copy of ``content`` with non-finite floats replaced by None."""
+    if isinstance(content, float):
+        return content if math.isfinite(content) else None
+    if isinstance(content, dict):
+        return {key: _finite(value) for key, value in content.items()}
+    if isinstance(content, list | tuple):
+        return [_finite(value) for value in content]
+    return content
+
+
+_dumps: Callable[[Any], bytes]
+try:
+    import orjson
+except ImportError:  # pragma: no cover - optional dependency
+    _dumps = _json_dumps
+else:
+    _dumps = partial(orjson.dumps, option=orjson.OPT_NON_STR_KEYS)
+
+
+class FastJSONResponse(JSONResponse):
+    """JSON response rendered with orjson when available."""
+
+    def render(self, content: Any) -> bytes:
+        return _dumps(content)
+
+
+RESPONSE_CLASSES: dict[str, type[JSONResponse]] = {
+    "json": JSONResponse,
+    "fast": FastJSONResponse,
+}
+
+
+def get_response_class(name: str) -> type[JSONResponse]:
+    """Resolve the configured default response class."""
+    try:
+        return RESPONSE_CLASSES[name]
+    except KeyError:
+        raise ValueError(
+            f"Unknown response class '{name}', expected one of {sorted(RESPONSE_CLASSES)}"
+        ) from None
+
+
+def json_response(
+    content: Any, status_code: int = 200, headers: dict[str, str] | None = None
+) -> JSONResponse:
+    """Render already JSON-compatible content with the configured response class."""
+    response_class = get_response_class(get_settings().default_response_class)
+    return response_class(content=content, status_code=status_code, headers=headers)
+
+
+def model_response(
+    model: BaseModel, status_code: int = 200, headers: dict[str, str] | None = None
+) -> Response:
+    """Serialize a model straight to JSON bytes, bypassing FastAPI's encoder."""
+    return Response(
+        content=model.model_dump_json(),
+        status_code=status_code,
+        media_type="application/json",
+        headers=headers,
+    )
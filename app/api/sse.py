@@ -0,0 +1,47 @@
+"""Server-Sent Events framing for forecast subscriptions."""
+
+from collections.abc import AsyncIterator
+
+from app.services.forecast_broadcast import ForecastBroadcaster, Subscription
+
+SSE_MEDIA_TYPE = "text/event-stream"
+SSE_HEADERS = {
+    "Cache-Control": "no-cache",
+    # Stop nginx-style proxies from buffering the stream
+    "X-Accel-Buffering": "no",
+}
+
+
+async def sse_events(
+    broadcaster: ForecastBroadcaster,
+    subscription: Subscription,
+    heartbeat_seconds: float,
+    retry_ms: int = 5000,
+) -> AsyncIterator[bytes]:
+    """
+    Stream a subscription as SSE until it is closed or the client goes away.
+
+    Idle streams get a comment line every ``heartbeat_seconds`` so proxies keep
+    the connection open and dead clients are noticed.
+    """
+    try:
+        yield f"retry: {retry_ms}\n\n".encode()
+        while True:
+            try:
+                event = await subscription.next_event(heartbeat_seconds)
+            except TimeoutError:
+                yield b": keep-alive\n\n"
+                continue
+            if event is None:
+                return
+            yield b"".join(
+                (
+                    b"event: forecast\nid: ",
+                    event.id.encode(),
+                    b"\ndata: ",
+                    event.data,
+                    b"\n\n",
+                )
+            )
+    finally:
+        broadcaster.unsubscribe(subscription)
@@ -1,11 +1,49 @@
-"""Database configuration and session management."""
+"""Database configuration and session management.
 
-from collections.abc import AsyncGenerator
+The engine and session factory are created on first use rather than at import
+time, so importing models (e.g. during test collection) needs no configuration.
 
-from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
-from sqlalchemy.orm import DeclarativeBase
+With ``DATABASE_REPLICA_URL`` set, read-only endpoints take their session from
+``get_read_db``. Such a session runs plain SELECTs on the replica until its
+first write (or anything that isn't a plain SELECT) and uses the primary from
+then on. A client that wrote recently reads from the primary for
+``REPLICA_STICKY_SECONDS`` (see ``app.api.replica``), so it sees its own writes
+despite replication lag.
+"""
 
-from app.config import settings
+import contextvars
+import time
+from collections.abc import AsyncGenerator, AsyncIterator
+from contextlib import asynccontextmanager
+from functools import lru_cache
+from typing import Any
+
+from fastapi import Request
+from sqlalchemy import CompoundSelect, Select
+from sqlalchemy.engine import Connection, Engine
+from sqlalchemy.ext.asyncio import (
+    AsyncEngine,
+    AsyncSession,
+    async_sessionmaker,
+    create_async_engine,
+)
+from sqlalchemy.orm import DeclarativeBase, Mapper, Session
+from sqlalchemy.sql import ClauseElement
+
+from app.config import get_settings
+from app.log import log_slow_queries
+from app.metrics import instrument_engine
+
+# Cookie holding the time until which a client that wrote reads from the primary
+PRIMARY_COOKIE = "roop_primary_until"
+
+# Set per request by ``ReadYourWritesMiddleware``; flagged by the first write
+request_wrote: contextvars.ContextVar[list[bool] | None] = contextvars.ContextVar(
+    "request_wrote", default=None
+)
+
+_REPLICA = "replica"
+_ON_PRIMARY = "on_primary"
 
 
 class Base(DeclarativeBase):
@@ -14,24 +52,110 @@ class Base(DeclarativeBase):
     pass
 
 
-# Create async engine
-engine = create_async_engine(
-    settings.database_url_async,
-    echo=settings.debug,
-    future=True,
-)
+class RoutingSession(Session):
+    """Session reading from a replica (``info["replica"]``) until it writes.
 
-# Create async session factory
-AsyncSessionLocal = async_sessionmaker(
-    engine,
-    class_=AsyncSession,
-    expire_on_commit=False,
-)
+    Only plain SELECTs go to the replica. Flushes, DML, ``SELECT ... FOR UPDATE``,
+    textual SQL and connection requests go to the primary, and the session
+    stays there afterwards so it reads what it wrote.
+    """
 
+    def get_bind(
+        self,
+        mapper: type[Any] | Mapper[Any] | None = None,
+        *,
+        clause: ClauseElement | None = None,
+        **kw: Any,
+    ) -> Engine | Connection:
+        if self._is_read(clause):
+            replica: Engine | None = self.info.get(_REPLICA)
+            if replica is not None and not self.info.get(_ON_PRIMARY):
+                return replica
+        else:
+            self.info[_ON_PRIMARY] = True
+            wrote = request_wrote.get()
+            if wrote is not None:
+                wrote[0] = True
+        return super().get_bind(mapper, clause=clause, **kw)
 
-async def get_db() -> AsyncGenerator[AsyncSession]:
-    """Dependency to get database session."""
-    async with AsyncSessionLocal() as session:
+    def _is_read(self, clause: ClauseElement | None) -> bool:
+        return (
+            isinstance(clause, (Select, CompoundSelect))
+            and clause._for_update_arg is None
+            and not self._flushing
+            # Pending changes are about to be written, e.g. by a commit
+            and self._is_clean()
+        )
+
+
+def _create_engine(url: str) -> AsyncEngine:
+    settings = get_settings()
+    engine = create_async_engine(url, future=True)
+    if settings.metrics_enabled:
+        instrument_engine(engine)
+    if settings.slow_query_ms is not None:
+        log_slow_queries(engine, settings.slow_query_ms)
+    return engine
+
+
+@lru_cache
+def get_engine() -> AsyncEngine:
+    """Get the async engine of the primary, creating it on first use."""
+    return _create_engine(get_settings().database_url_async)
+
+
+@lru_cache
+def get_replica_engine() -> AsyncEngine | None:
+    """Get the async engine of the read replica, None when there is none."""
+    url = get_settings().database_replica_url_async
+    return _create_engine(url) if url is not None else None
+
+
+@lru_cache
+def get_sessionmaker() -> async_sessionmaker[AsyncSession]:
+    """Get the async session factory, creating it on first use."""
+    return async_sessionmaker(
+        get_engine(),
+        class_=AsyncSession,
+        sync_session_class=RoutingSession,
+        expire_on_commit=False,
+    )
+
+
+@lru_cache
+def get_read_sessionmaker() -> async_sessionmaker[AsyncSession]:
+    """Session factory of read-mostly work: replica first (if any), then primary."""
+    replica = get_replica_engine()
+    if replica is None:
+        return get_sessionmaker()
+    return async_sessionmaker(
+        get_engine(),
+        class_=AsyncSession,
+        sync_session_class=RoutingSession,
+        expire_on_commit=False,
+        info={_REPLICA: replica.sync_engine},
+    )
+
+
+async def dispose_engine() -> None:
+    """Close pooled connections if the engines were ever created."""
+    if get_replica_engine.cache_info().currsize:
+        replica = get_replica_engine()
+        if replica is not None:
+            await replica.dispose()
+        get_replica_engine.cache_clear()
+    if get_engine.cache_info().currsize:
+        await get_engine().dispose()
+        get_engine.cache_clear()
+    get_sessionmaker.cache_clear()
+    get_read_sessionmaker.cache_clear()
+
+
+@asynccontextmanager
+async def _session(
+    sessionmaker: async_sessionmaker[AsyncSession],
+) -> AsyncIterator[AsyncSession]:
+    async with sessionmaker() as session:
         try:
             yield session
         except Exception:
@@ -39,3 +163,27 @@ async def get_db() -> AsyncGenerator[AsyncSession]:
             raise
         finally:
             await session.close()
+
+
+async def get_db() -> AsyncGenerator[AsyncSession]:
+    """Dependency to get database session."""
+    async with _session(get_sessionmaker()) as session:
+        yield session
+
+
+def wrote_recently(request: Request) -> bool:
+    """Whether the client wrote within ``REPLICA_STICKY_SECONDS``."""
+    try:
+        until = float(request.cookies.get(PRIMARY_COOKIE, 0))
+    except ValueError:
+        return False
+    return until > time.time()
+
+
+async def get_read_db(request: Request) -> AsyncGenerator[AsyncSession]:
+    """Dependency of read-only endpoints: a replica session unless the client just wrote."""
+    sessionmaker = (
+        get_sessionmaker() if wrote_recently(request) else get_read_sessionmaker()
+    )
+    async with _session(sessionmaker) as session:
+        yield session
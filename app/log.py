@@ -0,0 +1,158 @@
+"""Structured logging.
+
+Everything (structlog and standard ``logging`` loggers alike) is rendered by
+structlog, as JSON lines or readable console output depending on ``LOG_FORMAT``.
+Values bound with ``structlog.contextvars`` (the request ID, bound by the request
+middleware) are added to every line logged while serving that request.
+
+Besides the access log, two slow logs capture where time goes without logging
+everything: SQL statements slower than ``SLOW_QUERY_MS`` and service calls slower
+than ``SLOW_CALL_MS``, both with their parameters.
+"""
+
+import functools
+import logging
+import reprlib
+import sys
+import time
+from collections.abc import Awaitable, Callable
+from dataclasses import dataclass
+from typing import Any
+
+import structlog
+from sqlalchemy import event
+from sqlalchemy.engine import Connection, ExceptionContext
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession
+
+from app.config import Settings
+
+logger = structlog.get_logger("app.slow")
+
+
+@dataclass(slots=True)
+class _SlowLogSettings:
+    """Slow log thresholds, read per call; updated by ``configure_logging``."""
+
+    call_ms: float = Settings.model_fields["slow_call_ms"].default
+
+
+_slow_log = _SlowLogSettings()
+
+# Parameters are logged abbreviated, so a bulk statement can't flood the log
+_repr = reprlib.Repr()
+_repr.maxstring = 200
+_repr.maxother = 200
+_repr.maxlist = _repr.maxtuple = _repr.maxdict = 10
+
+
+def configure_logging(settings: Settings) -> None:
+    """Route structlog and standard logging through one structured renderer."""
+    _slow_log.call_ms = settings.slow_call_ms
+
+    shared: list[Any] = [
+        structlog.contextvars.merge_contextvars,
+        structlog.stdlib.add_log_level,
+        structlog.stdlib.add_logger_name,
+        structlog.processors.TimeStamper(fmt="iso", utc=True),
+    ]
+    if settings.log_format == "json":
+        renderer: list[Any] = [
+            structlog.processors.format_exc_info,
+            structlog.processors.JSONRenderer(),
+        ]
+    else:
+        renderer = [structlog.dev.ConsoleRenderer()]
+
+    structlog.configure(
+        processors=[
+            structlog.stdlib.filter_by_level,
+            *shared,
+            structlog.stdlib.ProcessorFormatter.wrap_for_formatter,
+        ],
+        logger_factory=structlog.stdlib.LoggerFactory(),
+        wrapper_class=structlog.stdlib.BoundLogger,
+        cache_logger_on_first_use=True,
+    )
+    handler = logging.StreamHandler(sys.stdout)
+    handler.setFormatter(
+        structlog.stdlib.ProcessorFormatter(
+            foreign_pre_chain=shared,
+            processors=[
+                structlog.stdlib.ProcessorFormatter.remove_processors_meta,
+                *renderer,
+            ],
+        )
+    )
+    root = logging.getLogger()
+    root.handlers[:] = [handler]
+    root.setLevel(settings.log_level.upper())
+
+
+def log_slow_queries(engine: AsyncEngine, threshold_ms: float) -> None:
+    """Log statements of ``engine`` taking at least ``threshold_ms`` (0 logs all)."""
+    sync_engine = engine.sync_engine
+
+    @event.listens_for(sync_engine, "before_cursor_execute")
+    def before(conn: Connection, *_: object) -> None:
+        conn.info.setdefault("slow_query_started", []).append(time.perf_counter())
+
+    @event.listens_for(sync_engine, "after_cursor_execute", named=True)
+    def after(
+        conn: Connection,
+        statement: str,
+        parameters: Any,
+        executemany: bool,
+        **_: object,
+    ) -> None:
+        elapsed_ms = (
+            time.perf_counter() - conn.info["slow_query_started"].pop()
+        ) * 1000
+        if elapsed_ms >= threshold_ms:
+            logger.warning(
+                "slow_query",
+                statement=" ".join(statement.split()),
+                parameters=_repr.repr(parameters),
+                executemany=executemany,
+                duration_ms=round(elapsed_ms, 2),
+            )
+
+    @event.listens_for(sync_engine, "handle_error")
+    def failed(context: ExceptionContext) -> None:
+        connection = context.connection
+        started = connection.info.get("slow_query_started") if connection else None
+        if started:
+            started.pop()
+
+
+def log_slow_calls[**P, R](
+    func: Callable[P, Awaitable[R]],
+) -> Callable[P, Awaitable[R]]:
+    """Log calls of a service method taking at least ``SLOW_CALL_MS``."""
+    name = func.__qualname__
+
+    @functools.wraps(func)
+    async def wrapper(*args: P.args, **kwargs: P.kwargs) -> R:
+        started = time.perf_counter()
+        try:
+            return await func(*args, **kwargs)
+        finally:
+            elapsed_ms = (time.perf_counter() - started) * 1000
+            if elapsed_ms >= _slow_log.call_ms:
+                logger.warning(
+                    "slow_call",
+                    call=name,
+                    # Skip ``self`` and the session, neither says anything useful
+                    args=[
+                        _repr.repr(a)
+                        for a in args[1:]
+                        if not isinstance(a, AsyncSession)
+                    ],
+                    kwargs={
+                        k: _repr.repr(v)
+                        for k, v in kwargs.items()
+                        if not isinstance(v, AsyncSession)
+                    },
+                    duration_ms=round(elapsed_ms, 2),
+                )
+
+    return wrapper
@@ -1,24 +1,85 @@
-from datetime import datetime
-
-from fastapi import Depends, FastAPI, HTTPException, Query
+import asyncio
+import contextlib
+import threading
+from collections.abc import AsyncIterator
+from contextlib import asynccontextmanager
+from datetime import UTC, datetime
+
+import structlog
+from fastapi import APIRouter, Depends, FastAPI, HTTPException, Query, Request
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import (
+    FileResponse,
+    JSONResponse,
+    PlainTextResponse,
+    Response,
+    StreamingResponse,
+)
 from sqlalchemy import select
 from sqlalchemy.ext.asyncio import AsyncSession
-
-from app.config import settings
-from app.database import get_db
+from starlette.background import BackgroundTask
+
+from app.api.access_log import AccessLogMiddleware, request_id_of
+from app.api.admission import AdmissionMiddleware, admission_options
+from app.api.caching import weather_cache_policy
+from app.api.columnar import (
+    COLUMNAR_RESPONSES,
+    VARY_ACCEPT,
+    columnar_response,
+    forecast_columns,
+    wants_columnar,
+    wow_columns,
+)
+from app.api.metrics import MetricsMiddleware, metrics_response
+from app.api.profiling import (
+    RequestProfilerMiddleware,
+    get_profile_store,
+    require_admin,
+)
+from app.api.replica import ReadYourWritesMiddleware
+from app.api.responses import get_response_class, json_response, model_response
+from app.api.sse import SSE_HEADERS, SSE_MEDIA_TYPE, sse_events
+from app.config import get_settings
+from app.database import dispose_engine, get_db, get_engine, get_read_db
+from app.log import configure_logging
+from app.metrics import monitor_event_loop_lag
 from app.models.task import Task, TaskStatus
-from app.schemas.task import TaskResponse, TasksCreateRequest, TasksCreateResponse
-from app.schemas.weather import WeatherForecast
-from app.services.task import task_service
-from app.services.weather import weather_service
-from app.services.wow import wow_service
-
-app = FastAPI(
-    title=settings.app_name,
-    version="0.1.0",
-    debug=settings.debug,
+from app.profiling import StackSampler
+from app.schemas.base import ErrorResponse
+from app.schemas.route import RouteRequest
+from app.schemas.task import (
+    TaskListResponse,
+    TaskResponse,
+    TasksCreateRequest,
+    TasksCreateResponse,
 )
-
+from app.schemas.weather import (
+    Location,
+    MonthWorkability,
+    WeatherForecast,
+    WeatherStats,
+    Workability,
+)
+from app.services.forecast_broadcast import (
+    ForecastBroadcaster,
+    SubscriberLimitError,
+    Topic,
+    get_forecast_broadcaster,
+)
+from app.services.invalidation import (
+    InvalidatedCache,
+    add_invalidation,
+    get_invalidation_bus,
+)
+from app.services.outbox import get_outbox_relay
+from app.services.task import get_schedule_cache, task_service
+from app.services.weather import (
+    WeatherService,
+    get_weather_service,
+    window_bucket,
+)
+from app.services.workability import WorkabilityTable, get_workability_table
+from app.services.wow import WoWAnalysisService, get_wow_service
 
 """
 This is convoluted, in a real prod scenario, I wouldn't mix routes and db access like this.
@@ -28,20 +89,104 @@ routes > repository (where orm models are) > schemas (Pydantic)
 But for the sake of simplicity (and lack of time), I kept all here.
 """
 
-# =============================================================================
-# TASK ENDPOINTS
-# =============================================================================
+router = APIRouter()
+# Only mounted when profiling is enabled
+admin_router = APIRouter(prefix="/admin", dependencies=[Depends(require_admin)])
 
+logger = structlog.get_logger(__name__)
 
-# Create FastAPI app
-app = FastAPI(
-    title=settings.app_name,
-    version="0.1.0",
-    debug=settings.debug,
-)
+
+@asynccontextmanager
+async def lifespan(_app: FastAPI) -> AsyncIterator[None]:
+    """Warm up services (if enabled) and run the background loops of the worker."""
+    settings = get_settings()
+    weather_service = get_weather_service()
+    broadcaster = get_forecast_broadcaster()
+
+    if settings.warmup_forecast:
+        await weather_service.warm_up()
+    if settings.warmup_database:
+        async with get_engine().connect():
+            pass
+
+    watcher = None
+    if settings.forecast_reload_interval_seconds > 0:
+        watcher = asyncio.create_task(
+            weather_service.watch(settings.forecast_reload_interval_seconds)
+        )
+    bus = get_invalidation_bus()
+    listener = asyncio.create_task(bus.run()) if bus is not None else None
+    relay = get_outbox_relay() if settings.outbox_relay_enabled else None
+    relay_task = asyncio.create_task(relay.run()) if relay is not None else None
+    lag_monitor = None
+    if settings.metrics_enabled:
+        lag_monitor = asyncio.create_task(
+            monitor_event_loop_lag(settings.event_loop_lag_interval_seconds)
+        )
+
+    broadcaster.start()
+    yield
+    await broadcaster.stop()
+    for background in (watcher, listener, relay_task, lag_monitor):
+        if background is not None:
+            background.cancel()
+            with contextlib.suppress(asyncio.CancelledError):
+                await background
+    if relay is not None:
+        await relay.bus.aclose()
+    await dispose_engine()
+
+
+async def unhandled_error(request: Request, exc: Exception) -> JSONResponse:
+    """Answer unexpected errors with an ErrorResponse carrying the request ID."""
+    logger.error("unhandled_error", exc_info=exc)
+    request_id = request_id_of(request.scope)
+    return JSONResponse(
+        ErrorResponse(
+            error=True,
+            message="Internal server error",
+            details=None,
+            request_id=request_id,
+        ).model_dump(mode="json"),
+        status_code=500,
+        headers={"X-Request-ID": request_id} if request_id else None,
+    )
+
+
+def create_app() -> FastAPI:
+    """Create the FastAPI application."""
+    settings = get_settings()
+    configure_logging(settings)
+    application = FastAPI(
+        title=settings.app_name,
+        version="0.1.0",
+        debug=settings.debug,
+        lifespan=lifespan,
+        default_response_class=get_response_class(settings.default_response_class),
+    )
+    if settings.database_replica_url and settings.replica_sticky_seconds > 0:
+        application.add_middleware(
+            ReadYourWritesMiddleware, sticky_seconds=settings.replica_sticky_seconds
+        )
+    if settings.profiling_enabled:
+        application.add_middleware(RequestProfilerMiddleware, store=get_profile_store())
+        application.include_router(admin_router, include_in_schema=False)
+    application.add_middleware(AdmissionMiddleware, **admission_options(settings))
+    application.add_middleware(
+        AccessLogMiddleware,
+        sampled_routes=settings.log_sampled_routes,
+        sample_rate=settings.log_sample_rate,
+        slow_request_ms=settings.slow_request_ms,
+    )
+    if settings.metrics_enabled:
+        # Outermost, so requests shed by admission control are measured too
+        application.add_middleware(MetricsMiddleware)
+    application.add_exception_handler(Exception, unhandled_error)
+    application.include_router(router)
+    return application
 
 
-@app.get("/")
+@router.get("/")
 async def root():
     """Root endpoint."""
     return {
@@ -51,18 +196,24 @@ async def root():
     }
 
 
-@app.get("/health")
+@router.get("/health")
 async def health():
     """Health check."""
     return {"status": "healthy"}
 
 
+@router.get("/metrics", include_in_schema=False)
+async def metrics() -> Response:
+    """Prometheus metrics of this worker."""
+    return metrics_response()
+
+
 # =============================================================================
 # TASK ENDPOINTS
 # =============================================================================
 
 
-@app.post("/tasks", response_model=TasksCreateResponse)
+@router.post("/tasks", response_model=TasksCreateResponse)
 async def create_tasks(request: TasksCreateRequest, db: AsyncSession = Depends(get_db)):
     """Create one or more tasks with dependencies."""
     created_tasks = []
@@ -85,11 +236,15 @@ async def create_tasks(request: TasksCreateRequest, db: AsyncSession = Depends(g
             wave_height_limit=task_data.wave_height_limit,
             duration_hours=task_data.duration_hours,
             predecessor_id=task_data.predecessor_id,
+            latitude=task_data.latitude,
+            longitude=task_data.longitude,
+            site_id=task_data.site_id,
             status=TaskStatus.READY,
         )
         db.add(task)
         created_tasks.append(task)
 
+    add_invalidation(db, "tasks")
     await db.commit()
 
     # Refresh all tasks to get the IDs and timestamps
@@ -109,17 +264,19 @@ async def create_tasks(request: TasksCreateRequest, db: AsyncSession = Depends(g
     )
 
 
-@app.get("/tasks")
-async def get_tasks(db: AsyncSession = Depends(get_db)):
+@router.get("/tasks", response_model=TaskListResponse)
+async def get_tasks(db: AsyncSession = Depends(get_read_db)):
     """Get all tasks with dependency information."""
     result = await db.execute(select(Task).order_by(Task.id))
     tasks = result.scalars().all()
 
-    return {"tasks": [TaskResponse.model_validate(task) for task in tasks]}
+    return model_response(
+        TaskListResponse(tasks=[TaskResponse.model_validate(task) for task in tasks])
+    )
 
 
-@app.get("/tasks/{task_id}", response_model=TaskResponse)
-async def get_task(task_id: int, db: AsyncSession = Depends(get_db)):
+@router.get("/tasks/{task_id}", response_model=TaskResponse)
+async def get_task(task_id: int, db: AsyncSession = Depends(get_read_db)):
     """Get a specific task."""
     result = await db.execute(select(Task).where(Task.id == task_id))
     task = result.scalar_one_or_none()
@@ -130,7 +287,7 @@ async def get_task(task_id: int, db: AsyncSession = Depends(get_db)):
     return TaskResponse.model_validate(task)
 
 
-@app.put("/tasks/{task_id}/complete")
+@router.put("/tasks/{task_id}/complete")
 async def complete_task(task_id: int, db: AsyncSession = Depends(get_db)):
     """Mark a task as completed and update dependent tasks."""
     try:
@@ -141,10 +298,10 @@ async def complete_task(task_id: int, db: AsyncSession = Depends(get_db)):
             "task": TaskResponse.model_validate(task),
         }
     except ValueError as e:
-        raise HTTPException(status_code=400, detail=str(e))
+        raise HTTPException(status_code=400, detail=str(e)) from e
 
 
-@app.put("/tasks/{task_id}/start")
+@router.put("/tasks/{task_id}/start")
 async def start_task(task_id: int, db: AsyncSession = Depends(get_db)):
     """Mark a task as started (in progress)."""
     try:
@@ -155,13 +312,23 @@ async def start_task(task_id: int, db: AsyncSession = Depends(get_db)):
             "task": TaskResponse.model_validate(task),
         }
     except ValueError as e:
-        raise HTTPException(status_code=400, detail=str(e))
+        raise HTTPException(status_code=400, detail=str(e)) from e
 
 
-@app.get("/schedule/status")
-async def get_schedule_status(db: AsyncSession = Depends(get_db)):
+@router.get("/schedule/status")
+async def get_schedule_status(
+    # Fills the cache, so read from the primary: a lagging replica would leave a
+    # stale value cached until the next task change
+    db: AsyncSession = Depends(get_db),
+    cache: InvalidatedCache = Depends(get_schedule_cache),
+):
     """Get overall schedule status."""
-    return await task_service.get_schedule_status(db)
+    status = cache.get("status")
+    if status is None:
+        token = cache.token()
+        status = jsonable_encoder(await task_service.get_schedule_status(db))
+        cache.set("status", status, token)
+    return json_response(status)
 
 
 # =============================================================================
@@ -169,24 +336,204 @@ async def get_schedule_status(db: AsyncSession = Depends(get_db)):
 # =============================================================================
 
 
-@app.get("/weather", response_model=WeatherForecast)
+@router.get("/weather", response_model=WeatherForecast, responses=COLUMNAR_RESPONSES)
 async def get_weather_forecast(
+    *,
+    request: Request,
     lat: float = Query(..., ge=-90, le=90, description="Latitude"),
     lon: float = Query(..., ge=-180, le=180, description="Longitude"),
     from_time: datetime = Query(None, description="Start time (ISO format)"),
     to_time: datetime = Query(None, description="End time (ISO format)"),
+    weather_service: WeatherService = Depends(get_weather_service),
 ):
     """Get weather forecast for a location and time range."""
-    return await weather_service.get_forecast(lat, lon, from_time, to_time)
+    columnar = wants_columnar(request)
+    snapshot, cache = weather_cache_policy(
+        weather_service,
+        "columnar" if columnar else "json",
+        lat,
+        lon,
+        from_time,
+        to_time,
+    )
+    if cache is not None and cache.matches(request):
+        return cache.not_modified()
+    headers = cache.headers if cache is not None else VARY_ACCEPT
+
+    if columnar:
+        series = await weather_service.get_series(
+            lat, lon, from_time, to_time, snapshot
+        )
+        return columnar_response(*forecast_columns(series, lat, lon), headers=headers)
+
+    return model_response(
+        await weather_service.get_forecast(lat, lon, from_time, to_time, snapshot),
+        headers=headers,
+    )
+
+
+@router.get("/weather/stats", response_model=WeatherStats)
+async def get_weather_stats(
+    *,
+    request: Request,
+    lat: float = Query(..., ge=-90, le=90, description="Latitude"),
+    lon: float = Query(..., ge=-180, le=180, description="Longitude"),
+    from_time: datetime | None = Query(None, description="Start time (ISO format)"),
+    to_time: datetime | None = Query(None, description="End time (ISO format)"),
+    wave_height_limit: float | None = Query(
+        None, ge=0, description="Count points with higher waves (meters)"
+    ),
+    wind_speed_limit: float | None = Query(
+        None, ge=0, description="Count points with stronger wind (m/s)"
+    ),
+    weather_service: WeatherService = Depends(get_weather_service),
+) -> Response:
+    """Get max, mean and limit exceedances of the forecast over a time range."""
+    snapshot, cache = weather_cache_policy(
+        weather_service,
+        "stats",
+        lat,
+        lon,
+        from_time,
+        to_time,
+        wave_height_limit,
+        wind_speed_limit,
+    )
+    if cache is not None and cache.matches(request):
+        return cache.not_modified()
+
+    return model_response(
+        await weather_service.get_range_stats(
+            lat,
+            lon,
+            from_time,
+            to_time,
+            wave_height_limit=wave_height_limit,
+            wind_speed_limit=wind_speed_limit,
+            snapshot=snapshot,
+        ),
+        headers=cache.headers if cache is not None else None,
+    )
+
+
+@router.get("/weather/workability", response_model=Workability)
+async def get_weather_workability(
+    *,
+    lat: float = Query(..., ge=-90, le=90, description="Latitude"),
+    lon: float = Query(..., ge=-180, le=180, description="Longitude"),
+    wave_height_limit: float = Query(
+        ..., ge=0, description="Wave height limit (meters)"
+    ),
+    duration_hours: float = Query(..., gt=0, description="Task duration in hours"),
+    month: int | None = Query(
+        None, ge=1, le=12, description="Calendar month (default: all)"
+    ),
+    table: WorkabilityTable | None = Depends(get_workability_table),
+) -> Response:
+    """Get the fraction of a month's start times with a window, from the hindcast."""
+    if table is None:
+        raise HTTPException(status_code=404, detail="No workability table available")
+    site = table.nearest(lat, lon)
+    if site is None:
+        raise HTTPException(
+            status_code=404, detail=f"No workability data near ({lat}, {lon})"
+        )
+
+    try:
+        months = [
+            MonthWorkability(
+                month=m,
+                workability=table.workability(
+                    site, m, wave_height_limit, duration_hours
+                ),
+            )
+            for m in ([month] if month is not None else range(1, 13))
+        ]
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e)) from e
+
+    return model_response(
+        Workability(
+            location=Location(lat=site.lat, lon=site.lon),
+            wave_height_limit=wave_height_limit,
+            duration_hours=duration_hours,
+            from_time=table.from_time,
+            to_time=table.to_time,
+            months=months,
+        )
+    )
+
+
+@router.get("/weather/version")
+async def get_weather_version(
+    weather_service: WeatherService = Depends(get_weather_service),
+) -> dict[str, str | int]:
+    """Get the forecast issue currently being served."""
+    snapshot = weather_service.snapshot
+    return {
+        "issue_time": snapshot.issue_time.isoformat(),
+        "version": snapshot.version,
+        "locations": len(snapshot.series),
+    }
+
+
+@router.get(
+    "/weather/stream",
+    response_class=StreamingResponse,
+    responses={200: {"content": {SSE_MEDIA_TYPE: {}}}},
+)
+async def stream_forecast(
+    lat: float = Query(..., ge=-90, le=90, description="Latitude"),
+    lon: float = Query(..., ge=-180, le=180, description="Longitude"),
+    task_ids: list[int] = Query(
+        [], description="Tasks to run WoW analysis for on every update"
+    ),
+    broadcaster: ForecastBroadcaster = Depends(get_forecast_broadcaster),
+) -> StreamingResponse:
+    """
+    Subscribe to forecast updates as Server-Sent Events.
+
+    Each event carries the 12-hour forecast and the WoW analysis of the requested
+    tasks; the current state is sent on connect, then one event per forecast update.
+    """
+    try:
+        subscription = await broadcaster.subscribe(Topic.create(lat, lon, task_ids))
+    except SubscriberLimitError as e:
+        raise HTTPException(
+            status_code=503, detail=str(e), headers={"Retry-After": "30"}
+        ) from e
+
+    # The events' own cleanup never runs if the client leaves before the first one
+    return StreamingResponse(
+        sse_events(broadcaster, subscription, get_settings().stream_heartbeat_seconds),
+        media_type=SSE_MEDIA_TYPE,
+        headers=SSE_HEADERS,
+        background=BackgroundTask(broadcaster.unsubscribe, subscription),
+    )
 
 
-@app.get("/weather/12h", response_model=WeatherForecast)
+@router.get("/weather/12h", response_model=WeatherForecast)
 async def get_12_hour_forecast(
+    request: Request,
     lat: float = Query(..., ge=-90, le=90, description="Latitude"),
     lon: float = Query(..., ge=-180, le=180, description="Longitude"),
+    weather_service: WeatherService = Depends(get_weather_service),
 ):
     """Get 12-hour weather forecast."""
-    return await weather_service.get_12_hour_forecast(lat, lon)
+    # The window rolls in buckets so responses within one bucket are identical
+    window_start, bucket_remaining = window_bucket(
+        datetime.now(UTC), get_settings().forecast_window_bucket_seconds
+    )
+    snapshot, cache = weather_cache_policy(
+        weather_service, "json", lat, lon, window_start, expires_in=bucket_remaining
+    )
+    if cache is not None and cache.matches(request):
+        return cache.not_modified()
+
+    return model_response(
+        await weather_service.get_12_hour_forecast(lat, lon, window_start, snapshot),
+        headers=cache.headers if cache is not None else None,
+    )
 
 
 # =============================================================================
@@ -194,17 +541,30 @@ async def get_12_hour_forecast(
 # =============================================================================
 
 
-@app.post("/wow/analyze")
+@router.post("/wow/analyze", responses=COLUMNAR_RESPONSES)
 async def analyze_wow(
+    *,
+    request: Request,
     task_id: int = Query(..., description="Task ID to analyze"),
-    lat: float = Query(..., ge=-90, le=90, description="Latitude"),
-    lon: float = Query(..., ge=-180, le=180, description="Longitude"),
+    lat: float | None = Query(
+        None, ge=-90, le=90, description="Latitude (default: the task's work site)"
+    ),
+    lon: float | None = Query(
+        None, ge=-180, le=180, description="Longitude (default: the task's work site)"
+    ),
     forecast_hours: int = Query(
         12, ge=1, le=168, description="Forecast hours to analyze"
     ),
-    db: AsyncSession = Depends(get_db),
+    db: AsyncSession = Depends(get_read_db),
+    wow_service: WoWAnalysisService = Depends(get_wow_service),
 ):
     """Perform Wait on Weather (WoW) analysis for a task."""
+    if (lat is None) != (lon is None):
+        raise HTTPException(
+            status_code=400,
+            detail="Pass both lat and lon, or neither for the task's work site",
+        )
+
     # Get the task
     result = await db.execute(select(Task).where(Task.id == task_id))
     task = result.scalar_one_or_none()
@@ -218,10 +578,123 @@ async def analyze_wow(
             detail=f"Task must be READY or IN_PROGRESS for analysis. Current status: {task.status}",
         )
 
+    if lat is not None and lon is not None:
+        site_lat, site_lon = lat, lon
+    elif task.latitude is not None and task.longitude is not None:
+        site_lat, site_lon = task.latitude, task.longitude
+    else:
+        raise HTTPException(
+            status_code=400,
+            detail="Task has no work site location: pass lat and lon",
+        )
+
     # Perform WoW analysis
-    analysis_result = await wow_service.analyze_task(task, lat, lon, forecast_hours)
+    if wants_columnar(request):
+        evaluation = await wow_service.evaluate_task(task, site_lat, site_lon)
+        return columnar_response(*wow_columns(task, evaluation), headers=VARY_ACCEPT)
+
+    analysis_result = await wow_service.analyze_task(
+        task, site_lat, site_lon, forecast_hours
+    )
+
+    # Already plain JSON types: render directly instead of walking it with jsonable_encoder
+    return json_response(analysis_result, headers=VARY_ACCEPT)
+
+
+@router.post("/wow/sweep")
+async def sweep_wow(
+    db: AsyncSession = Depends(get_read_db),
+    wow_service: WoWAnalysisService = Depends(get_wow_service),
+) -> JSONResponse:
+    """Analyze every READY and IN_PROGRESS task at its work site."""
+    result = await db.execute(
+        select(Task)
+        .where(Task.status.in_([TaskStatus.READY, TaskStatus.IN_PROGRESS]))
+        .order_by(Task.id)
+    )
+    return json_response(await wow_service.sweep(result.scalars().all()))
+
+
+@router.post("/wow/route")
+async def analyze_wow_route(
+    route: RouteRequest,
+    task_id: int = Query(..., description="Task ID to analyze"),
+    db: AsyncSession = Depends(get_read_db),
+    wow_service: WoWAnalysisService = Depends(get_wow_service),
+) -> JSONResponse:
+    """Perform Wait on Weather (WoW) analysis for a task along a vessel route."""
+    result = await db.execute(select(Task).where(Task.id == task_id))
+    task = result.scalar_one_or_none()
+
+    if not task:
+        raise HTTPException(status_code=404, detail="Task not found")
+
+    if task.status not in [TaskStatus.READY, TaskStatus.IN_PROGRESS]:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Task must be READY or IN_PROGRESS for analysis. Current status: {task.status}",
+        )
+
+    try:
+        analysis_result = await wow_service.analyze_route(
+            task,
+            [(waypoint.lat, waypoint.lon) for waypoint in route.waypoints],
+            route.etas(),
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e)) from e
+    return json_response(analysis_result)
+
+
+# =============================================================================
+# ADMIN ENDPOINTS (profiling)
+# =============================================================================
+
+_sampling = asyncio.Lock()
+
+
+@admin_router.get("/profile", response_class=PlainTextResponse)
+async def sample_profile(
+    seconds: float = Query(5.0, gt=0, description="How long to sample"),
+    interval_ms: float = Query(5.0, ge=1, le=1000, description="Sampling interval"),
+) -> PlainTextResponse:
+    """
+    Sample this worker's event loop for a while and return collapsed stacks.
+
+    The output (``frame;frame;frame count`` per line) feeds flame graph tools
+    such as speedscope or flamegraph.pl.
+    """
+    if _sampling.locked():
+        raise HTTPException(
+            status_code=409, detail="A profile is already being sampled"
+        )
+    async with _sampling:
+        sampler = StackSampler(threading.get_ident(), interval_ms / 1000)
+        await asyncio.to_thread(
+            sampler.run, min(seconds, get_settings().profile_max_seconds)
+        )
+    return PlainTextResponse(
+        sampler.collapsed(), headers={"X-Profile-Samples": str(sampler.samples)}
+    )
+
+
+@admin_router.get("/profiles/{profile_id}")
+async def get_request_profile(
+    profile_id: str,
+    format: str = Query(
+        "text", pattern="^(text|pstats)$", description="text or pstats"
+    ),
+) -> Response:
+    """Get a request profile saved for an ``X-Profile`` request."""
+    path = get_profile_store().path(profile_id, ".txt" if format == "text" else ".prof")
+    if path is None:
+        raise HTTPException(status_code=404, detail="Profile not found")
+    if format == "text":
+        return PlainTextResponse(path.read_text())
+    return FileResponse(path, media_type="application/octet-stream", filename=path.name)
+
 
-    return analysis_result
+app = create_app()
 
 
 if __name__ == "__main__":
@@ -0,0 +1,369 @@
+"""Prometheus-style metrics.
+
+A minimal in-process registry rendering the Prometheus text format, so the API
+can expose ``/metrics`` without an extra dependency. Metrics are per worker;
+scrape each worker (or run a single one) for exact numbers.
+
+Recording is kept to a dict lookup and a couple of float additions, so it can sit
+on hot paths. Updates are not locked: an observation made concurrently from a
+worker thread (forecast parsing) may very rarely be lost, which monitoring
+tolerates.
+"""
+
+import abc
+import asyncio
+import contextvars
+import math
+import time
+from bisect import bisect_left
+from collections.abc import Callable, Iterator, Sequence
+from typing import Any
+
+from sqlalchemy import event
+from sqlalchemy.engine import Connection, ExceptionContext
+from sqlalchemy.ext.asyncio import AsyncEngine
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+DEFAULT_BUCKETS = (
+    0.001,
+    0.0025,
+    0.005,
+    0.01,
+    0.025,
+    0.05,
+    0.1,
+    0.25,
+    0.5,
+    1.0,
+    2.5,
+    5.0,
+    10.0,
+)
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(names: Sequence[str], values: Sequence[str]) -> str:
+    if not names:
+        return ""
+    pairs = ",".join(
+        f'{name}="{_escape(str(value))}"'
+        for name, value in zip(names, values, strict=True)
+    )
+    return "{" + pairs + "}"
+
+
+def _format_value(value: float) -> str:
+    if math.isinf(value):
+        return "+Inf" if value > 0 else "-Inf"
+    return repr(float(value)) if not float(value).is_integer() else str(int(value))
+
+
+class Registry:
+    """Collection of metrics rendered together."""
+
+    def __init__(self) -> None:
+        self._metrics: list[Metric[Any]] = []
+        self._hooks: list[Callable[[], None]] = []
+
+    def register(self, metric: "Metric[Any]") -> None:
+        """Add a metric to the exposition."""
+        self._metrics.append(metric)
+
+    def on_collect(self, hook: Callable[[], None]) -> None:
+        """Run ``hook`` before every render, e.g. to copy externally kept stats."""
+        self._hooks.append(hook)
+
+    def render(self) -> str:
+        """The metrics in Prometheus text format."""
+        for hook in self._hooks:
+            hook()
+        lines: list[str] = []
+        for metric in self._metrics:
+            lines.append(f"# HELP {metric.name} {metric.documentation}")
+            lines.append(f"# TYPE {metric.name} {metric.type}")
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = Registry()
+
+
+class Metric[C](abc.ABC):
+    """Base class: a named metric family with one child per label combination."""
+
+    type = "untyped"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Sequence[str] = (),
+        registry: Registry | None = REGISTRY,
+    ):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._children: dict[tuple[str, ...], C] = {}
+        if registry is not None:
+            registry.register(self)
+
+    def labels(self, *values: str) -> C:
+        """The child of a label combination (created on first use)."""
+        child = self._children.get(values)
+        if child is None:
+            if len(values) != len(self.labelnames):
+                raise ValueError(f"{self.name} expects labels {self.labelnames}")
+            child = self._children.setdefault(values, self._new_child())
+        return child
+
+    @abc.abstractmethod
+    def _new_child(self) -> C:
+        """A fresh child for a new label combination."""
+
+    @abc.abstractmethod
+    def render(self) -> Iterator[str]:
+        """Sample lines of every child."""
+
+
+class _Value:
+    __slots__ = ("value",)
+
+    def __init__(self) -> None:
+        self.value = 0.0
+
+    def inc(self, amount: float = 1.0) -> None:
+        self.value += amount
+
+    def set(self, value: float) -> None:
+        self.value = value
+
+
+class Counter(Metric[_Value]):
+    """Monotonically increasing total."""
+
+    type = "counter"
+
+    def _new_child(self) -> _Value:
+        return _Value()
+
+    def inc(self, amount: float = 1.0) -> None:
+        """Increment the label-less counter."""
+        self.labels().inc(amount)
+
+    def render(self) -> Iterator[str]:
+        for values, child in list(self._children.items()):
+            labels = _format_labels(self.labelnames, values)
+            yield f"{self.name}{labels} {_format_value(child.value)}"
+
+
+class Gauge(Counter):
+    """Value that goes up and down."""
+
+    type = "gauge"
+
+    def set(self, value: float) -> None:
+        """Set the label-less gauge."""
+        self.labels().set(value)
+
+
+class _Timer:
+    __slots__ = ("child", "started")
+
+    def __init__(self, child: "_HistogramValue"):
+        self.child = child
+
+    def __enter__(self) -> None:
+        self.started = time.perf_counter()
+
+    def __exit__(self, *exc_info: object) -> None:
+        self.child.observe(time.perf_counter() - self.started)
+
+
+class _HistogramValue:
+    __slots__ = ("counts", "sum", "upper_bounds")
+
+    def __init__(self, upper_bounds: tuple[float, ...]):
+        self.upper_bounds = upper_bounds
+        # One count per bucket plus +Inf, not cumulative until rendered
+        self.counts = [0] * (len(upper_bounds) + 1)
+        self.sum = 0.0
+
+    def observe(self, value: float) -> None:
+        self.counts[bisect_left(self.upper_bounds, value)] += 1
+        self.sum += value
+
+    def time(self) -> _Timer:
+        return _Timer(self)
+
+
+class Histogram(Metric[_HistogramValue]):
+    """Distribution of observations in cumulative buckets."""
+
+    type = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Sequence[str] = (),
+        buckets: Sequence[float] = DEFAULT_BUCKETS,
+        registry: Registry | None = REGISTRY,
+    ):
+        self.upper_bounds = tuple(sorted(buckets))
+        super().__init__(name, documentation, labelnames, registry)
+
+    def _new_child(self) -> _HistogramValue:
+        return _HistogramValue(self.upper_bounds)
+
+    def observe(self, value: float) -> None:
+        """Record an observation of the label-less histogram."""
+        self.labels().observe(value)
+
+    def time(self) -> _Timer:
+        """Context manager observing the duration of its block."""
+        return self.labels().time()
+
+    def render(self) -> Iterator[str]:
+        names = (*self.labelnames, "le")
+        for values, child in list(self._children.items()):
+            cumulative = 0
+            for bound, count in zip(
+                (*self.upper_bounds, math.inf), child.counts, strict=True
+            ):
+                cumulative += count
+                labels = _format_labels(names, (*values, _format_value(bound)))
+                yield f"{self.name}_bucket{labels} {cumulative}"
+            labels = _format_labels(self.labelnames, values)
+            yield f"{self.name}_sum{labels} {_format_value(child.sum)}"
+            yield f"{self.name}_count{labels} {cumulative}"
+
+
+# =============================================================================
+# APPLICATION METRICS
+# =============================================================================
+
+HTTP_REQUEST_DURATION = Histogram(
+    "http_request_duration_seconds",
+    "Time to serve a request, by route template",
+    ("method", "route", "status"),
+)
+HTTP_REQUESTS_IN_FLIGHT = Gauge(
+    "http_requests_in_flight", "Requests currently being served"
+)
+DB_QUERY_DURATION = Histogram(
+    "db_query_duration_seconds", "Duration of database statements", ("operation",)
+)
+DB_QUERIES_PER_REQUEST = Histogram(
+    "db_queries_per_request",
+    "Database statements executed while serving a request",
+    ("route",),
+    buckets=(0, 1, 2, 3, 5, 10, 20, 50, 100),
+)
+DB_TIME_PER_REQUEST = Histogram(
+    "db_time_per_request_seconds",
+    "Time spent in database statements while serving a request",
+    ("route",),
+)
+WOW_ANALYSIS_DURATION = Histogram(
+    "wow_analysis_seconds", "Time spent in the WoW algorithm per analysis"
+)
+FORECAST_LOAD_DURATION = Histogram(
+    "forecast_load_seconds",
+    "Time to parse (or map) a forecast file, by format",
+    ("format",),
+    buckets=(0.01, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0),
+)
+FORECAST_BLEND_DURATION = Histogram(
+    "forecast_blend_seconds",
+    "Time to blend the forecasts of all providers",
+    buckets=(0.01, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0),
+)
+FORECAST_BLEND_FALLBACKS = Counter(
+    "forecast_blend_fallbacks_total",
+    "Locations that kept their previous blend because blending ran out of its time budget",
+)
+CACHE_REQUESTS = Counter(
+    "cache_requests_total", "Cache lookups by cache and result", ("cache", "result")
+)
+EVENT_LOOP_LAG = Histogram(
+    "event_loop_lag_seconds",
+    "How late the event loop woke a sleeping task",
+    buckets=(0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0),
+)
+
+
+def record_cache(cache: str, hit: bool) -> None:
+    """Count a cache lookup."""
+    CACHE_REQUESTS.labels(cache, "hit" if hit else "miss").inc()
+
+
+def track_lru_cache(name: str, cached: Any) -> None:
+    """Expose the hit/miss counts of an ``lru_cache`` as ``cache_requests_total``."""
+
+    def collect() -> None:
+        info = cached.cache_info()
+        CACHE_REQUESTS.labels(name, "hit").set(info.hits)
+        CACHE_REQUESTS.labels(name, "miss").set(info.misses)
+
+    REGISTRY.on_collect(collect)
+
+
+# =============================================================================
+# DATABASE INSTRUMENTATION
+# =============================================================================
+
+# [statements, seconds] of the request being served, None outside requests
+request_db_stats: contextvars.ContextVar[list[float] | None] = contextvars.ContextVar(
+    "request_db_stats", default=None
+)
+
+_OPERATIONS = frozenset({"SELECT", "INSERT", "UPDATE", "DELETE", "WITH"})
+
+
+def _operation(statement: str) -> str:
+    keyword = statement[:8].lstrip().split(" ", 1)[0].upper()
+    return keyword if keyword in _OPERATIONS else "OTHER"
+
+
+def instrument_engine(engine: AsyncEngine) -> None:
+    """Time every statement of ``engine`` and attribute it to the current request."""
+    sync_engine = engine.sync_engine
+
+    # Listeners get (conn, cursor, statement, parameters, context, executemany)
+    @event.listens_for(sync_engine, "before_cursor_execute")
+    def before(conn: Connection, *_: object) -> None:
+        conn.info.setdefault("query_started", []).append(time.perf_counter())
+
+    @event.listens_for(sync_engine, "after_cursor_execute")
+    def after(conn: Connection, _cursor: object, statement: str, *_: object) -> None:
+        elapsed = time.perf_counter() - conn.info["query_started"].pop()
+        DB_QUERY_DURATION.labels(_operation(statement)).observe(elapsed)
+        stats = request_db_stats.get()
+        if stats is not None:
+            stats[0] += 1
+            stats[1] += elapsed
+
+    @event.listens_for(sync_engine, "handle_error")
+    def failed(context: ExceptionContext) -> None:
+        connection = context.connection
+        started = connection.info.get("query_started") if connection else None
+        if started:
+            started.pop()
+
+
+# =============================================================================
+# EVENT LOOP LAG
+# =============================================================================
+
+
+async def monitor_event_loop_lag(interval_seconds: float) -> None:
+    """Measure how late the loop resumes a sleep, i.e. how long callbacks block it."""
+    loop = asyncio.get_running_loop()
+    while True:
+        started = loop.time()
+        await asyncio.sleep(interval_seconds)
+        EVENT_LOOP_LAG.observe(max(0.0, loop.time() - started - interval_seconds))
@@ -1,8 +1,12 @@
 """Database models for marine operations."""
 
+from app.models.outbox import OutboxEvent
+from app.models.rate_limit import RateLimitBucket
 from app.models.task import Task, TaskStatus
 
 __all__ = [
+    "OutboxEvent",
+    "RateLimitBucket",
     "Task",
     "TaskStatus",
 ]
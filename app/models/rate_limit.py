@@ -0,0 +1,25 @@
+"""Shared rate limit state."""
+
+from sqlalchemy import Float, String
+from sqlalchemy.orm import Mapped, mapped_column
+
+from app.database import Base
+
+
+class RateLimitBucket(Base):
+    """Token bucket of one client, shared by every API worker.
+
+    The table is UNLOGGED: losing it in a crash only refills every bucket.
+    """
+
+    __tablename__ = "rate_limit_buckets"
+    __table_args__ = ({"prefixes": ["UNLOGGED"]},)
+
+    key: Mapped[str] = mapped_column(String(200), primary_key=True)
+    tokens: Mapped[float] = mapped_column(Float, nullable=False)
+    # Epoch seconds of the database clock, so workers agree on elapsed time
+    updated_at: Mapped[float] = mapped_column(Float, nullable=False)
+
+    def __repr__(self) -> str:
+        """String representation of rate limit bucket."""
+        return f"<RateLimitBucket(key='{self.key}', tokens={self.tokens})>"
@@ -4,7 +4,7 @@ from datetime import datetime
 from enum import Enum
 from typing import Optional
 
-from sqlalchemy import DateTime, Float, ForeignKey, Integer, String
+from sqlalchemy import DateTime, Float, ForeignKey, Index, Integer, String, text
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 
 from app.database import Base
@@ -23,6 +23,15 @@ class Task(Base):
     """Task model representing a marine operation task."""
 
     __tablename__ = "tasks"
+    __table_args__ = (
+        # GiST on a native point (no PostGIS needed) for box and nearest queries
+        Index(
+            "ix_tasks_location",
+            text("point(longitude, latitude)"),
+            postgresql_using="gist",
+            postgresql_where=text("latitude IS NOT NULL"),
+        ),
+    )
 
     id: Mapped[int] = mapped_column(Integer, primary_key=True, index=True)
     name: Mapped[str] = mapped_column(String, nullable=False)
@@ -35,6 +44,11 @@ class Task(Base):
         Integer, ForeignKey("tasks.id"), nullable=True
     )
 
+    # Work site: coordinates (used by WoW analysis) and/or a field or site ID
+    latitude: Mapped[float | None] = mapped_column(Float, nullable=True)
+    longitude: Mapped[float | None] = mapped_column(Float, nullable=True)
+    site_id: Mapped[str | None] = mapped_column(String(100), nullable=True, index=True)
+
     # Timestamps
     created_at: Mapped[datetime] = mapped_column(
         DateTime, default=datetime.utcnow, nullable=False
@@ -60,10 +74,16 @@ class Task(Base):
         """Whether this task can be started."""
         return self.status == TaskStatus.READY
 
+    @property
+    def has_location(self) -> bool:
+        """Whether the work site coordinates are known."""
+        return self.latitude is not None and self.longitude is not None
+
     @property
     def should_be_blocked(self) -> bool:
         """Whether this task should be blocked."""
         return self.status == TaskStatus.BLOCKED
 
-    def __repr__(self):
+    def __repr__(self) -> str:
+        """String representation of task."""
         return f"<Task(id={self.id}, name='{self.name}', status='{self.status}')>"
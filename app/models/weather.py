@@ -2,7 +2,7 @@
 
 from datetime import datetime
 
-from sqlalchemy import DateTime, Float, Integer, String
+from sqlalchemy import DateTime, Float, Index, String
 from sqlalchemy.orm import Mapped, mapped_column
 
 from app.database import Base
@@ -10,19 +10,28 @@ from app.models.base import TimestampMixin
 
 
 class WeatherForecast(Base, TimestampMixin):
-    """Weather forecast data model."""
+    """Weather forecast data model.
 
-    __tablename__ = "weather_forecasts"
+    The table is range-partitioned by ``forecast_time`` (one partition per day),
+    so the primary key has to include the partition key. Every forecast issue is
+    kept side by side, identified by ``issue_time``.
+    """
 
-    id: Mapped[int] = mapped_column(Integer, primary_key=True, index=True)
+    __tablename__ = "weather_forecasts"
+    __table_args__ = ({"postgresql_partition_by": "RANGE (forecast_time)"},)
 
     # Location
-    latitude: Mapped[float] = mapped_column(Float, nullable=False, index=True)
-    longitude: Mapped[float] = mapped_column(Float, nullable=False, index=True)
+    latitude: Mapped[float] = mapped_column(Float, primary_key=True)
+    longitude: Mapped[float] = mapped_column(Float, primary_key=True)
 
     # Forecast timestamp
     forecast_time: Mapped[datetime] = mapped_column(
-        DateTime(timezone=True), nullable=False, index=True
+        DateTime(timezone=True), primary_key=True
+    )
+
+    # Forecast issue (model run) this point belongs to
+    issue_time: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True), primary_key=True
     )
 
     # Weather parameters
@@ -31,7 +40,9 @@ class WeatherForecast(Base, TimestampMixin):
     wave_period: Mapped[float | None] = mapped_column(Float, nullable=True)  # seconds
 
     # Data source
-    source: Mapped[str] = mapped_column(String(100), nullable=False, default="external_api")
+    source: Mapped[str] = mapped_column(
+        String(100), nullable=False, default="external_api"
+    )
 
     def __repr__(self) -> str:
         """String representation of weather forecast."""
@@ -40,7 +51,32 @@ class WeatherForecast(Base, TimestampMixin):
             f"lat={self.latitude}, "
             f"lon={self.longitude}, "
             f"time={self.forecast_time}, "
+            f"issue={self.issue_time}, "
             f"wave_height={self.wave_height}m, "
             f"wind_speed={self.wind_speed}"
             f")>"
         )
+
+
+class LatestWeatherForecast(Base):
+    """Most recent issue for every (location, forecast_time).
+
+    Kept by ``ForecastStore.ingest_issue``, which upserts the points it stores,
+    so publishing an issue costs the size of the issue rather than a rebuild
+    over the whole history. This is what the weather service serves.
+    """
+
+    __tablename__ = "weather_forecasts_latest"
+    __table_args__ = (
+        Index("ix_weather_forecasts_latest_forecast_time", "forecast_time"),
+    )
+
+    latitude: Mapped[float] = mapped_column(Float, primary_key=True)
+    longitude: Mapped[float] = mapped_column(Float, primary_key=True)
+    forecast_time: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True), primary_key=True
+    )
+    issue_time: Mapped[datetime] = mapped_column(DateTime(timezone=True))
+    wind_speed: Mapped[float] = mapped_column(Float)
+    wave_height: Mapped[float] = mapped_column(Float)
+    wave_period: Mapped[float | None] = mapped_column(Float, nullable=True)
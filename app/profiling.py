@@ -0,0 +1,127 @@
+"""On-demand profiling of a running worker.
+
+Two tools, both meant for production incidents and both off unless
+``PROFILING_ENABLED``:
+
+- ``profile_request``: run a single request under cProfile. The stats are saved
+  to ``PROFILE_DIR`` (``.prof`` for pstats/snakeviz, ``.txt`` for reading) so the
+  response itself is unchanged.
+- ``StackSampler``: sample the event loop thread's stack for a few seconds and
+  aggregate it into collapsed stacks (``a;b;c count``, the flame graph input
+  format), at a cost of one stack walk per interval.
+
+cProfile follows the event loop thread, so requests served concurrently with
+the profiled one show up in its profile too.
+"""
+
+import cProfile
+import io
+import pstats
+import re
+import sys
+import threading
+import time
+import uuid
+from collections import Counter
+from pathlib import Path
+from types import FrameType
+
+# cProfile can't nest, so one profiled request at a time per worker
+_profile_lock = threading.Lock()
+
+# Profile IDs are uuid4 hex strings
+_PROFILE_ID = re.compile(r"[0-9a-f]{32}")
+
+
+class ProfileStore:
+    """Directory of saved request profiles, keeping the most recent ones."""
+
+    def __init__(self, directory: str | Path, keep: int = 50):
+        self.directory = Path(directory)
+        self.keep = keep
+
+    def save(self, profile_id: str, profiler: cProfile.Profile, label: str) -> None:
+        """Write the pstats dump and a text summary sorted by cumulative time."""
+        self.directory.mkdir(parents=True, exist_ok=True)
+        profiler.dump_stats(self.directory / f"{profile_id}.prof")
+
+        summary = io.StringIO()
+        summary.write(f"{label}\n\n")
+        stats = pstats.Stats(profiler, stream=summary)
+        stats.strip_dirs().sort_stats("cumulative").print_stats(60)
+        (self.directory / f"{profile_id}.txt").write_text(summary.getvalue())
+        self._prune()
+
+    def path(self, profile_id: str, suffix: str) -> Path | None:
+        """Path of a saved profile file, None if unknown (or not a profile ID)."""
+        if not _PROFILE_ID.fullmatch(profile_id):
+            return None
+        path = self.directory / f"{profile_id}{suffix}"
+        return path if path.exists() else None
+
+    def _prune(self) -> None:
+        dumps = sorted(self.directory.glob("*.prof"), key=lambda p: p.stat().st_mtime)
+        for old in dumps[: max(0, len(dumps) - self.keep)]:
+            old.unlink(missing_ok=True)
+            old.with_suffix(".txt").unlink(missing_ok=True)
+
+
+def start_request_profile() -> tuple[str, cProfile.Profile] | None:
+    """
+    Start profiling the current thread.
+
+    Returns:
+        tuple: (profile_id, profiler), None if another request is being profiled
+    """
+    if not _profile_lock.acquire(blocking=False):
+        return None
+    profiler = cProfile.Profile()
+    try:
+        profiler.enable()
+    except ValueError:
+        # Another profiling tool (e.g. a debugger) is active
+        _profile_lock.release()
+        return None
+    return uuid.uuid4().hex, profiler
+
+
+def stop_request_profile(profiler: cProfile.Profile) -> None:
+    """Stop a profiler returned by ``start_request_profile``."""
+    try:
+        profiler.disable()
+    finally:
+        _profile_lock.release()
+
+
+def _frame_name(frame: FrameType) -> str:
+    code = frame.f_code
+    return f"{code.co_name} ({Path(code.co_filename).name}:{code.co_firstlineno})"
+
+
+class StackSampler:
+    """Statistical profiler sampling one thread's stack from another thread."""
+
+    def __init__(self, thread_id: int, interval_seconds: float = 0.005):
+        self.thread_id = thread_id
+        self.interval_seconds = interval_seconds
+        self.samples = 0
+        self.stacks: Counter[str] = Counter()
+
+    def run(self, duration_seconds: float) -> None:
+        """Sample for ``duration_seconds`` (blocks; run it in another thread)."""
+        deadline = time.perf_counter() + duration_seconds
+        while time.perf_counter() < deadline:
+            frame = sys._current_frames().get(self.thread_id)
+            if frame is None:
+                return
+            names = []
+            while frame is not None:
+                names.append(_frame_name(frame))
+                frame = frame.f_back
+            self.stacks[";".join(reversed(names))] += 1
+            self.samples += 1
+            time.sleep(self.interval_seconds)
+
+    def collapsed(self) -> str:
+        """Collapsed stacks, most frequent first."""
+        return "".join(f"{stack} {n}\n" for stack, n in self.stacks.most_common())
@@ -0,0 +1,59 @@
+"""Schemas for route-aware WoW analysis."""
+
+from datetime import UTC, datetime
+from itertools import pairwise
+
+from pydantic import BaseModel, Field, model_validator
+
+from app.services.forecast_snapshot import to_epoch
+from app.services.route import waypoint_etas
+
+
+class Waypoint(BaseModel):
+    """Point of a vessel route."""
+
+    lat: float = Field(..., ge=-90, le=90, description="Latitude in decimal degrees")
+    lon: float = Field(..., ge=-180, le=180, description="Longitude in decimal degrees")
+    eta: datetime | None = Field(
+        None, description="Arrival time (all waypoints, or none with speed_knots)"
+    )
+
+
+class RouteRequest(BaseModel):
+    """Vessel route: waypoints with ETAs, or waypoints and a transit speed."""
+
+    waypoints: list[Waypoint] = Field(
+        ..., min_length=1, max_length=1000, description="Waypoints in order of passage"
+    )
+    speed_knots: float | None = Field(
+        None, gt=0, le=50, description="Transit speed, for waypoints without ETAs"
+    )
+    departure_time: datetime | None = Field(
+        None,
+        description="Departure from the first waypoint with speed_knots (default: now)",
+    )
+
+    @model_validator(mode="after")
+    def check_timing(self) -> "RouteRequest":
+        """Require ETAs on every waypoint (in order) or a speed."""
+        etas = [waypoint.eta for waypoint in self.waypoints if waypoint.eta is not None]
+        if len(etas) == len(self.waypoints):
+            if any(to_epoch(b) < to_epoch(a) for a, b in pairwise(etas)):
+                raise ValueError("Waypoint ETAs must not decrease")
+        elif etas:
+            raise ValueError("Give an ETA for every waypoint, or none and speed_knots")
+        elif self.speed_knots is None:
+            raise ValueError("Waypoints without ETAs need speed_knots")
+        return self
+
+    def etas(self) -> list[float]:
+        """ETA of every waypoint in epoch seconds."""
+        etas = [waypoint.eta for waypoint in self.waypoints if waypoint.eta is not None]
+        if etas:
+            return [to_epoch(eta) for eta in etas]
+        departure = self.departure_time or datetime.now(UTC)
+        return waypoint_etas(
+            [(waypoint.lat, waypoint.lon) for waypoint in self.waypoints],
+            to_epoch(departure),
+            self.speed_knots,  # type: ignore[arg-type]
+        )
@@ -2,7 +2,7 @@
 
 from datetime import datetime
 
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, Field, model_validator
 
 from app.models.task import TaskStatus
 
@@ -18,6 +18,24 @@ class TaskCreate(BaseModel):
         4.0, gt=0, le=168, description="Task duration in hours"
     )
     predecessor_id: int | None = Field(None, description="ID of predecessor task")
+    latitude: float | None = Field(
+        None, ge=-90, le=90, description="Work site latitude in decimal degrees"
+    )
+    longitude: float | None = Field(
+        None, ge=-180, le=180, description="Work site longitude in decimal degrees"
+    )
+    site_id: str | None = Field(
+        None, min_length=1, max_length=100, description="Field or site identifier"
+    )
+
+    @model_validator(mode="after")
+    def check_location(self) -> "TaskCreate":
+        """Require both coordinates of the work site, or neither."""
+        if (self.latitude is None) != (self.longitude is None):
+            raise ValueError(
+                "Give both latitude and longitude of the work site, or neither"
+            )
+        return self
 
 
 class TaskResponse(BaseModel):
@@ -29,6 +47,9 @@ class TaskResponse(BaseModel):
     wave_height_limit: float
     duration_hours: float
     predecessor_id: int | None
+    latitude: float | None = None
+    longitude: float | None = None
+    site_id: str | None = None
     created_at: datetime
     can_start: bool
     should_be_blocked: bool
@@ -37,11 +58,17 @@ class TaskResponse(BaseModel):
         from_attributes = True
 
 
+class TaskListResponse(BaseModel):
+    """Schema for the task list response."""
+
+    tasks: list[TaskResponse]
+
+
 class TasksCreateRequest(BaseModel):
     """Schema for creating multiple tasks."""
 
     tasks: list[TaskCreate] = Field(
-        ..., min_items=1, description="List of tasks to create"
+        ..., min_length=1, description="List of tasks to create"
     )
 
 
@@ -37,3 +37,53 @@ class WeatherRequest(BaseModel):
     to_time: datetime | None = Field(
         None, description="End time (defaults to +12 hours)"
     )
+
+
+class ColumnStats(BaseModel):
+    """Statistics of one forecast variable over a time range."""
+
+    max: float | None = Field(None, description="Maximum (null for an empty range)")
+    mean: float | None = Field(None, description="Mean (null for an empty range)")
+    limit: float | None = Field(
+        None, description="Limit exceedances are counted against"
+    )
+    exceedances: int | None = Field(
+        None, description="Points above the limit (null without a limit)"
+    )
+
+
+class WeatherStats(BaseModel):
+    """Forecast statistics over a time range."""
+
+    location: Location = Field(..., description="Forecast location")
+    from_time: datetime | None = Field(None, description="First grid point in range")
+    to_time: datetime | None = Field(None, description="Last grid point in range")
+    points: int = Field(
+        ..., ge=0, description="Grid points in range with forecast data"
+    )
+    missing_points: int = Field(
+        0, ge=0, description="Grid points in range inside gaps of the forecast"
+    )
+    wave_height: ColumnStats = Field(..., description="Wave height in meters")
+    wind_speed: ColumnStats = Field(..., description="Wind speed in m/s")
+
+
+class MonthWorkability(BaseModel):
+    """Workability in one calendar month."""
+
+    month: int = Field(..., ge=1, le=12, description="Calendar month")
+    workability: float | None = Field(
+        None,
+        description="Fraction of start times with a window right away (null without hindcast)",
+    )
+
+
+class Workability(BaseModel):
+    """Seasonal workability of a task at a location, from the hindcast."""
+
+    location: Location = Field(..., description="Hindcast location")
+    wave_height_limit: float = Field(..., description="Wave height limit in meters")
+    duration_hours: float = Field(..., description="Task duration in hours")
+    from_time: datetime = Field(..., description="First hindcast point")
+    to_time: datetime = Field(..., description="Last hindcast point")
+    months: list[MonthWorkability] = Field(..., description="Workability per month")
@@ -0,0 +1,166 @@
+"""In-process event bus fed by the outbox relay.
+
+Subscribers register for a topic prefix (``"task."``) and receive events in
+batches, one call per relayed batch, so a webhook costs one request per batch
+rather than per event. Delivery is at-least-once: a batch is retried when any
+subscriber fails, so handlers must tolerate duplicates (events carry a unique id).
+"""
+
+import asyncio
+from collections.abc import Awaitable, Callable, Sequence
+from dataclasses import dataclass
+from datetime import datetime
+from functools import lru_cache
+from typing import Any
+
+import httpx
+
+from app.config import get_settings
+from app.services.forecast_broadcast import (
+    ForecastBroadcaster,
+    get_forecast_broadcaster,
+)
+
+
+@dataclass(frozen=True, slots=True)
+class Event:
+    """A relayed domain event."""
+
+    id: int
+    topic: str
+    payload: dict[str, Any]
+    created_at: datetime
+
+    def to_dict(self) -> dict[str, Any]:
+        """JSON-compatible representation."""
+        return {
+            "id": self.id,
+            "topic": self.topic,
+            "payload": self.payload,
+            "created_at": self.created_at.isoformat(),
+        }
+
+
+Handler = Callable[[Sequence[Event]], Awaitable[None]]
+
+
+@dataclass(frozen=True, slots=True)
+class Subscriber:
+    """A named handler for the events whose topic starts with ``prefix``."""
+
+    name: str
+    prefix: str
+    handler: Handler
+
+
+class EventBus:
+    """Dispatches event batches to subscribers concurrently."""
+
+    def __init__(self) -> None:
+        self._subscribers: list[Subscriber] = []
+
+    @property
+    def subscribers(self) -> list[str]:
+        """Names of the registered subscribers."""
+        return [subscriber.name for subscriber in self._subscribers]
+
+    def subscribe(self, name: str, prefix: str, handler: Handler) -> None:
+        """Register ``handler`` for events whose topic starts with ``prefix``."""
+        self._subscribers.append(Subscriber(name, prefix, handler))
+
+    async def publish(self, events: Sequence[Event]) -> dict[str, BaseException]:
+        """
+        Deliver a batch to every interested subscriber.
+
+        Returns:
+            Failures by subscriber name (empty when everyone accepted the batch)
+        """
+        names = []
+        calls = []
+        for subscriber in self._subscribers:
+            matching = [e for e in events if e.topic.startswith(subscriber.prefix)]
+            if matching:
+                names.append(subscriber.name)
+                calls.append(subscriber.handler(matching))
+
+        results = await asyncio.gather(*calls, return_exceptions=True)
+        return {
+            name: result
+            for name, result in zip(names, results, strict=True)
+            if isinstance(result, BaseException)
+        }
+
+    async def aclose(self) -> None:
+        """Release subscriber resources (e.g. HTTP clients)."""
+        for subscriber in self._subscribers:
+            close = getattr(subscriber.handler, "aclose", None)
+            if close is not None:
+                await close()
+
+
+class WebhookSubscriber:
+    """POSTs each batch as ``{"events": [...]}`` to a URL."""
+
+    def __init__(
+        self, url: str, timeout: float = 5.0, client: httpx.AsyncClient | None = None
+    ):
+        self.url = url
+        self.timeout = timeout
+        self._client = client
+
+    async def __call__(self, events: Sequence[Event]) -> None:
+        if self._client is None:
+            self._client = httpx.AsyncClient(timeout=self.timeout)
+        response = await self._client.post(
+            self.url, json={"events": [event.to_dict() for event in events]}
+        )
+        response.raise_for_status()
+
+    async def aclose(self) -> None:
+        """Close the HTTP client."""
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+
+def _task_ids(events: Sequence[Event]) -> set[int]:
+    return {event.payload["task_id"] for event in events if "task_id" in event.payload}
+
+
+def stream_subscriber(broadcaster: ForecastBroadcaster) -> Handler:
+    """Push fresh WoW analyses to stream subscribers watching the changed tasks."""
+
+    async def handle(events: Sequence[Event]) -> None:
+        if broadcaster.watches(_task_ids(events)):
+            broadcaster.refresh()
+
+    return handle
+
+
+def cache_subscriber(broadcaster: ForecastBroadcaster) -> Handler:
+    """Drop cached stream events that embed the changed tasks."""
+
+    async def handle(events: Sequence[Event]) -> None:
+        broadcaster.invalidate(_task_ids(events))
+
+    return handle
+
+
+@lru_cache
+def get_event_bus() -> EventBus:
+    """Process-wide event bus with the configured subscribers."""
+    settings = get_settings()
+    broadcaster = get_forecast_broadcaster()
+    bus = EventBus()
+    if not settings.invalidation_enabled:
+        # Otherwise every worker hears about task changes from the invalidation
+        # bus, rather than only the one relaying the event
+        bus.subscribe("cache", "task.", cache_subscriber(broadcaster))
+        bus.subscribe("stream", "task.", stream_subscriber(broadcaster))
+    if settings.webhook_url:
+        bus.subscribe(
+            "webhook",
+            "",
+            WebhookSubscriber(settings.webhook_url, settings.webhook_timeout_seconds),
+        )
+    return bus
@@ -0,0 +1,219 @@
+"""Memory-mapped binary forecast format.
+
+Every uvicorn worker used to parse and keep its own copy of the forecast. This
+format is opened with ``mmap`` instead: the columns are read straight from the
+page cache, so N workers share a single copy and opening a file only costs
+reading its header and location table.
+
+Layout (little-endian)::
+
+    header          magic "ROOPFCST", format version u16, reserved u16,
+                    location count u32, issue time i64 (epoch s), point count i64
+    location table  per location: lat f64, lon f64, first point i64,
+                    point count i64, checksum u32, reserved u32
+    columns         timestamps i64[points], wave_height f32[points],
+                    wind_speed f32[points], wave_period f32[points]
+
+A location's points are the contiguous slice [first point, first point + count)
+of every column, sorted by timestamp.
+
+Convert a JSON/NDJSON forecast with:
+    python -m app.services.forecast_binary weather-forecast.json weather-forecast.bin
+"""
+
+import argparse
+import mmap
+import os
+import struct
+import sys
+from array import array
+from collections.abc import Sequence
+from datetime import UTC, datetime
+from pathlib import Path
+from typing import Any, Literal
+
+from app.services.forecast_parser import parse_forecast_file
+from app.services.forecast_snapshot import (
+    TIMESTAMP_TYPECODE,
+    VALUE_TYPECODE,
+    ForecastSeries,
+    columns_crc,
+)
+
+MAGIC = b"ROOPFCST"
+FORMAT_VERSION = 1
+
+HEADER = struct.Struct("<8sHHIqq")
+LOCATION = struct.Struct("<ddqqII")
+
+TIMESTAMP_SIZE = 8
+VALUE_SIZE = 4
+
+
+def is_forecast_binary(path: str | Path) -> bool:
+    """Whether the file starts with the binary forecast magic."""
+    with open(path, "rb") as f:
+        return f.read(len(MAGIC)) == MAGIC
+
+
+def write_forecast_binary(
+    path: str | Path, issue_time: datetime, series: Sequence[ForecastSeries]
+) -> None:
+    """
+    Write series to the binary format.
+
+    The file is written next to the target and renamed into place, so workers that
+    still map the previous file keep reading it untouched.
+    """
+    total = sum(len(s) for s in series)
+    columns: dict[str, array[Any]] = {
+        "timestamps": array(TIMESTAMP_TYPECODE),
+        "wave_height": array(VALUE_TYPECODE),
+        "wind_speed": array(VALUE_TYPECODE),
+        "wave_period": array(VALUE_TYPECODE),
+    }
+
+    table = bytearray()
+    offset = 0
+    for item in series:
+        location_columns = []
+        for name, column in columns.items():
+            values = getattr(item, name)
+            column.extend(values)
+            location_columns.append(values)
+        table += LOCATION.pack(
+            item.lat, item.lon, offset, len(item), columns_crc(location_columns), 0
+        )
+        offset += len(item)
+
+    if sys.byteorder != "little":
+        for column in columns.values():
+            column.byteswap()
+
+    header = HEADER.pack(
+        MAGIC,
+        FORMAT_VERSION,
+        0,
+        len(series),
+        int(issue_time.timestamp()),
+        total,
+    )
+
+    target = Path(path)
+    tmp = target.with_name(f".{target.name}.tmp")
+    with open(tmp, "wb") as f:
+        f.write(header)
+        f.write(table)
+        for column in columns.values():
+            column.tofile(f)
+    os.replace(tmp, target)
+
+
+def _column(
+    view: memoryview, start: int, count: int, typecode: Literal["q", "f"], size: int
+) -> Sequence[Any]:
+    """Zero-copy typed view on a region of the mapping."""
+    region = view[start : start + count * size]
+    if sys.byteorder == "little":
+        return region.cast(typecode)
+    # Big-endian hosts cannot use the mapping directly: fall back to a copy
+    values = array(typecode, region.tobytes())
+    values.byteswap()
+    return values
+
+
+def open_forecast_binary(
+    path: str | Path,
+) -> tuple[datetime, list[ForecastSeries]]:
+    """
+    Map a binary forecast file.
+
+    The returned series are views on the mapping; it is unmapped once the last
+    of them is garbage collected.
+
+    Returns:
+        tuple: (issue_time, series)
+
+    Raises:
+        ValueError: When the file is not a complete binary forecast file, or a
+            location's points fall outside the columns
+    """
+    with open(path, "rb") as f:
+        mapping = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+    view = memoryview(mapping)
+    if len(view) < HEADER.size:
+        raise ValueError(f"{path} is truncated")
+    magic, version, _, locations, issue_epoch, total = HEADER.unpack_from(view, 0)
+    if magic != MAGIC:
+        raise ValueError(f"{path} is not a binary forecast file")
+    if version != FORMAT_VERSION:
+        raise ValueError(f"Unsupported binary forecast format version {version}")
+
+    table_start = HEADER.size
+    columns_start = table_start + locations * LOCATION.size
+    values_start = columns_start + total * TIMESTAMP_SIZE
+    if len(view) < values_start + 3 * total * VALUE_SIZE:
+        raise ValueError(f"{path} is truncated")
+    value_columns = {
+        name: values_start + i * total * VALUE_SIZE
+        for i, name in enumerate(("wave_height", "wind_speed", "wave_period"))
+    }
+
+    series = []
+    for i in range(locations):
+        lat, lon, first, count, checksum, _ = LOCATION.unpack_from(
+            view, table_start + i * LOCATION.size
+        )
+        if not 0 <= first <= first + count <= total:
+            raise ValueError(f"{path} has location #{i + 1} outside its columns")
+        series.append(
+            ForecastSeries(
+                lat=lat,
+                lon=lon,
+                timestamps=_column(
+                    view,
+                    columns_start + first * TIMESTAMP_SIZE,
+                    count,
+                    TIMESTAMP_TYPECODE,
+                    TIMESTAMP_SIZE,
+                ),
+                **{
+                    name: _column(
+                        view,
+                        start + first * VALUE_SIZE,
+                        count,
+                        VALUE_TYPECODE,
+                        VALUE_SIZE,
+                    )
+                    for name, start in value_columns.items()
+                },
+                checksum=checksum,
+            )
+        )
+
+    return datetime.fromtimestamp(issue_epoch, UTC), series
+
+
+def main() -> None:
+    """Command line entry point: convert a JSON/NDJSON forecast to the binary format."""
+    parser = argparse.ArgumentParser(
+        description="Convert a forecast to the binary format"
+    )
+    parser.add_argument("source", help="Forecast JSON or NDJSON file")
+    parser.add_argument("target", help="Binary forecast file to write")
+    args = parser.parse_args()
+
+    parsed = parse_forecast_file(args.source)
+    if parsed.issue_time is None:
+        parser.error(f"{args.source} has no issue_time")
+
+    write_forecast_binary(args.target, parsed.issue_time, parsed.series)
+    print(
+        f"Wrote {parsed.points} points for {len(parsed.series)} location(s) "
+        f"to {args.target} ({os.path.getsize(args.target)} bytes)"
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,246 @@
+"""Blending of forecasts from several providers.
+
+Each provider's issue is a list of series, one per location. ``Blender`` groups
+the series of all providers by location (within ``tolerance`` degrees), aligns
+every group on the canonical grid (see ``app.services.forecast_resample``) and
+combines it point by point over the providers that have data there:
+
+    - wave height: the maximum (conservative, the default) or the weighted mean
+    - wind speed and wave period: the weighted mean
+
+The blended series are ingested like a single provider's issue, so they get
+their own snapshot version, and WoW, range statistics and caching consume them
+unchanged.
+
+Blending runs on every forecast update and must not hold the update up for
+long: once ``budget_seconds`` are spent, the remaining locations keep the blend
+of the previous update, and are counted in ``forecast_blend_fallbacks_total``.
+A single provider's series is never served in place of a blend, since it may be
+less conservative. Locations without a previous blend are blended regardless,
+and the locations left behind are blended first on the next update, so none
+stays stale.
+"""
+
+import logging
+import math
+import time
+from array import array
+from collections.abc import Sequence
+from dataclasses import dataclass
+
+from app.metrics import FORECAST_BLEND_DURATION, FORECAST_BLEND_FALLBACKS
+from app.services.forecast_resample import resample
+from app.services.forecast_snapshot import (
+    TIMESTAMP_TYPECODE,
+    VALUE_TYPECODE,
+    ForecastSeries,
+)
+
+logger = logging.getLogger(__name__)
+
+WAVE_HEIGHT_MODES = ("max", "weighted")
+
+
+@dataclass(slots=True)
+class _Group:
+    """The series of one location, at most one per provider."""
+
+    lat: float
+    lon: float
+    members: dict[int, ForecastSeries]
+
+
+def _combine(
+    columns: Sequence[tuple[int, float, Sequence[float]]], length: int, how: str
+) -> array[float]:
+    """
+    Combine aligned columns into one of ``length`` grid points.
+
+    Args:
+        columns: ``(offset, weight, values)`` per provider, offsets in grid points
+        how: ``max`` or ``weighted``
+
+    Returns:
+        The combined column, NaN where no provider has data
+    """
+    if how == "max":
+        best = [-math.inf] * length
+        for offset, _, values in columns:
+            end = offset + len(values)
+            # NaN compares false, so missing values never win
+            best[offset:end] = [
+                v if v > b else b for b, v in zip(best[offset:end], values, strict=True)
+            ]
+        return array(VALUE_TYPECODE, [b if b > -math.inf else math.nan for b in best])
+
+    total = [0.0] * length
+    weights = [0.0] * length
+    for offset, weight, values in columns:
+        end = offset + len(values)
+        total[offset:end] = [
+            t if math.isnan(v) else t + weight * v
+            for t, v in zip(total[offset:end], values, strict=True)
+        ]
+        weights[offset:end] = [
+            s if math.isnan(v) else s + weight
+            for s, v in zip(weights[offset:end], values, strict=True)
+        ]
+    return array(
+        VALUE_TYPECODE,
+        [t / s if s > 0 else math.nan for t, s in zip(total, weights, strict=True)],
+    )
+
+
+class Blender:
+    """Blends the issues of several providers location by location."""
+
+    def __init__(
+        self,
+        weights: Sequence[float],
+        *,
+        step_seconds: int,
+        max_gap_seconds: int,
+        tolerance: float,
+        wave_height: str = "max",
+        budget_seconds: float = 2.0,
+    ):
+        """
+        Configure the blend.
+
+        Args:
+            weights: Weight of each provider, in the order issues are passed
+            step_seconds: Canonical grid step the providers are aligned on
+            max_gap_seconds: Longest gap interpolated when aligning
+            tolerance: Max distance in degrees between series of one location
+            wave_height: ``max`` (conservative) or ``weighted``
+            budget_seconds: Time after which locations are no longer blended
+        """
+        if wave_height not in WAVE_HEIGHT_MODES:
+            raise ValueError(
+                f"Wave height blend must be one of {WAVE_HEIGHT_MODES}, not {wave_height!r}"
+            )
+        if any(weight <= 0 for weight in weights):
+            raise ValueError("Provider weights must be positive")
+        self.weights = tuple(weights)
+        self.step_seconds = step_seconds
+        self.max_gap_seconds = max_gap_seconds
+        self.tolerance = tolerance
+        self.wave_height = wave_height
+        self.budget_seconds = budget_seconds
+        # Blend served per location by the last update, and the locations of it
+        # that kept an older blend for lack of time
+        self._previous: dict[tuple[float, float], ForecastSeries] = {}
+        self._stale: set[tuple[float, float]] = set()
+
+    def group(self, issues: Sequence[Sequence[ForecastSeries]]) -> list[_Group]:
+        """Group the series of all providers by location, in first-seen order."""
+        groups: list[_Group] = []
+        # Grid cells of ``tolerance`` degrees, so a lookup checks 9 cells
+        cells: dict[tuple[int, int], list[_Group]] = {}
+        for provider, issue in enumerate(issues):
+            for series in issue:
+                cell = (
+                    math.floor(series.lat / self.tolerance),
+                    math.floor(series.lon / self.tolerance),
+                )
+                match = None
+                best = self.tolerance * self.tolerance
+                for dlat in (-1, 0, 1):
+                    for dlon in (-1, 0, 1):
+                        for group in cells.get((cell[0] + dlat, cell[1] + dlon), ()):
+                            distance = (group.lat - series.lat) ** 2 + (
+                                group.lon - series.lon
+                            ) ** 2
+                            if provider not in group.members and distance <= best:
+                                match, best = group, distance
+                if match is None:
+                    match = _Group(series.lat, series.lon, {})
+                    groups.append(match)
+                    cells.setdefault(cell, []).append(match)
+                match.members[provider] = series
+        return groups
+
+    def blend_location(self, members: dict[int, ForecastSeries]) -> ForecastSeries:
+        """Blend the series of one location on the canonical grid."""
+        aligned = {
+            provider: resample(series, self.step_seconds, self.max_gap_seconds)
+            for provider, series in members.items()
+            if len(series)
+        }
+        first = next(iter(members.values()))
+        if len(aligned) <= 1:
+            return next(iter(aligned.values()), first)
+
+        start = min(series.timestamps[0] for series in aligned.values())
+        end = max(series.timestamps[-1] for series in aligned.values())
+        length = (end - start) // self.step_seconds + 1
+
+        def columns(name: str) -> list[tuple[int, float, Sequence[float]]]:
+            return [
+                (
+                    (series.timestamps[0] - start) // self.step_seconds,
+                    self.weights[provider],
+                    getattr(series, name),
+                )
+                for provider, series in aligned.items()
+            ]
+
+        return ForecastSeries(
+            lat=first.lat,
+            lon=first.lon,
+            timestamps=array(
+                TIMESTAMP_TYPECODE, range(start, end + 1, self.step_seconds)
+            ),
+            wave_height=_combine(columns("wave_height"), length, self.wave_height),
+            wind_speed=_combine(columns("wind_speed"), length, "weighted"),
+            wave_period=_combine(columns("wave_period"), length, "weighted"),
+        )
+
+    def blend(self, issues: Sequence[Sequence[ForecastSeries]]) -> list[ForecastSeries]:
+        """
+        Blend the issues of all providers (one list of series per provider).
+
+        Returns:
+            One series per location; past the time budget, the previous blend
+            of locations that have one
+        """
+        if len(issues) != len(self.weights):
+            raise ValueError(
+                f"Got {len(issues)} provider issues for {len(self.weights)} weights"
+            )
+        with FORECAST_BLEND_DURATION.time():
+            started = time.perf_counter()
+            groups = self.group(issues)
+            keys = [(group.lat, group.lon) for group in groups]
+            blended: dict[int, ForecastSeries] = {}
+            stale = set()
+            # Locations left with an older blend last time go first
+            for index in sorted(
+                range(len(groups)), key=lambda k: keys[k] not in self._stale
+            ):
+                members = groups[index].members
+                previous = self._previous.get(keys[index])
+                if (
+                    previous is not None
+                    and len(members) > 1
+                    and time.perf_counter() - started > self.budget_seconds
+                ):
+                    blended[index] = previous
+                    stale.add(keys[index])
+                else:
+                    blended[index] = self.blend_location(members)
+        series = [blended[index] for index in range(len(groups))]
+        self._previous = {
+            key: blend
+            for key, blend, group in zip(keys, series, groups, strict=True)
+            if len(group.members) > 1
+        }
+        self._stale = stale
+        if stale:
+            FORECAST_BLEND_FALLBACKS.inc(len(stale))
+            logger.warning(
+                "Forecast blend ran out of its %.1fs budget, %d locations kept their previous blend",
+                self.budget_seconds,
+                len(stale),
+            )
+        return series
@@ -0,0 +1,440 @@
+"""Server-pushed forecast and WoW updates.
+
+Bridge displays used to poll ``/weather/12h`` and ``/wow/analyze`` on a timer for
+data that changes a few times a day. Instead they subscribe to a topic (location
+and task IDs). On every forecast update the broadcaster groups subscribers by the
+forecast location their coordinates resolve to, recomputes each group once,
+encodes the event once and fans it out.
+
+The 12-hour window rolls in ``FORECAST_WINDOW_BUCKET_SECONDS`` steps, like the
+``/weather/12h`` responses: every group is also recomputed when a bucket ends, and
+a cached event only serves the forecast version and bucket it was computed for.
+
+A subscriber joining between updates gets the group's cached event. When there is
+none yet, one computation per group is shared by every subscriber waiting for it,
+so a reconnect storm after a deploy computes each group once.
+
+Every subscriber has a small bounded queue. Only the newest state matters, so a
+full queue drops its oldest event; a subscriber that stays behind for
+``STREAM_MAX_DROPPED`` consecutive events is disconnected rather than buffered.
+"""
+
+import asyncio
+import contextlib
+import json
+import logging
+from collections import defaultdict
+from collections.abc import Callable, Iterable
+from dataclasses import dataclass
+from datetime import UTC, datetime
+from functools import lru_cache
+from typing import Any
+
+from sqlalchemy import select
+
+from app.config import get_settings
+from app.database import get_sessionmaker
+from app.metrics import record_cache
+from app.models.task import Task, TaskStatus
+from app.services.forecast_snapshot import ForecastDelta, ForecastSnapshot
+from app.services.invalidation import get_invalidation_bus
+from app.services.weather import (
+    WeatherService,
+    get_weather_service,
+    window_bucket,
+)
+from app.services.wow import WoWAnalysisService, get_wow_service
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass(frozen=True, slots=True)
+class Topic:
+    """What a subscriber wants pushed: a location and the tasks to analyze there."""
+
+    lat: float
+    lon: float
+    task_ids: tuple[int, ...] = ()
+
+    @classmethod
+    def create(cls, lat: float, lon: float, task_ids: Iterable[int] = ()) -> "Topic":
+        """Build a topic with normalized task IDs, so equal requests share a group."""
+        return cls(float(lat), float(lon), tuple(sorted(set(task_ids))))
+
+
+@dataclass(frozen=True, slots=True)
+class StreamEvent:
+    """One encoded update, shared by every subscriber of a group."""
+
+    id: str
+    data: bytes
+    # Start of the rolling-window bucket the forecast was cut for
+    window_start: datetime | None = None
+
+
+class SubscriberLimitError(Exception):
+    """Raised when the broadcaster already serves the maximum number of subscribers."""
+
+
+class Subscription:
+    """A connected client: its topic and bounded event queue."""
+
+    def __init__(self, topic: Topic, queue_size: int, max_dropped: int):
+        self.topic = topic
+        self.queue: asyncio.Queue[StreamEvent | None] = asyncio.Queue(queue_size)
+        self.max_dropped = max_dropped
+        # Events dropped since the client last took one off its queue
+        self.dropped = 0
+        self.closed = False
+
+    def offer(self, event: StreamEvent) -> None:
+        """Queue an event, dropping the oldest one if the client is behind."""
+        if self.closed:
+            return
+        if self.queue.full():
+            self.queue.get_nowait()
+            self.dropped += 1
+            if self.dropped > self.max_dropped:
+                self.close()
+                return
+        self.queue.put_nowait(event)
+
+    def close(self) -> None:
+        """Disconnect: discard pending events and wake the consumer."""
+        if self.closed:
+            return
+        self.closed = True
+        while not self.queue.empty():
+            self.queue.get_nowait()
+        self.queue.put_nowait(None)
+
+    async def next_event(self, timeout: float) -> StreamEvent | None:
+        """
+        Wait for the next event.
+
+        Returns:
+            The event, None once the subscription is closed
+
+        Raises:
+            TimeoutError: If nothing arrived within ``timeout`` seconds
+        """
+        event = await asyncio.wait_for(self.queue.get(), timeout)
+        self.dropped = 0
+        return event
+
+
+class ForecastBroadcaster:
+    """Recomputes subscribed topics once per forecast update and fans them out."""
+
+    def __init__(
+        self,
+        weather_service: WeatherService,
+        wow_service: WoWAnalysisService,
+        *,
+        queue_size: int = 8,
+        max_dropped: int = 32,
+        max_subscribers: int = 1000,
+        window_bucket_seconds: int = 300,
+        clock: Callable[[], datetime] = lambda: datetime.now(UTC),
+    ):
+        self.weather_service = weather_service
+        self.wow_service = wow_service
+        self.queue_size = queue_size
+        self.max_dropped = max_dropped
+        self.max_subscribers = max_subscribers
+        self.window_bucket_seconds = window_bucket_seconds
+        self.clock = clock
+        self._subscriptions: set[Subscription] = set()
+        # Latest event per group, for subscribers joining between updates
+        self._latest: dict[Topic, StreamEvent] = {}
+        # Computation in flight per (group, version, window), shared by joining subscribers
+        self._pending: dict[tuple[Topic, str, datetime], asyncio.Task[StreamEvent]] = {}
+        self._updated = asyncio.Event()
+        self._loop: asyncio.AbstractEventLoop | None = None
+        self._task: asyncio.Task[None] | None = None
+
+    @property
+    def subscribers(self) -> int:
+        """Number of connected subscribers."""
+        return len(self._subscriptions)
+
+    def start(self) -> None:
+        """Start recomputing on forecast updates (call from the event loop)."""
+        self._loop = asyncio.get_running_loop()
+        self.weather_service.add_listener(self._on_forecast)
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        """Stop the update loop and disconnect every subscriber."""
+        if self._task is not None:
+            self.weather_service.remove_listener(self._on_forecast)
+            self._task.cancel()
+            with contextlib.suppress(asyncio.CancelledError):
+                await self._task
+            self._task = None
+        for subscription in self._subscriptions:
+            subscription.close()
+        self._subscriptions.clear()
+
+    def refresh(self) -> None:
+        """Schedule a recompute of every topic (e.g. after task changes)."""
+        self._updated.set()
+
+    def watches(self, task_ids: Iterable[int]) -> bool:
+        """Whether any subscriber's topic includes one of ``task_ids``."""
+        task_ids = set(task_ids)
+        return any(
+            not task_ids.isdisjoint(s.topic.task_ids) for s in self._subscriptions
+        )
+
+    def invalidate(self, task_ids: Iterable[int]) -> None:
+        """Forget cached events that embed any of ``task_ids``."""
+        task_ids = set(task_ids)
+        self._latest = {
+            group: event
+            for group, event in self._latest.items()
+            if task_ids.isdisjoint(group.task_ids)
+        }
+        # Computations in flight may have read the old tasks: later joiners start anew
+        self._pending = {
+            key: pending
+            for key, pending in self._pending.items()
+            if task_ids.isdisjoint(key[0].task_ids)
+        }
+
+    def clear(self) -> None:
+        """Forget every cached event."""
+        self._latest = {}
+        self._pending = {}
+
+    def on_invalidation(self, keys: set[str]) -> None:
+        """Invalidation bus subscriber: drop and recompute what the keys affect."""
+        if "forecast" in keys:
+            # Database-backed forecasts have no snapshot version to compare against
+            self.clear()
+            self.refresh()
+            return
+        task_ids = {int(key[5:]) for key in keys if key.startswith("task:")}
+        self.invalidate(task_ids)
+        if self.watches(task_ids):
+            self.refresh()
+
+    def _on_forecast(self, _snapshot: ForecastSnapshot, _delta: ForecastDelta) -> None:
+        """Weather service listener; may run on an ingest thread."""
+        if self._loop is not None:
+            self._loop.call_soon_threadsafe(self._updated.set)
+
+    async def _run(self) -> None:
+        while True:
+            # Wake on an update, or to roll the window when its bucket ends
+            window_start, bucket_remaining = self._window()
+            with contextlib.suppress(TimeoutError):
+                await asyncio.wait_for(self._updated.wait(), bucket_remaining)
+            if not self._updated.is_set() and self._window()[0] == window_start:
+                # Timer fired early; the window has not moved yet
+                continue
+            # Updates arriving while we publish coalesce into one more round
+            self._updated.clear()
+            try:
+                await self.publish()
+            except Exception:
+                # Keep subscribers connected with their last state
+                logger.exception("Failed to publish forecast update")
+
+    async def subscribe(self, topic: Topic) -> Subscription:
+        """
+        Register a subscriber and queue the current state for it.
+
+        Raises:
+            SubscriberLimitError: If the subscriber limit is reached
+        """
+        if len(self._subscriptions) >= self.max_subscribers:
+            raise SubscriberLimitError(
+                f"Subscriber limit of {self.max_subscribers} reached"
+            )
+
+        subscription = Subscription(topic, self.queue_size, self.max_dropped)
+        self._subscriptions.add(subscription)
+        try:
+            snapshot = self._current_snapshot()
+            window_start, _ = self._window()
+            group = self._group(topic, snapshot)
+            event = self._latest.get(group)
+            if event is not None and (event.id, event.window_start) == (
+                _version(snapshot),
+                window_start,
+            ):
+                record_cache("stream_state", True)
+            else:
+                record_cache("stream_state", False)
+                event = await self._compute_shared(group, snapshot, window_start)
+        except BaseException:
+            self.unsubscribe(subscription)
+            raise
+        subscription.offer(event)
+        return subscription
+
+    async def _compute_shared(
+        self, group: Topic, snapshot: ForecastSnapshot | None, window_start: datetime
+    ) -> StreamEvent:
+        """Compute a group's event for joining subscribers, once per group."""
+        key = (group, _version(snapshot), window_start)
+        pending = self._pending.get(key)
+        if pending is None:
+            pending = self._pending[key] = asyncio.create_task(
+                self._compute_latest(key, snapshot)
+            )
+            pending.add_done_callback(lambda done: self._forget_pending(key, done))
+        # A subscriber that disconnects must not cancel it for the others
+        return await asyncio.shield(pending)
+
+    async def _compute_latest(
+        self, key: tuple[Topic, str, datetime], snapshot: ForecastSnapshot | None
+    ) -> StreamEvent:
+        """Compute a group's event and cache it, unless invalidated meanwhile."""
+        group, _, window_start = key
+        tasks = await self._load_tasks(group.task_ids)
+        event = await self._compute(group, snapshot, window_start, tasks)
+        if self._pending.get(key) is asyncio.current_task():
+            self._latest[group] = event
+        return event
+
+    def _forget_pending(
+        self, key: tuple[Topic, str, datetime], done: asyncio.Task[StreamEvent]
+    ) -> None:
+        if self._pending.get(key) is done:
+            del self._pending[key]
+        if not done.cancelled():
+            # Retrieved here in case every waiting subscriber went away
+            done.exception()
+
+    def unsubscribe(self, subscription: Subscription) -> None:
+        """Remove a subscriber."""
+        subscription.close()
+        self._subscriptions.discard(subscription)
+
+    async def publish(self) -> int:
+        """
+        Recompute every subscribed group once and fan the events out.
+
+        Returns:
+            Number of groups computed
+        """
+        snapshot = self._current_snapshot()
+        window_start, _ = self._window()
+        groups: dict[Topic, list[Subscription]] = defaultdict(list)
+        for subscription in list(self._subscriptions):
+            if subscription.closed:
+                self._subscriptions.discard(subscription)
+            else:
+                groups[self._group(subscription.topic, snapshot)].append(subscription)
+
+        tasks = await self._load_tasks(
+            {task_id for group in groups for task_id in group.task_ids}
+        )
+        latest = {}
+        for group, members in groups.items():
+            event = latest[group] = await self._compute(
+                group, snapshot, window_start, tasks
+            )
+            for subscription in members:
+                subscription.offer(event)
+        self._latest = latest
+        return len(groups)
+
+    def _window(self) -> tuple[datetime, int]:
+        """Rolling-window bucket of the current time, as ``window_bucket``."""
+        return window_bucket(self.clock(), self.window_bucket_seconds)
+
+    def _current_snapshot(self) -> ForecastSnapshot | None:
+        """Snapshot to compute from; database-backed forecasts have none."""
+        if self.weather_service.source != "file":
+            return None
+        return self.weather_service.snapshot
+
+    @staticmethod
+    def _group(topic: Topic, snapshot: ForecastSnapshot | None) -> Topic:
+        """Resolve a topic to the forecast location its coordinates map to."""
+        series = snapshot.nearest(topic.lat, topic.lon) if snapshot else None
+        if series is None:
+            return topic
+        return Topic(series.lat, series.lon, topic.task_ids)
+
+    @staticmethod
+    async def _load_tasks(task_ids: Iterable[int]) -> dict[int, Task]:
+        """Load the tasks of all groups with a single query."""
+        task_ids = set(task_ids)
+        if not task_ids:
+            return {}
+        async with get_sessionmaker()() as session:
+            result = await session.execute(select(Task).where(Task.id.in_(task_ids)))
+            return {task.id: task for task in result.scalars()}
+
+    async def _compute(
+        self,
+        group: Topic,
+        snapshot: ForecastSnapshot | None,
+        window_start: datetime,
+        tasks: dict[int, Task],
+    ) -> StreamEvent:
+        """Compute and encode the update of one group."""
+        forecast = await self.weather_service.get_12_hour_forecast(
+            group.lat, group.lon, window_start, snapshot
+        )
+
+        analyses: list[dict[str, Any]] = []
+        for task_id in group.task_ids:
+            task = tasks.get(task_id)
+            if task is None:
+                analyses.append({"task_id": task_id, "detail": "Task not found"})
+            elif task.status not in (TaskStatus.READY, TaskStatus.IN_PROGRESS):
+                analyses.append(
+                    {
+                        "task_id": task_id,
+                        "detail": (
+                            "Task must be READY or IN_PROGRESS for analysis. "
+                            f"Current status: {task.status}"
+                        ),
+                    }
+                )
+            else:
+                analyses.append(
+                    await self.wow_service.analyze_task(task, group.lat, group.lon)
+                )
+
+        version = _version(snapshot)
+        payload = {
+            "version": version or None,
+            "issue_time": snapshot.issue_time.isoformat() if snapshot else None,
+            "window_start": window_start.isoformat(),
+            "forecast": forecast.model_dump(mode="json"),
+            "wow": analyses,
+        }
+        return StreamEvent(
+            id=version,
+            data=json.dumps(payload, separators=(",", ":")).encode("utf-8"),
+            window_start=window_start,
+        )
+
+
+def _version(snapshot: ForecastSnapshot | None) -> str:
+    """Forecast version an event is computed from, empty for database forecasts."""
+    return snapshot.version if snapshot is not None else ""
+
+
+@lru_cache
+def get_forecast_broadcaster() -> ForecastBroadcaster:
+    """Dependency providing the process-wide forecast broadcaster."""
+    settings = get_settings()
+    broadcaster = ForecastBroadcaster(
+        get_weather_service(),
+        get_wow_service(),
+        queue_size=settings.stream_queue_size,
+        max_dropped=settings.stream_max_dropped,
+        max_subscribers=settings.stream_max_subscribers,
+        window_bucket_seconds=settings.forecast_window_bucket_seconds,
+    )
+    bus = get_invalidation_bus()
+    if bus is not None:
+        bus.subscribe("", broadcaster.on_invalidation, broadcaster.clear)
+    return broadcaster
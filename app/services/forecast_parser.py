@@ -0,0 +1,504 @@
+"""Streaming forecast parser producing columnar buffers.
+
+Large multi-location dumps do not fit the ``json.load`` approach: the whole document
+and one dict per point end up in memory. This parser reads the input in fixed-size
+chunks and tokenizes it incrementally, keeping only the stack of open containers and
+the scalar fields of the open objects. Point fields are written straight into typed
+arrays (int64 epoch seconds, float32 values), so peak memory stays close to the size
+of the final arrays. Runs of points in the canonical key order of
+``weather-forecast.json``, and objects without nested containers or escapes, are
+matched whole with regular expressions that only accept complete objects; anything
+else goes through the tokenizer, which keeps track of strings, so brackets in them
+are just text.
+
+Accepted inputs:
+    - the ``weather-forecast.json`` shape: ``{"issue_time"?, "location", "forecast"}``
+      with its keys in any order
+    - a list (or ``{"locations": [...]}``) of such documents
+    - NDJSON with one point per line carrying its own ``lat``/``lon``
+
+A point (an object with a ``timestamp``) belongs to its own ``lat``/``lon``, or else
+to the location of the object enclosing it: a ``{"lat", "lon"}`` object under one of
+its keys, or its own ``lat``/``lon`` fields. Points that come before that location
+are held until it is known.
+
+The parser refuses what would silently lose or invent data, raising ``ValueError``
+on:
+    - a point without ``wind_speed`` or ``wave_height``; only ``wave_period``
+      defaults to 0
+    - a point whose enclosing objects have no location
+    - anything that is not JSON
+    - a document that ends early, as a truncated file does
+"""
+
+import json
+import math
+import re
+from array import array
+from collections.abc import Sequence
+from dataclasses import dataclass, field
+from datetime import UTC, date, datetime
+from functools import lru_cache
+from pathlib import Path
+from typing import NoReturn, TextIO
+
+from app.metrics import track_lru_cache
+from app.services.forecast_snapshot import (
+    TIMESTAMP_TYPECODE,
+    VALUE_TYPECODE,
+    ForecastSeries,
+    parse_timestamp,
+)
+
+DEFAULT_CHUNK_SIZE = 1 << 18
+
+# Length of the fast-path timestamp form ``YYYY-MM-DDTHH:MM:SSZ``
+_ZULU_LENGTH = 20
+_LONGEST_LITERAL = len("false")
+# Text needed after a number to be sure it ends there, as in "1.5" before "e+7"
+_NUMBER_LOOKAHEAD = len("e+7")
+
+_NUMBER = r"-?(?:0|[1-9][0-9]*)(?:\.[0-9]+)?(?:[eE][+-]?[0-9]+)?"
+# Strings without escapes; any others take the tokenizer path
+_PLAIN_STRING = r'"[^"\\]*"'
+
+
+def _point_pattern(group: str) -> str:
+    """A point in the canonical key order; ``group`` opens the field groups."""
+    # Numbers are matched loosely, for speed, and checked by float()
+    number = r"-?[0-9][0-9.eE+-]*"
+    return (
+        rf'\{{\s*"timestamp"\s*:\s*"{group}[^"\\]*)"\s*,'
+        rf'\s*"wind_speed"\s*:\s*{group}{number})\s*,'
+        rf'\s*"wave_height"\s*:\s*{group}{number})\s*,'
+        rf'\s*"wave_period"\s*:\s*{group}{number})\s*\}}'
+    )
+
+
+# Fast path: runs of points with the canonical key order of weather-forecast.json
+_POINT = re.compile(_point_pattern("("))
+_POINT_RUN = re.compile(rf"{_point_pattern('(?:')}(?:\s*,\s*{_point_pattern('(?:')})*")
+# Texts between the points of a run, joined with "|"
+_SEPARATORS = re.compile(r"(?:\s*,\s*(?:\||\Z))*")
+_MEMBER = rf"{_PLAIN_STRING}\s*:\s*(?:{_PLAIN_STRING}|{_NUMBER}|true|false|null)"
+# An object without nested containers or escaped strings
+_FLAT_OBJECT = re.compile(rf"\{{\s*(?:{_MEMBER}(?:\s*,\s*{_MEMBER})*)?\s*\}}")
+_FIELD = re.compile(r'"([^"\\]*)"\s*:\s*(?:"([^"\\]*)"|([^\s,}]+))')
+_NON_SPACE = re.compile(r"[^ \t\n\r]")
+_STRING = re.compile(r'"([^"\\]*(?:\\.[^"\\]*)*)"')
+# What is left of a string, number or literal cut off by the end of the input
+_CUT_TOKEN = re.compile(r'"[^"\\]*(?:\\.[^"\\]*)*\\?|[-+.0-9a-z]*')
+_SCALAR = re.compile(rf'"([^"\\]*(?:\\.[^"\\]*)*)"|({_NUMBER}|true|false|null)')
+
+# What the tokenizer expects next
+_VALUE, _FIRST_VALUE, _KEY, _FIRST_KEY, _COLON, _NEXT = range(6)
+
+
+@lru_cache(maxsize=4096)
+def _day_epoch(day: str) -> int:
+    """Epoch seconds at 00:00Z of an ISO date."""
+    return int(
+        datetime.combine(date.fromisoformat(day), datetime.min.time(), UTC).timestamp()
+    )
+
+
+# Multi-location dumps repeat the same timestamps for every location
+@lru_cache(maxsize=1 << 16)
+def timestamp_to_epoch(value: str) -> int:
+    """Convert an ISO timestamp to epoch seconds, fast-pathing ``YYYY-MM-DDTHH:MM:SSZ``."""
+    if len(value) == _ZULU_LENGTH and value[-1] == "Z":
+        return (
+            _day_epoch(value[:10])
+            + int(value[11:13]) * 3600
+            + int(value[14:16]) * 60
+            + int(value[17:19])
+        )
+    return int(parse_timestamp(value).timestamp())
+
+
+track_lru_cache("forecast_timestamps", timestamp_to_epoch)
+
+
+@dataclass(slots=True)
+class ColumnBuffers:
+    """Growing columnar buffers for one location."""
+
+    lat: float
+    lon: float
+    timestamps: array[int] = field(default_factory=lambda: array(TIMESTAMP_TYPECODE))
+    wave_height: array[float] = field(default_factory=lambda: array(VALUE_TYPECODE))
+    wind_speed: array[float] = field(default_factory=lambda: array(VALUE_TYPECODE))
+    wave_period: array[float] = field(default_factory=lambda: array(VALUE_TYPECODE))
+    ordered: bool = True
+
+    def extend(
+        self,
+        timestamps: Sequence[str],
+        wind_speed: Sequence[str],
+        wave_height: Sequence[str],
+        wave_period: Sequence[str],
+    ) -> None:
+        """Append a run of raw (string) values in bulk."""
+        epochs = list(map(timestamp_to_epoch, timestamps))
+        if self.ordered and (
+            (self.timestamps and epochs and epochs[0] < self.timestamps[-1])
+            or epochs != sorted(epochs)
+        ):
+            self.ordered = False
+        self.timestamps.extend(epochs)
+        self.wind_speed.extend(map(float, wind_speed))
+        self.wave_height.extend(map(float, wave_height))
+        self.wave_period.extend(map(float, wave_period))
+
+    def absorb(self, other: "ColumnBuffers") -> None:
+        """Append the points held in another buffer."""
+        if other.timestamps and (
+            not other.ordered
+            or (self.timestamps and other.timestamps[0] < self.timestamps[-1])
+        ):
+            self.ordered = False
+        self.timestamps.extend(other.timestamps)
+        self.wind_speed.extend(other.wind_speed)
+        self.wave_height.extend(other.wave_height)
+        self.wave_period.extend(other.wave_period)
+
+    def to_series(self) -> ForecastSeries:
+        """Freeze the buffers into a series sorted by timestamp."""
+        timestamps = self.timestamps
+        if not self.ordered:
+            order = sorted(range(len(timestamps)), key=timestamps.__getitem__)
+            self.timestamps = array(TIMESTAMP_TYPECODE, (timestamps[i] for i in order))
+            for name in ("wave_height", "wind_speed", "wave_period"):
+                column = getattr(self, name)
+                setattr(self, name, array(VALUE_TYPECODE, (column[i] for i in order)))
+
+        return ForecastSeries(
+            lat=self.lat,
+            lon=self.lon,
+            timestamps=self.timestamps,
+            wave_height=self.wave_height,
+            wind_speed=self.wind_speed,
+            wave_period=self.wave_period,
+        )
+
+
+@dataclass(slots=True)
+class ParsedForecast:
+    """Result of parsing a forecast stream."""
+
+    issue_time: datetime | None
+    series: list[ForecastSeries]
+    points: int
+
+
+def _unescape(raw: str) -> str:
+    """Decode the escapes of a JSON string body."""
+    return json.loads(f'"{raw}"') if "\\" in raw else raw
+
+
+class _Frame:
+    """An open JSON container."""
+
+    __slots__ = ("fields", "is_object", "key", "location", "pending")
+
+    def __init__(self, is_object: bool):
+        self.is_object = is_object
+        # Object key whose value comes next
+        self.key: str | None = None
+        # Scalar members of an object, as raw text
+        self.fields: dict[str, str] = {}
+        # Location of the points this object encloses, once known
+        self.location: ColumnBuffers | None = None
+        # Points enclosed before the location is known
+        self.pending: ColumnBuffers | None = None
+
+
+class _StreamParser:
+    """State of one streaming parse: open containers and per-location buffers."""
+
+    def __init__(self, stream: TextIO, chunk_size: int) -> None:
+        self.stream = stream
+        self.chunk_size = chunk_size
+        self.text = ""
+        self.eof = False
+        self.stack: list[_Frame] = []
+        self.buffers: dict[tuple[float, float], ColumnBuffers] = {}
+        self.issue_time: datetime | None = None
+        self.points = 0
+
+    def buffer_for(self, lat: str, lon: str) -> ColumnBuffers:
+        """Get or create the buffers of a location."""
+        key = (float(lat), float(lon))
+        target = self.buffers.get(key)
+        if target is None:
+            target = self.buffers[key] = ColumnBuffers(*key)
+        return target
+
+    def read(self, pos: int) -> int:
+        """Drop the text before ``pos`` and append a chunk; returns the new ``pos``."""
+        chunk = self.stream.read(self.chunk_size)
+        if not chunk:
+            self.eof = True
+        self.text = self.text[pos:] + chunk
+        return 0
+
+    def parse(self) -> None:
+        """Tokenize the whole stream."""
+        state = _VALUE
+        pos = self.read(0)
+        while True:
+            text = self.text
+            if not self.eof and len(text) - pos < self.chunk_size:
+                pos = self.read(pos)
+                continue
+            token = _NON_SPACE.search(text, pos)
+            pos = token.start() if token is not None else len(text)
+            if pos == len(text):
+                if self.eof:
+                    break
+                pos = self.read(pos)
+            elif state == _NEXT:
+                pos, state = self.separator(text, pos)
+            elif state in (_KEY, _FIRST_KEY):
+                pos, state = self.key(text, pos, state)
+            elif state == _COLON:
+                if text[pos] != ":":
+                    self.malformed(pos)
+                pos, state = pos + 1, _VALUE
+            else:
+                pos, state = self.value(text, pos, state)
+
+        if self.stack:
+            raise ValueError("Forecast document is truncated")
+
+    def after_value(self) -> int:
+        """State once a value is complete."""
+        return _NEXT if self.stack else _VALUE
+
+    def separator(self, text: str, pos: int) -> tuple[int, int]:
+        """Handle a comma or the end of the open container."""
+        top = self.stack[-1] if self.stack else None
+        if text[pos] == "," and top is not None:
+            return pos + 1, _KEY if top.is_object else _VALUE
+        if top is None or text[pos] != ("}" if top.is_object else "]"):
+            self.malformed(pos)
+        self.close(self.stack.pop())
+        return pos + 1, self.after_value()
+
+    def key(self, text: str, pos: int, state: int) -> tuple[int, int]:
+        """Handle an object key, or the end of an empty object."""
+        if text[pos] == "}" and state == _FIRST_KEY:
+            self.close(self.stack.pop())
+            return pos + 1, self.after_value()
+        match = _STRING.match(text, pos)
+        if match is None:
+            return self.read_on(pos, text[pos] == '"'), state
+        self.stack[-1].key = _unescape(match.group(1))
+        return match.end(), _COLON
+
+    def value(self, text: str, pos: int, state: int) -> tuple[int, int]:
+        """Handle the start of a value, or the end of an empty list."""
+        char = text[pos]
+        if char == "{":
+            end = self.whole_objects(text, pos)
+            if end is not None:
+                return end, self.after_value()
+            self.stack.append(_Frame(is_object=True))
+            return pos + 1, _FIRST_KEY
+        if char == "[":
+            self.stack.append(_Frame(is_object=False))
+            return pos + 1, _FIRST_VALUE
+        if char == "]" and state == _FIRST_VALUE:
+            self.stack.pop()
+            return pos + 1, self.after_value()
+
+        match = _SCALAR.match(text, pos)
+        if match is None or len(text) - match.end() < _NUMBER_LOOKAHEAD:
+            # A string, number or literal may go on in the next chunk
+            partial = (
+                match is not None or char == '"' or len(text) - pos < _LONGEST_LITERAL
+            )
+            if match is None or not self.eof:
+                return self.read_on(pos, partial), state
+        top = self.stack[-1] if self.stack else None
+        if top is None:
+            self.malformed(pos)
+        string, raw = match.groups()
+        # A null member counts as missing
+        if top.is_object and raw != "null":
+            self.set_field(top, raw or _unescape(string))
+        return match.end(), _NEXT
+
+    def whole_objects(self, text: str, pos: int) -> int | None:
+        """
+        Take a run of canonical points, or an object without nested containers.
+
+        Returns:
+            The end of what was taken, None when the object needs the tokenizer
+        """
+        if self.stack and not self.stack[-1].is_object:
+            end = self.point_run(text, pos)
+            if end is not None:
+                return end
+        match = _FLAT_OBJECT.match(text, pos)
+        if match is None:
+            return None
+        self.close_object(
+            {
+                key: raw or string
+                for key, string, raw in _FIELD.findall(text, pos, match.end())
+                if raw != "null"
+            }
+        )
+        return match.end()
+
+    def point_run(self, text: str, pos: int) -> int | None:
+        """Take the canonical points at ``pos`` in a list; returns where they end."""
+        if _POINT.match(text, pos) is None:
+            return None
+        # Canonical points contain no "]", so the run ends before the next one
+        end = text.find("]", pos)
+        region = text[pos : end if end != -1 else len(text)]
+        # [text before, 4 fields, text between, 4 fields, ..., text after]
+        parts = _POINT.split(region)
+        if _SEPARATORS.fullmatch("|".join(parts[5:-1:5])):
+            self.add_points(parts[1::5], parts[2::5], parts[3::5], parts[4::5])
+            return pos + len(region) - len(parts[-1])
+        # Something else between the points: take the run up to it
+        match = _POINT_RUN.match(text, pos)
+        if match is None:
+            return None
+        rows = _POINT.findall(text, pos, match.end())
+        self.add_points(*zip(*rows, strict=True))
+        return match.end()
+
+    def read_on(self, pos: int, partial: bool) -> int:
+        """Read the rest of a token cut off by the end of the text at ``pos``."""
+        if not partial or self.eof:
+            self.malformed(pos)
+        return self.read(pos)
+
+    def malformed(self, pos: int) -> NoReturn:
+        """Raise ValueError on the text at ``pos``."""
+        if self.eof and self.stack and _CUT_TOKEN.fullmatch(self.text, pos):
+            raise ValueError("Forecast document is truncated")
+        raise ValueError(
+            f"Malformed forecast document near {self.text[pos : pos + 40]!r}"
+        )
+
+    def set_field(self, frame: _Frame, value: str) -> None:
+        """Store a scalar member of an open object."""
+        frame.fields[frame.key] = value  # type: ignore[index]
+        if frame.key in ("lat", "lon") and frame.location is None:
+            fields = frame.fields
+            if "lat" in fields and "lon" in fields:
+                self.locate(frame, self.buffer_for(fields["lat"], fields["lon"]))
+
+    def locate(self, frame: _Frame, location: ColumnBuffers) -> None:
+        """Set the location of an object's points, releasing the held ones."""
+        frame.location = location
+        if frame.pending is not None:
+            location.absorb(frame.pending)
+            frame.pending = None
+
+    def enclosing(self) -> _Frame | None:
+        """The innermost open object."""
+        return next((frame for frame in reversed(self.stack) if frame.is_object), None)
+
+    def target(self, timestamp: str) -> ColumnBuffers:
+        """Buffers for points of the innermost open object."""
+        frame = self.enclosing()
+        if frame is None:
+            raise ValueError(f"Forecast point {timestamp} has no location")
+        if frame.location is not None:
+            return frame.location
+        if frame.pending is None:
+            frame.pending = ColumnBuffers(math.nan, math.nan)
+        return frame.pending
+
+    def add_points(
+        self,
+        timestamps: Sequence[str],
+        wind_speed: Sequence[str],
+        wave_height: Sequence[str],
+        wave_period: Sequence[str],
+    ) -> None:
+        """Append points in canonical key order to their location."""
+        self.target(timestamps[0]).extend(
+            timestamps, wind_speed, wave_height, wave_period
+        )
+        self.points += len(timestamps)
+
+    def close(self, frame: _Frame) -> None:
+        """Handle a container that just closed."""
+        if not frame.is_object:
+            return
+        if frame.pending is not None:
+            # No location in this object: its points go to the enclosing one
+            first = datetime.fromtimestamp(frame.pending.timestamps[0], UTC)
+            self.target(first.isoformat()).absorb(frame.pending)
+        self.close_object(frame.fields)
+
+    def close_object(self, fields: dict[str, str]) -> None:
+        """Handle the scalar members of an object that just closed."""
+        if self.issue_time is None and "issue_time" in fields:
+            self.issue_time = parse_timestamp(fields["issue_time"])
+        timestamp = fields.get("timestamp")
+        located = "lat" in fields and "lon" in fields
+        if timestamp is None:
+            frame = self.stack[-1] if self.stack else None
+            if located and frame is not None and frame.is_object:
+                # Location header of a document, e.g. its "location" key
+                self.locate(frame, self.buffer_for(fields["lat"], fields["lon"]))
+            # Otherwise not a point, e.g. provider metadata
+            return
+
+        for required in ("wave_height", "wind_speed"):
+            if required not in fields:
+                raise ValueError(f"Forecast point {timestamp} has no {required}")
+        target = (
+            self.buffer_for(fields["lat"], fields["lon"])
+            if located
+            else self.target(timestamp)
+        )
+        target.extend(
+            [timestamp],
+            [fields["wind_speed"]],
+            [fields["wave_height"]],
+            [fields.get("wave_period", "0")],
+        )
+        self.points += 1
+
+
+def parse_forecast_stream(
+    stream: TextIO, chunk_size: int = DEFAULT_CHUNK_SIZE
+) -> ParsedForecast:
+    """
+    Parse a forecast stream into one columnar series per location.
+
+    Args:
+        stream: Text stream with JSON or NDJSON forecast data
+        chunk_size: Number of characters read per chunk
+
+    Returns:
+        ParsedForecast with the series in order of first appearance
+
+    Raises:
+        ValueError: On a malformed or truncated document, or an incomplete point
+    """
+    parser = _StreamParser(stream, chunk_size)
+    parser.parse()
+
+    return ParsedForecast(
+        issue_time=parser.issue_time,
+        series=[buffer.to_series() for buffer in parser.buffers.values()],
+        points=parser.points,
+    )
+
+
+def parse_forecast_file(
+    path: str | Path, chunk_size: int = DEFAULT_CHUNK_SIZE
+) -> ParsedForecast:
+    """Parse a forecast JSON/NDJSON file with the streaming parser."""
+    with open(path, encoding="utf-8") as f:
+        return parse_forecast_stream(f, chunk_size)
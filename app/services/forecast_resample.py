@@ -0,0 +1,142 @@
+"""Resampling of forecast series onto a canonical time grid.
+
+Providers mix hourly, 3-hourly and irregular steps, and drop points, while the
+WoW analysis counts a task's duration in points. ``resample`` aligns a series on
+the grid of ``step`` seconds since the epoch, over the span the forecast covers:
+
+    - a grid time between two forecast points at most ``max_gap`` apart is
+      linearly interpolated
+    - a grid time inside a longer gap is missing (NaN), so it is no-go for
+      every limit and left out of range statistics
+
+A series already on the grid is returned as is. The weather service resamples
+once per forecast version and location, together with the range indexes.
+
+Providers share one time axis across their locations, so how each grid point
+is computed (``grid_weights``) is kept per distinct axis and reused by every
+series on it; a column is then one pass over the index and fraction arrays.
+"""
+
+import math
+from array import array
+from collections.abc import Sequence
+from dataclasses import dataclass
+from functools import lru_cache
+from itertools import pairwise
+
+from app.metrics import track_lru_cache
+from app.services.forecast_snapshot import (
+    TIMESTAMP_TYPECODE,
+    VALUE_TYPECODE,
+    ForecastSeries,
+)
+
+MISSING = math.nan
+
+
+def is_on_grid(timestamps: Sequence[int], step: int) -> bool:
+    """Whether ``timestamps`` are exactly the grid times of their span."""
+    if not timestamps:
+        return True
+    first = timestamps[0]
+    return first % step == 0 and all(b - a == step for a, b in pairwise(timestamps))
+
+
+def duration_points(hours: float, step: int) -> int:
+    """
+    Grid points covering ``hours`` (at least one).
+
+    A duration between two grid steps is rounded up, so the window covers all of
+    it: 2.25 hours on a 30-minute grid take 5 points. The analysis used to
+    truncate (4 points, 15 minutes short of the task).
+    """
+    return max(1, math.ceil(round(hours * 3600 / step, 6)))
+
+
+@dataclass(frozen=True, slots=True)
+class GridWeights:
+    """
+    How to compute every grid point of a time axis from the forecast points.
+
+    Grid point ``k`` is ``values[before[k]] * (1 - w) + values[after[k]] * w``
+    with ``w = fraction[k]``; a NaN fraction marks a gap, so the point is NaN.
+    """
+
+    grid: array[int]
+    before: list[int]
+    after: list[int]
+    fraction: list[float]
+
+
+def grid_weights(timestamps: Sequence[int], step: int, max_gap: int) -> GridWeights:
+    """Grid times of the span of ``timestamps`` and how to compute each point."""
+    if not timestamps:
+        return GridWeights(array(TIMESTAMP_TYPECODE), [], [], [])
+
+    grid = array(
+        TIMESTAMP_TYPECODE,
+        range(-(-timestamps[0] // step) * step, timestamps[-1] + 1, step),
+    )
+    before: list[int] = []
+    after: list[int] = []
+    fraction: list[float] = []
+    last = len(timestamps) - 1
+    i = 0
+    for time in grid:
+        # Advance to the last point at or before ``time``
+        while i < last and timestamps[i + 1] <= time:
+            i += 1
+        before.append(i)
+        if timestamps[i] == time:
+            after.append(i)
+            fraction.append(0.0)
+            continue
+        after.append(i + 1)
+        gap = timestamps[i + 1] - timestamps[i]
+        fraction.append(MISSING if gap > max_gap else (time - timestamps[i]) / gap)
+    return GridWeights(grid, before, after, fraction)
+
+
+@lru_cache(maxsize=8)
+def _axis_weights(timestamps: bytes, step: int, max_gap: int) -> GridWeights:
+    """``grid_weights`` of a time axis, shared by the series on it."""
+    return grid_weights(array(TIMESTAMP_TYPECODE, timestamps), step, max_gap)
+
+
+track_lru_cache("grid_weights", _axis_weights)
+
+
+def resample_column(values: Sequence[float], weights: GridWeights) -> array[float]:
+    """Apply ``grid_weights`` to one column."""
+    points = zip(weights.before, weights.after, weights.fraction, strict=True)
+    return array(
+        VALUE_TYPECODE, [values[i] + (values[j] - values[i]) * w for i, j, w in points]
+    )
+
+
+def resample(series: ForecastSeries, step: int, max_gap: int) -> ForecastSeries:
+    """
+    Align ``series`` on the grid of ``step`` seconds.
+
+    Args:
+        series: Series sorted by timestamp, at any resolution
+        step: Grid step in seconds
+        max_gap: Longest gap in seconds that is interpolated across
+
+    Returns:
+        The series on the grid, with NaN values inside longer gaps
+    """
+    if is_on_grid(series.timestamps, step):
+        return series
+
+    weights = _axis_weights(
+        array(TIMESTAMP_TYPECODE, series.timestamps).tobytes(), step, max_gap
+    )
+    return ForecastSeries(
+        lat=series.lat,
+        lon=series.lon,
+        timestamps=weights.grid,
+        wave_height=resample_column(series.wave_height, weights),
+        wind_speed=resample_column(series.wind_speed, weights),
+        wave_period=resample_column(series.wave_period, weights),
+    )
@@ -0,0 +1,252 @@
+"""Immutable, versioned in-memory forecast snapshots.
+
+A snapshot holds every location of one forecast issue as columnar arrays. Snapshots
+are never mutated: a new issue produces a new snapshot which the weather service
+swaps in with a single reference assignment, so requests that already grabbed the
+previous snapshot keep reading consistent arrays until they finish.
+"""
+
+import zlib
+from array import array
+from bisect import bisect_left, bisect_right
+from collections.abc import Iterable, Sequence
+from dataclasses import dataclass, field
+from datetime import UTC, datetime
+from typing import Any, Final
+
+# Column types: int64 epoch seconds and float32 values
+TIMESTAMP_TYPECODE: Final = "q"
+VALUE_TYPECODE: Final = "f"
+
+
+def parse_timestamp(value: str | datetime) -> datetime:
+    """Parse an ISO timestamp (accepting a trailing ``Z``) into an aware datetime."""
+    if isinstance(value, datetime):
+        timestamp = value
+    else:
+        timestamp = datetime.fromisoformat(value.replace("Z", "+00:00"))
+    if timestamp.tzinfo is None:
+        timestamp = timestamp.replace(tzinfo=UTC)
+    return timestamp
+
+
+def decode_value(value: float) -> float:
+    """Undo float32 widening noise (2.299999952316284 -> 2.3) for API output."""
+    return float(f"{value:.7g}")
+
+
+def to_epoch(value: datetime) -> float:
+    """Convert a datetime to epoch seconds, treating naive values as UTC."""
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=UTC)
+    return value.timestamp()
+
+
+def columns_crc(columns: Iterable[Sequence[Any]]) -> int:
+    """CRC32 over the raw bytes of a set of columns."""
+    crc = 0
+    for column in columns:
+        crc = zlib.crc32(memoryview(column), crc)  # type: ignore[arg-type]
+    return crc
+
+
+@dataclass(frozen=True, slots=True)
+class ForecastSeries:
+    """Columnar forecast for a single location, sorted by timestamp."""
+
+    lat: float
+    lon: float
+    timestamps: Sequence[int]
+    wave_height: Sequence[float]
+    wind_speed: Sequence[float]
+    wave_period: Sequence[float]
+    # CRC32 of the columns when known up front (e.g. stored in a binary file)
+    checksum: int | None = field(default=None, compare=False)
+
+    def __len__(self) -> int:
+        return len(self.timestamps)
+
+    def index_range(
+        self, from_epoch: float | None = None, to_epoch: float | None = None
+    ) -> tuple[int, int]:
+        """Return the [start, end) indices of points within [from_epoch, to_epoch]."""
+        start = 0 if from_epoch is None else bisect_left(self.timestamps, from_epoch)
+        end = (
+            len(self.timestamps)
+            if to_epoch is None
+            else bisect_right(self.timestamps, to_epoch)
+        )
+        return start, max(start, end)
+
+    def slice(self, start: int, end: int) -> "ForecastSeries":
+        """Return the points in [start, end) as zero-copy views on the columns."""
+        if start == 0 and end == len(self):
+            return self
+        return ForecastSeries(
+            lat=self.lat,
+            lon=self.lon,
+            timestamps=memoryview(self.timestamps)[start:end],  # type: ignore[arg-type]
+            wave_height=memoryview(self.wave_height)[start:end],  # type: ignore[arg-type]
+            wind_speed=memoryview(self.wind_speed)[start:end],  # type: ignore[arg-type]
+            wave_period=memoryview(self.wave_period)[start:end],  # type: ignore[arg-type]
+        )
+
+    def point(self, index: int) -> tuple[int, float, float, float]:
+        """Return (timestamp, wave_height, wind_speed, wave_period) at index."""
+        return (
+            self.timestamps[index],
+            self.wave_height[index],
+            self.wind_speed[index],
+            self.wave_period[index],
+        )
+
+    def content_crc(self) -> int:
+        """CRC32 of the columns, using the precomputed checksum when available."""
+        if self.checksum is not None:
+            return self.checksum
+        return columns_crc(
+            (self.timestamps, self.wave_height, self.wind_speed, self.wave_period)
+        )
+
+    def digest(self, crc: int = 0) -> int:
+        """CRC32 of the location and content, chained onto ``crc``."""
+        return zlib.crc32(f"{self.lat},{self.lon},{self.content_crc()}".encode(), crc)
+
+
+@dataclass(frozen=True, slots=True)
+class ForecastSnapshot:
+    """All locations of one forecast issue."""
+
+    issue_time: datetime
+    version: str
+    series: tuple[ForecastSeries, ...]
+
+    def nearest(self, lat: float, lon: float) -> ForecastSeries | None:
+        """Return the series whose location is closest to (lat, lon)."""
+        if not self.series:
+            return None
+        return min(
+            self.series,
+            key=lambda s: (s.lat - lat) * (s.lat - lat) + (s.lon - lon) * (s.lon - lon),
+        )
+
+
+@dataclass(frozen=True, slots=True)
+class ForecastDelta:
+    """What changed between two forecast issues."""
+
+    issue_time: datetime
+    version: str
+    added: int = 0
+    changed: int = 0
+    removed: int = 0
+    unchanged: int = 0
+
+    @property
+    def is_empty(self) -> bool:
+        """Whether the new issue carries no point changes."""
+        return self.added == self.changed == self.removed == 0
+
+
+def series_from_points(
+    lat: float, lon: float, points: Iterable[dict[str, Any]]
+) -> ForecastSeries:
+    """Build a columnar series from forecast point dicts."""
+    rows = sorted(
+        (
+            int(parse_timestamp(point["timestamp"]).timestamp()),
+            float(point["wave_height"]),
+            float(point["wind_speed"]),
+            float(point.get("wave_period") or 0.0),
+        )
+        for point in points
+    )
+    return ForecastSeries(
+        lat=float(lat),
+        lon=float(lon),
+        timestamps=array(TIMESTAMP_TYPECODE, [row[0] for row in rows]),
+        wave_height=array(VALUE_TYPECODE, [row[1] for row in rows]),
+        wind_speed=array(VALUE_TYPECODE, [row[2] for row in rows]),
+        wave_period=array(VALUE_TYPECODE, [row[3] for row in rows]),
+    )
+
+
+def diff_series(
+    old: ForecastSeries | None, new: ForecastSeries
+) -> tuple[int, int, int, int]:
+    """
+    Count the point differences between two series of the same location.
+
+    Returns:
+        tuple: (added, changed, removed, unchanged)
+    """
+    if old is None:
+        return len(new), 0, 0, 0
+    if len(old) == len(new) and old.content_crc() == new.content_crc():
+        return 0, 0, 0, len(new)
+
+    old_index = {ts: i for i, ts in enumerate(old.timestamps)}
+    added = changed = unchanged = 0
+    for i, ts in enumerate(new.timestamps):
+        j = old_index.pop(ts, None)
+        if j is None:
+            added += 1
+        elif old.point(j) != new.point(i):
+            changed += 1
+        else:
+            unchanged += 1
+
+    return added, changed, len(old_index), unchanged
+
+
+def snapshot_version(issue_time: datetime, series: Sequence[ForecastSeries]) -> str:
+    """Deterministic version string, identical across processes for the same data."""
+    crc = 0
+    for item in series:
+        crc = item.digest(crc)
+    return f"{issue_time.astimezone(UTC):%Y%m%dT%H%M%SZ}-{crc:08x}"
+
+
+def apply_issue(
+    current: ForecastSnapshot | None,
+    issue_time: datetime,
+    incoming: Sequence[ForecastSeries],
+) -> tuple[ForecastSnapshot, ForecastDelta]:
+    """
+    Build the snapshot for a new forecast issue on top of the current one.
+
+    The delta is counted per point, but applied per location: a location with
+    any changed point takes the new series whole, while one whose points did not
+    change keeps its existing series object, so anything derived from it stays
+    valid. Locations missing from the new issue are carried over from the
+    current snapshot.
+
+    Returns:
+        tuple: (snapshot, delta)
+    """
+    previous = {(s.lat, s.lon): s for s in current.series} if current else {}
+    merged: dict[tuple[float, float], ForecastSeries] = dict(previous)
+    added = changed = removed = unchanged = 0
+
+    for new in incoming:
+        key = (new.lat, new.lon)
+        old = previous.get(key)
+        a, c, r, u = diff_series(old, new)
+        added += a
+        changed += c
+        removed += r
+        unchanged += u
+        merged[key] = old if old is not None and a == c == r == 0 else new
+
+    series = tuple(merged.values())
+    version = snapshot_version(issue_time, series)
+    snapshot = ForecastSnapshot(issue_time=issue_time, version=version, series=series)
+    delta = ForecastDelta(
+        issue_time=issue_time,
+        version=version,
+        added=added,
+        changed=changed,
+        removed=removed,
+        unchanged=unchanged,
+    )
+    return snapshot, delta
@@ -0,0 +1,90 @@
+"""Nearest-location lookups over the locations of a forecast snapshot.
+
+``ForecastSnapshot.nearest`` scans every location, which is fine for one request
+but not for the thousands of points of a vessel track. ``LocationIndex`` hashes
+the locations into square cells sized for about one location each and searches
+rings of cells around the query until no closer location can remain, so a
+lookup touches a handful of locations however many the snapshot has.
+Distances are plain degrees, like ``ForecastSnapshot.nearest``. Anything with
+``lat`` and ``lon`` can be indexed, not only series.
+"""
+
+import math
+from collections.abc import Sequence
+from typing import Protocol
+
+
+class Located(Protocol):
+    """Anything at a location."""
+
+    @property
+    def lat(self) -> float: ...
+
+    @property
+    def lon(self) -> float: ...
+
+
+class LocationIndex[L: Located]:
+    """Cell hash of forecast locations for nearest lookups."""
+
+    __slots__ = ("_cell", "_cells", "_extent", "_origin", "series")
+
+    def __init__(self, series: Sequence[L]):
+        self.series = tuple(series)
+        self._cells: dict[tuple[int, int], list[L]] = {}
+        if not self.series:
+            self._cell = 1.0
+            self._origin = (0.0, 0.0)
+            self._extent = (0, 0)
+            return
+
+        lats = [s.lat for s in self.series]
+        lons = [s.lon for s in self.series]
+        height = max(lats) - min(lats)
+        width = max(lons) - min(lons)
+        # About one location per cell over the bounding box, or along its longer
+        # side when the locations are (nearly) collinear, e.g. a single grid row
+        count = len(self.series)
+        self._cell = (
+            max(math.sqrt(height * width / count), max(height, width) / count) or 1.0
+        )
+        self._origin = (min(lats), min(lons))
+        for item in self.series:
+            self._cells.setdefault(self._cell_of(item.lat, item.lon), []).append(item)
+        self._extent = self._cell_of(max(lats), max(lons))
+
+    def _cell_of(self, lat: float, lon: float) -> tuple[int, int]:
+        return (
+            math.floor((lat - self._origin[0]) / self._cell),
+            math.floor((lon - self._origin[1]) / self._cell),
+        )
+
+    def nearest(self, lat: float, lon: float) -> L | None:
+        """The location closest to (lat, lon), as ``ForecastSnapshot.nearest``."""
+        if not self.series:
+            return None
+        ci, cj = self._cell_of(lat, lon)
+        max_i, max_j = self._extent
+        # Rings closer than the bounding box are empty
+        first = max(0 - ci, ci - max_i, 0 - cj, cj - max_j, 0)
+        last = max(ci, max_i - ci, cj, max_j - cj)
+
+        best: L | None = None
+        best_distance = math.inf
+        for ring in range(first, last + 1):
+            # Locations in this ring are at least (ring - 1) cells away
+            if best is not None and best_distance <= ((ring - 1) * self._cell) ** 2:
+                break
+            for i in range(max(ci - ring, 0), min(ci + ring, max_i) + 1):
+                if abs(i - ci) == ring:
+                    columns: Sequence[int] = range(
+                        max(cj - ring, 0), min(cj + ring, max_j) + 1
+                    )
+                else:
+                    columns = [j for j in (cj - ring, cj + ring) if 0 <= j <= max_j]
+                for j in columns:
+                    for item in self._cells.get((i, j), ()):
+                        distance = (item.lat - lat) ** 2 + (item.lon - lon) ** 2
+                        if distance < best_distance:
+                            best, best_distance = item, distance
+        return best
@@ -0,0 +1,119 @@
+"""Constant-time range statistics over forecast columns.
+
+A ``RangeIndex`` answers max, mean and exceedance count of any [start, end)
+range of a column in O(1):
+
+    - max: sparse table, ``levels[k][i] = max(values[i : i + 2**k])``; a range is
+      covered by two (overlapping) power-of-two blocks
+    - mean: prefix sums
+    - exceedances: prefix counts of values above a limit, built on first use of
+      that limit
+
+Missing values (NaN, see ``app.services.forecast_resample``) are left out of
+every statistic.
+
+Building costs O(n log n) per column, so indexes (along with the go/no-go masks
+of ``app.services.go_no_go``) are built once per forecast version and location
+(see ``WeatherService.get_stats``) and shared by every request reading that
+version.
+"""
+
+import math
+from array import array
+from collections.abc import Iterable, Sequence
+from itertools import accumulate
+
+from app.services.forecast_snapshot import ForecastSeries, decode_value
+from app.services.go_no_go import ThresholdMasks
+
+# Exceedance prefix counts kept per column; limits come from requests
+MAX_CACHED_LIMITS = 32
+
+
+class RangeIndex:
+    """Range max, mean and exceedance counts of one column."""
+
+    __slots__ = ("_exceedances", "_levels", "_prefix", "_present", "_values")
+
+    def __init__(self, values: Sequence[float]):
+        """Build the index over already decoded ``values``."""
+        self._values = array("d", values)
+        # Missing values never win a max and add nothing to a sum
+        levels = [array("d", (-math.inf if math.isnan(v) else v for v in values))]
+        width = 1
+        while 2 * width <= len(values):
+            previous = levels[-1]
+            count = len(values) - 2 * width + 1
+            levels.append(
+                array("d", map(max, previous[:count], previous[width : width + count]))
+            )
+            width *= 2
+        self._levels = levels
+        self._prefix = array(
+            "d", accumulate((0.0 if math.isnan(v) else v for v in values), initial=0.0)
+        )
+        self._present = array(
+            "q", accumulate((not math.isnan(v) for v in values), initial=0)
+        )
+        self._exceedances: dict[float, array[int]] = {}
+
+    def __len__(self) -> int:
+        return len(self._values)
+
+    @property
+    def values(self) -> Sequence[float]:
+        """The indexed values."""
+        return self._values
+
+    def count(self, start: int, end: int) -> int:
+        """Number of values present (not missing) in [start, end)."""
+        return self._present[end] - self._present[start]
+
+    def max(self, start: int, end: int) -> float:
+        """Largest value in [start, end)."""
+        if self.count(start, end) <= 0:
+            raise ValueError(f"No values in [{start}, {end})")
+        k = (end - start).bit_length() - 1
+        level = self._levels[k]
+        return max(level[start], level[end - (1 << k)])
+
+    def sum(self, start: int, end: int) -> float:
+        """Sum of the values in [start, end)."""
+        return self._prefix[end] - self._prefix[start]
+
+    def mean(self, start: int, end: int) -> float:
+        """Mean of the values in [start, end)."""
+        present = self.count(start, end)
+        if present <= 0:
+            raise ValueError(f"No values in [{start}, {end})")
+        return self.sum(start, end) / present
+
+    def exceedances(self, start: int, end: int, limit: float) -> int:
+        """Number of values above ``limit`` in [start, end)."""
+        counts = self._exceedances.get(limit)
+        if counts is None:
+            if len(self._exceedances) >= MAX_CACHED_LIMITS:
+                self._exceedances.pop(next(iter(self._exceedances)))
+            counts = self._exceedances[limit] = array(
+                "q", accumulate((value > limit for value in self._values), initial=0)
+            )
+        return counts[end] - counts[start]
+
+
+class SeriesStats:
+    """Range indexes over the operational columns of one forecast series."""
+
+    __slots__ = ("series", "wave_height", "wave_height_go", "wind_speed")
+
+    def __init__(self, series: ForecastSeries, ladder: Iterable[float] = ()):
+        """
+        Index ``series``.
+
+        Args:
+            ladder: Wave height limits whose go/no-go masks are packed up front
+        """
+        self.series = series
+        # Decoded like API output, so limits compare as they do in the WoW analysis
+        self.wave_height = RangeIndex([decode_value(v) for v in series.wave_height])
+        self.wind_speed = RangeIndex([decode_value(v) for v in series.wind_speed])
+        self.wave_height_go = ThresholdMasks(self.wave_height.values, ladder)
@@ -0,0 +1,311 @@
+"""Persistent forecast storage on top of the partitioned weather_forecasts table.
+
+Forecast issues arrive every few hours for many locations, so ``weather_forecasts``
+is range-partitioned by ``forecast_time`` (one partition per UTC day). Partitions
+are created on demand when an issue is ingested and dropped once they fall out of
+the retention window. Readers never touch the raw table: they query
+``weather_forecasts_latest``, which keeps only the most recent issue per
+(location, forecast_time) and is keyed for location + time range lookups, so a
+7-day query costs the same no matter how much history is stored. Ingestion
+upserts the points it writes into that table in the same transaction, so
+publishing an issue costs the size of the issue, not of the retained history.
+"""
+
+import argparse
+import asyncio
+import json
+from collections.abc import Iterable
+from datetime import UTC, datetime, timedelta
+from typing import Any
+
+from sqlalchemy import and_, delete, select, text
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.config import get_settings
+from app.database import get_sessionmaker
+from app.models.weather import LatestWeatherForecast, WeatherForecast
+from app.services.forecast_snapshot import parse_timestamp
+from app.services.invalidation import add_invalidation
+
+# asyncpg caps a statement at 32767 bind parameters
+INSERT_BATCH_SIZE = 2000
+
+
+class ForecastStore:
+    """Ingestion, partition maintenance and latest-issue reads for forecasts."""
+
+    async def ensure_partitions(
+        self, db: AsyncSession, range_start: datetime, range_end: datetime
+    ) -> int:
+        """Create the daily partitions covering [range_start, range_end]."""
+        result = await db.execute(
+            text("SELECT weather_forecasts_ensure_partitions(:start, :end)"),
+            {"start": range_start, "end": range_end},
+        )
+        return int(result.scalar_one())
+
+    async def drop_expired_partitions(
+        self, db: AsyncSession, retention_days: int | None = None
+    ) -> int:
+        """Drop partitions older than the retention window, and their latest points."""
+        if retention_days is None:
+            retention_days = get_settings().forecast_retention_days
+        result = await db.execute(
+            text(
+                "SELECT weather_forecasts_drop_partitions(make_interval(days => :days))"
+            ),
+            {"days": retention_days},
+        )
+        # Same cutoff as the partitions: the start of the UTC day
+        cutoff = (datetime.now(UTC) - timedelta(days=retention_days)).replace(
+            hour=0, minute=0, second=0, microsecond=0
+        )
+        await db.execute(
+            delete(LatestWeatherForecast).where(
+                LatestWeatherForecast.forecast_time < cutoff
+            )
+        )
+        return int(result.scalar_one())
+
+    async def upsert_latest(self, db: AsyncSession, rows: list[dict[str, Any]]) -> None:
+        """Make ``rows`` the latest points, unless a newer issue already wrote them."""
+        columns = (
+            "latitude",
+            "longitude",
+            "forecast_time",
+            "issue_time",
+            "wind_speed",
+            "wave_height",
+            "wave_period",
+        )
+        for offset in range(0, len(rows), INSERT_BATCH_SIZE):
+            statement = insert(LatestWeatherForecast).values(
+                [
+                    {column: row[column] for column in columns}
+                    for row in rows[offset : offset + INSERT_BATCH_SIZE]
+                ]
+            )
+            excluded = statement.excluded
+            statement = statement.on_conflict_do_update(
+                index_elements=["latitude", "longitude", "forecast_time"],
+                set_={
+                    "issue_time": excluded.issue_time,
+                    "wind_speed": excluded.wind_speed,
+                    "wave_height": excluded.wave_height,
+                    "wave_period": excluded.wave_period,
+                },
+                where=LatestWeatherForecast.issue_time <= excluded.issue_time,
+            )
+            await db.execute(statement)
+
+    async def ingest_issue(
+        self,
+        db: AsyncSession,
+        issue_time: datetime,
+        lat: float,
+        lon: float,
+        points: Iterable[dict[str, Any]],
+        *,
+        source: str = "external_api",
+    ) -> int:
+        """
+        Store one forecast issue for a location and run partition maintenance.
+
+        Re-ingesting the same issue overwrites its points in place.
+
+        Returns:
+            Number of points written
+        """
+        rows = [
+            {
+                "latitude": lat,
+                "longitude": lon,
+                "forecast_time": parse_timestamp(point["timestamp"]),
+                "issue_time": issue_time,
+                "wind_speed": point["wind_speed"],
+                "wave_height": point["wave_height"],
+                "wave_period": point.get("wave_period"),
+                "source": source,
+            }
+            for point in points
+        ]
+        if not rows:
+            return 0
+
+        forecast_times = [row["forecast_time"] for row in rows]
+        await self.ensure_partitions(db, min(forecast_times), max(forecast_times))
+
+        for offset in range(0, len(rows), INSERT_BATCH_SIZE):
+            statement = insert(WeatherForecast).values(
+                rows[offset : offset + INSERT_BATCH_SIZE]
+            )
+            statement = statement.on_conflict_do_update(
+                index_elements=["latitude", "longitude", "forecast_time", "issue_time"],
+                set_={
+                    "wind_speed": statement.excluded.wind_speed,
+                    "wave_height": statement.excluded.wave_height,
+                    "wave_period": statement.excluded.wave_period,
+                    "source": statement.excluded.source,
+                    "updated_at": text("now()"),
+                },
+            )
+            await db.execute(statement)
+
+        # Published to readers together with the points, when this commits
+        await self.upsert_latest(db, rows)
+        await self.drop_expired_partitions(db)
+        add_invalidation(db, "forecast")
+        await db.commit()
+
+        return len(rows)
+
+    async def ingest_delta(
+        self,
+        db: AsyncSession,
+        issue_time: datetime,
+        lat: float,
+        lon: float,
+        points: Iterable[dict[str, Any]],
+        *,
+        source: str = "external_api",
+    ) -> int:
+        """
+        Store only the points of a new issue that differ from the latest stored ones.
+
+        Unchanged points keep being served from the issue that last wrote them.
+
+        Returns:
+            Number of points written
+        """
+        points = list(points)
+        if not points:
+            return 0
+
+        forecast_times = [parse_timestamp(point["timestamp"]) for point in points]
+        latest = LatestWeatherForecast
+        result = await db.execute(
+            select(
+                latest.forecast_time,
+                latest.wind_speed,
+                latest.wave_height,
+                latest.wave_period,
+            ).where(
+                latest.latitude == lat,
+                latest.longitude == lon,
+                latest.forecast_time.between(min(forecast_times), max(forecast_times)),
+            )
+        )
+        current = {
+            row.forecast_time: (row.wind_speed, row.wave_height, row.wave_period)
+            for row in result
+        }
+
+        changed = [
+            point
+            for point, forecast_time in zip(points, forecast_times, strict=True)
+            if current.get(forecast_time)
+            != (point["wind_speed"], point["wave_height"], point.get("wave_period"))
+        ]
+        return await self.ingest_issue(db, issue_time, lat, lon, changed, source=source)
+
+    async def find_location(
+        self, db: AsyncSession, lat: float, lon: float
+    ) -> tuple[float, float] | None:
+        """Find the stored forecast location closest to (lat, lon), if any is in range."""
+        tolerance = get_settings().forecast_location_tolerance
+        latest = LatestWeatherForecast
+        result = await db.execute(
+            select(latest.latitude, latest.longitude)
+            .where(
+                and_(
+                    latest.latitude.between(lat - tolerance, lat + tolerance),
+                    latest.longitude.between(lon - tolerance, lon + tolerance),
+                )
+            )
+            .order_by(
+                (latest.latitude - lat) * (latest.latitude - lat)
+                + (latest.longitude - lon) * (latest.longitude - lon)
+            )
+            .limit(1)
+        )
+        row = result.first()
+        return (row.latitude, row.longitude) if row else None
+
+    async def get_latest(
+        self,
+        db: AsyncSession,
+        lat: float,
+        lon: float,
+        from_time: datetime | None = None,
+        to_time: datetime | None = None,
+    ) -> tuple[tuple[float, float] | None, list[LatestWeatherForecast]]:
+        """
+        Read the latest issue for the nearest stored location.
+
+        Returns:
+            tuple: (location, points) - location is None when nothing is stored nearby
+        """
+        location = await self.find_location(db, lat, lon)
+        if location is None:
+            return None, []
+
+        latest = LatestWeatherForecast
+        query = select(latest).where(
+            latest.latitude == location[0], latest.longitude == location[1]
+        )
+        if from_time is not None:
+            query = query.where(latest.forecast_time >= from_time)
+        if to_time is not None:
+            query = query.where(latest.forecast_time <= to_time)
+
+        result = await db.execute(query.order_by(latest.forecast_time))
+        return location, list(result.scalars().all())
+
+
+# Global forecast store instance
+forecast_store = ForecastStore()
+
+
+async def _ingest_file(path: str, issue_time: datetime | None, source: str) -> int:
+    """Ingest a forecast JSON file (same shape as weather-forecast.json)."""
+    with open(path) as f:
+        data = json.load(f)
+
+    if issue_time is None:
+        if not data.get("issue_time"):
+            raise ValueError(f"{path} has no issue_time; pass --issue-time")
+        issue_time = parse_timestamp(data["issue_time"])
+
+    async with get_sessionmaker()() as session:
+        return await forecast_store.ingest_delta(
+            session,
+            issue_time,
+            data["location"]["lat"],
+            data["location"]["lon"],
+            data["forecast"],
+            source=source,
+        )
+
+
+def main() -> None:
+    """Command line entry point: ``python -m app.services.forecast_store FILE``."""
+    parser = argparse.ArgumentParser(
+        description="Ingest a forecast issue into Postgres (changed points only)"
+    )
+    parser.add_argument("path", help="Forecast JSON file")
+    parser.add_argument(
+        "--issue-time",
+        type=parse_timestamp,
+        default=None,
+        help="Issue time (ISO format); defaults to the file's issue_time",
+    )
+    parser.add_argument("--source", default="external_api", help="Data source label")
+    args = parser.parse_args()
+
+    written = asyncio.run(_ingest_file(args.path, args.issue_time, args.source))
+    print(f"Ingested {written} forecast points from {args.path}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,88 @@
+"""Packed go/no-go masks.
+
+A mask is a Python int whose bit ``i`` is set when point ``i`` of a series is
+workable (wave height at or below the limit). Python ints are arrays of machine
+words, so the operations below run word by word in C:
+
+    - the points workable for ``d`` consecutive points starting at ``i`` are
+      ``go & go >> 1 & ... & go >> (d - 1)``, computed in O(log d) shift-and-ANDs
+      by doubling the covered span
+    - a mask costs one bit per point, so a ladder of limits costs a few bytes
+      per point
+
+``ThresholdMasks`` holds the masks of one wave height column for a ladder of
+limits (``WOW_THRESHOLD_LADDER``), built once per forecast version, so
+evaluating a task with a limit on the ladder reads no values at all.
+"""
+
+from collections.abc import Iterable, Sequence
+
+# Masks of limits missing from the ladder kept per column; limits come from tasks
+MAX_CACHED_LIMITS = 32
+
+
+def pack_bits(values: Sequence[bool]) -> int:
+    """Pack booleans into a mask, ``values[0]`` being the least significant bit."""
+    return int("".join(["1" if v else "0" for v in reversed(values)]) or "0", 2)
+
+
+def unpack_bits(mask: int, length: int) -> list[bool]:
+    """The first ``length`` bits of a mask as booleans."""
+    if length <= 0:
+        return []
+    return [bit == "1" for bit in reversed(format(mask, f"0{length}b")[-length:])]
+
+
+def set_bits(mask: int) -> list[int]:
+    """Indices of the set bits of a mask, in ascending order."""
+    bits = format(mask, "b")[::-1]
+    return [i for i, bit in enumerate(bits) if bit == "1"] if mask else []
+
+
+def window_starts(go: int, duration: int) -> int:
+    """
+    Mask of the points starting ``duration`` consecutive workable points.
+
+    Bits past the end of the series are clear, so windows running off the end
+    are never reported.
+    """
+    if duration <= 1:
+        return go
+    starts = go
+    span = 1
+    while 2 * span <= duration:
+        starts &= starts >> span
+        span *= 2
+    # Two (overlapping) blocks of ``span`` points cover the remainder
+    if span < duration:
+        starts &= starts >> (duration - span)
+    return starts
+
+
+class ThresholdMasks:
+    """Go/no-go masks of one column for a ladder of limits."""
+
+    __slots__ = ("_extra", "_ladder", "_values")
+
+    def __init__(self, values: Sequence[float], ladder: Iterable[float] = ()):
+        """Pack the masks of every limit of ``ladder`` over decoded ``values``."""
+        self._values = values
+        self._ladder = {float(limit): self._pack(limit) for limit in ladder}
+        self._extra: dict[float, int] = {}
+
+    def __len__(self) -> int:
+        return len(self._values)
+
+    def _pack(self, limit: float) -> int:
+        return pack_bits([value <= limit for value in self._values])
+
+    def go(self, limit: float) -> int:
+        """Mask of the points at or below ``limit``."""
+        mask = self._ladder.get(limit)
+        if mask is None:
+            mask = self._extra.get(limit)
+        if mask is None:
+            if len(self._extra) >= MAX_CACHED_LIMITS:
+                self._extra.pop(next(iter(self._extra)))
+            mask = self._extra[limit] = self._pack(limit)
+        return mask
@@ -0,0 +1,514 @@
+"""Hindcast backtesting of weather downtime.
+
+WoW analysis tells whether a task can go on the current forecast. Pricing a
+contract needs the other view: over years of past weather (hindcast), how long
+does a task wait for its window? ``backtest`` replays the WoW window logic (the
+masks of ``app.services.go_no_go``) for task profiles, starting the task at
+every grid point of the hindcast:
+
+    - a profile is a chain of steps (wave height limit, duration), each started
+      at the first window after the previous step finished
+    - the downtime of a start is the time from the start to the end of the last
+      step, minus the working time of the steps
+    - a start whose chain doesn't finish within ``horizon`` of waiting (or before
+      the data ends) is censored; starts on missing data are skipped
+
+The hindcast is cut into chunks by year or month, each carrying ``horizon`` of
+lookahead, and run across a process pool. Each chunk returns one histogram of
+downtime per profile and calendar month; they are merged as chunks complete, so
+memory holds the histograms, not the per-start results.
+
+Run with:
+    python -m app.services.hindcast hindcast/ profiles.json --lat 61.5 --lon 4.8
+"""
+
+import argparse
+import json
+import math
+import operator
+import os
+import sys
+from array import array
+from bisect import bisect_left
+from collections import Counter
+from collections.abc import Iterator, Sequence
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from dataclasses import dataclass, field
+from datetime import UTC, datetime
+from itertools import accumulate
+from pathlib import Path
+from typing import Any
+
+from app.services.forecast_binary import is_forecast_binary, open_forecast_binary
+from app.services.forecast_parser import parse_forecast_file
+from app.services.forecast_resample import duration_points, resample
+from app.services.forecast_snapshot import (
+    TIMESTAMP_TYPECODE,
+    VALUE_TYPECODE,
+    ForecastSeries,
+    decode_value,
+)
+from app.services.forecast_spatial import LocationIndex
+from app.services.go_no_go import ThresholdMasks, set_bits, window_starts
+
+CHUNK_BY = ("year", "month")
+# Percentiles of the downtime reported per profile and month
+PERCENTILES = (50, 80, 90)
+
+
+@dataclass(frozen=True, slots=True)
+class Step:
+    """One step of a task profile."""
+
+    wave_height_limit: float
+    duration_hours: float
+
+
+@dataclass(frozen=True, slots=True)
+class TaskProfile:
+    """A task, or a chain of dependent tasks run back to back."""
+
+    name: str
+    steps: tuple[Step, ...]
+
+
+@dataclass(slots=True)
+class Downtime:
+    """Histogram of the downtime of the starts of one profile, in grid points."""
+
+    counts: array[int]
+    censored: int = 0
+
+    @classmethod
+    def empty(cls, horizon: int) -> "Downtime":
+        """A histogram of waits from 0 to ``horizon`` points."""
+        return cls(array("q", bytes(8 * (horizon + 1))))
+
+    @property
+    def starts(self) -> int:
+        """Number of starts, censored ones included."""
+        return sum(self.counts) + self.censored
+
+    def merge(self, other: "Downtime") -> None:
+        """Add the counts of ``other``."""
+        self.counts = array("q", map(operator.add, self.counts, other.counts))
+        self.censored += other.censored
+
+    def percentiles(self, qs: Sequence[float]) -> list[int | None]:
+        """Nearest-rank percentiles in points, None when among censored starts."""
+        cumulative = list(accumulate(self.counts))
+        starts = cumulative[-1] + self.censored
+        ranks = [max(1, math.ceil(q / 100 * starts)) for q in qs]
+        return [
+            bisect_left(cumulative, rank) if rank <= cumulative[-1] else None
+            for rank in ranks
+        ]
+
+    def summary(self, step_seconds: int) -> dict[str, Any]:
+        """Downtime statistics in hours."""
+        hours = step_seconds / 3600
+        starts = self.starts
+        finished = starts - self.censored
+        total = sum(map(operator.mul, range(len(self.counts)), self.counts))
+        summary: dict[str, Any] = {
+            "starts": starts,
+            "censored": self.censored,
+            "no_wait_fraction": round(self.counts[0] / starts, 4) if starts else None,
+            "mean_hours": round(total / finished * hours, 2) if finished else None,
+        }
+        waits = self.percentiles(PERCENTILES) if starts else [None] * len(PERCENTILES)
+        for q, wait in zip(PERCENTILES, waits, strict=True):
+            summary[f"p{q}_hours"] = wait * hours if wait is not None else None
+        return summary
+
+
+@dataclass(frozen=True, slots=True)
+class _Chunk:
+    """Work unit of the pool: a slice of the hindcast and the starts to replay."""
+
+    values: array[float]
+    # (calendar month, first start, end of starts) as offsets into ``values``
+    months: tuple[tuple[int, int, int], ...]
+    # Per profile: (limit, duration in points) of every step
+    profiles: tuple[tuple[tuple[float, int], ...], ...]
+    horizon: int
+
+
+@dataclass(slots=True)
+class BacktestResult:
+    """Downtime distributions per profile, overall and per calendar month."""
+
+    profiles: Sequence[TaskProfile]
+    step_seconds: int
+    horizon: int
+    months: dict[tuple[int, int], Downtime] = field(default_factory=dict)
+
+    def add(self, key: tuple[int, int], downtime: Downtime) -> None:
+        """Merge the downtime of (profile index, month) from one chunk."""
+        current = self.months.get(key)
+        if current is None:
+            self.months[key] = downtime
+        else:
+            current.merge(downtime)
+
+    def overall(self, profile: int) -> Downtime:
+        """Downtime of a profile over all months."""
+        total = Downtime.empty(self.horizon)
+        for (index, _), downtime in self.months.items():
+            if index == profile:
+                total.merge(downtime)
+        return total
+
+    def to_dict(self) -> dict[str, Any]:
+        """Summaries per profile, as plain JSON types."""
+        return {
+            "step_minutes": self.step_seconds // 60,
+            "horizon_hours": self.horizon * self.step_seconds / 3600,
+            "profiles": [
+                {
+                    "name": profile.name,
+                    "steps": [
+                        {
+                            "wave_height_limit": step.wave_height_limit,
+                            "duration_hours": step.duration_hours,
+                        }
+                        for step in profile.steps
+                    ],
+                    "downtime": self.overall(i).summary(self.step_seconds),
+                    "months": {
+                        str(month): self.months[(i, month)].summary(self.step_seconds)
+                        for month in range(1, 13)
+                        if (i, month) in self.months
+                    },
+                }
+                for i, profile in enumerate(self.profiles)
+            ],
+        }
+
+
+def load_profiles(path: str | Path) -> list[TaskProfile]:
+    """
+    Read task profiles from a JSON list.
+
+    Each profile is ``{"name", "wave_height_limit", "duration_hours"}`` for a
+    single task, or ``{"name", "steps": [{"wave_height_limit",
+    "duration_hours"}, ...]}`` for a dependency chain.
+
+    Raises:
+        ValueError: On a malformed profile
+    """
+    with open(path) as f:
+        data = json.load(f)
+    profiles = []
+    for i, item in enumerate(data):
+        try:
+            steps = item.get("steps") or [item]
+            profile = TaskProfile(
+                str(item.get("name", f"profile-{i + 1}")),
+                tuple(
+                    Step(
+                        float(step["wave_height_limit"]), float(step["duration_hours"])
+                    )
+                    for step in steps
+                ),
+            )
+        except (AttributeError, KeyError, TypeError, ValueError) as e:
+            raise ValueError(f"Invalid task profile #{i + 1}: {e!r}") from e
+        if any(step.duration_hours <= 0 for step in profile.steps):
+            raise ValueError(
+                f"Invalid task profile #{i + 1}: durations must be positive"
+            )
+        profiles.append(profile)
+    return profiles
+
+
+def _read_files(paths: Sequence[str | Path]) -> Iterator[Sequence[ForecastSeries]]:
+    """The series of every hindcast file (directories expanded), by file name."""
+    files = sorted(
+        child
+        for path in map(Path, paths)
+        for child in (sorted(path.iterdir()) if path.is_dir() else [path])
+        if child.is_file()
+    )
+    for path in files:
+        if is_forecast_binary(path):
+            yield open_forecast_binary(path)[1]
+        else:
+            yield parse_forecast_file(path).series
+
+
+def _join(
+    parts: Sequence[ForecastSeries], step_seconds: int, max_gap_seconds: int
+) -> ForecastSeries:
+    """Concatenate series of one location in time and resample them.
+
+    Where parts overlap, the earliest part wins.
+    """
+    parts = sorted(parts, key=lambda part: part.timestamps[0])
+    timestamps = array(TIMESTAMP_TYPECODE)
+    columns: dict[str, array[float]] = {
+        name: array(VALUE_TYPECODE)
+        for name in ("wave_height", "wind_speed", "wave_period")
+    }
+    for part in parts:
+        # Skip points already covered by an earlier part
+        first = bisect_left(part.timestamps, timestamps[-1] + 1) if timestamps else 0
+        timestamps.extend(part.timestamps[first:])
+        for name, column in columns.items():
+            column.extend(getattr(part, name)[first:])
+    return resample(
+        ForecastSeries(
+            parts[0].lat,
+            parts[0].lon,
+            timestamps,
+            wave_height=columns["wave_height"],
+            wind_speed=columns["wind_speed"],
+            wave_period=columns["wave_period"],
+        ),
+        step_seconds,
+        max_gap_seconds,
+    )
+
+
+def load_hindcast(
+    paths: Sequence[str | Path],
+    lat: float,
+    lon: float,
+    step_seconds: int,
+    max_gap_seconds: int,
+) -> ForecastSeries:
+    """
+    Read the nearest location's hindcast from files, on the canonical grid.
+
+    Args:
+        paths: Forecast files (JSON, NDJSON or binary), e.g. one per year; a
+            directory stands for the files in it
+        lat: Latitude of the site
+        lon: Longitude of the site
+
+    Returns:
+        The series of the files concatenated in time and resampled; where files
+        overlap, the earlier file wins
+    """
+    parts = []
+    for series in _read_files(paths):
+        nearest = LocationIndex(series).nearest(lat, lon)
+        if nearest is not None and len(nearest):
+            parts.append(nearest)
+    if not parts:
+        raise ValueError(f"No hindcast data near ({lat}, {lon})")
+    return _join(parts, step_seconds, max_gap_seconds)
+
+
+def load_hindcast_locations(
+    paths: Sequence[str | Path], step_seconds: int, max_gap_seconds: int
+) -> list[ForecastSeries]:
+    """Every location's hindcast from files, as ``load_hindcast`` joins them."""
+    parts: dict[tuple[float, float], list[ForecastSeries]] = {}
+    for series in _read_files(paths):
+        for item in series:
+            if len(item):
+                parts.setdefault((item.lat, item.lon), []).append(item)
+    return [_join(group, step_seconds, max_gap_seconds) for group in parts.values()]
+
+
+def month_spans(timestamps: Sequence[int]) -> Iterator[tuple[int, int, int, int]]:
+    """(year, month, first index, end index) of each calendar month of a grid."""
+    begin = 0
+    current = None
+    for i, timestamp in enumerate(timestamps):
+        moment = datetime.fromtimestamp(timestamp, UTC)
+        key = (moment.year, moment.month)
+        if key != current:
+            if current is not None:
+                yield (*current, begin, i)
+            current, begin = key, i
+    if current is not None:
+        yield (*current, begin, len(timestamps))
+
+
+def _chunks(
+    series: ForecastSeries,
+    profiles: Sequence[TaskProfile],
+    step_seconds: int,
+    horizon: int,
+    chunk_by: str,
+) -> Iterator[_Chunk]:
+    """Cut the hindcast into chunks of whole months or years, with lookahead."""
+    steps = tuple(
+        tuple(
+            (step.wave_height_limit, duration_points(step.duration_hours, step_seconds))
+            for step in profile.steps
+        )
+        for profile in profiles
+    )
+    lookahead = horizon + max(sum(points for _, points in chain) for chain in steps)
+    values = array("d", (decode_value(v) for v in series.wave_height))
+
+    groups: dict[tuple[int, ...], list[tuple[int, int, int]]] = {}
+    for year, month, begin, end in month_spans(series.timestamps):
+        key = (year,) if chunk_by == "year" else (year, month)
+        groups.setdefault(key, []).append((month, begin, end))
+    for months in groups.values():
+        first = months[0][1]
+        last = min(months[-1][2] + lookahead, len(values))
+        yield _Chunk(
+            values[first:last],
+            tuple((month, begin - first, end - first) for month, begin, end in months),
+            steps,
+            horizon,
+        )
+
+
+def _next_windows(starts: Sequence[int], points: int, beyond: int) -> array[int]:
+    """
+    First window start at or after every index up to ``beyond``.
+
+    Where no window follows, the step "finishes" at ``beyond``, which maps to
+    itself for every later step: a chain that runs out of windows ends there.
+    """
+    following = array("q", [beyond - points]) * (beyond + 1)
+    begin = 0
+    for start in starts:
+        following[begin : start + 1] = array("q", [start]) * (start + 1 - begin)
+        begin = start + 1
+    return following
+
+
+def _run_chunk(chunk: _Chunk) -> dict[tuple[int, int], Downtime]:
+    """Replay every start of a chunk for every profile."""
+    values = chunk.values
+    # Finishing here is waiting longer than the horizon from any start
+    beyond = (
+        len(values)
+        + chunk.horizon
+        + 1
+        + max(sum(points for _, points in chain) for chain in chunk.profiles)
+    )
+    masks = ThresholdMasks(values)
+    windows: dict[tuple[float, int], array[int]] = {}
+    for chain in chunk.profiles:
+        for limit, points in chain:
+            if (limit, points) not in windows:
+                starts = set_bits(window_starts(masks.go(limit), points))
+                windows[(limit, points)] = _next_windows(starts, points, beyond)
+    # Starts on missing data are skipped
+    months = [
+        (month, [i for i in range(begin, end) if not math.isnan(values[i])])
+        for month, begin, end in chunk.months
+    ]
+
+    results: dict[tuple[int, int], Downtime] = {}
+    for index, chain in enumerate(chunk.profiles):
+        work = sum(points for _, points in chain)
+        for month, starts in months:
+            finish = starts
+            for limit, points in chain:
+                following = windows[(limit, points)]
+                finish = [following[f] + points for f in finish]
+            downtime = results[(index, month)] = Downtime.empty(chunk.horizon)
+            # Time from start to finish, of which ``work`` is working
+            for elapsed, count in Counter(map(operator.sub, finish, starts)).items():
+                if elapsed - work <= chunk.horizon:
+                    downtime.counts[elapsed - work] = count
+                else:
+                    downtime.censored += count
+    return results
+
+
+def backtest(
+    series: ForecastSeries,
+    profiles: Sequence[TaskProfile],
+    step_seconds: int,
+    *,
+    horizon_hours: float = 720.0,
+    chunk_by: str = "month",
+    workers: int | None = None,
+) -> BacktestResult:
+    """
+    Downtime distributions of task profiles over a hindcast.
+
+    Args:
+        series: Hindcast of one location on the ``step_seconds`` grid
+        profiles: Task profiles to replay
+        horizon_hours: Longest wait counted; longer waits are censored
+        chunk_by: ``year`` or ``month``
+        workers: Worker processes (default: CPU count); 1 runs in process
+
+    Returns:
+        BacktestResult with a histogram per profile and calendar month
+    """
+    if chunk_by not in CHUNK_BY:
+        raise ValueError(f"Chunks must be one of {CHUNK_BY}, not {chunk_by!r}")
+    if not profiles:
+        raise ValueError("No task profiles to backtest")
+    horizon = math.ceil(horizon_hours * 3600 / step_seconds)
+    result = BacktestResult(profiles, step_seconds, horizon)
+    chunks = _chunks(series, profiles, step_seconds, horizon, chunk_by)
+
+    if workers == 1:
+        for chunk in chunks:
+            for key, downtime in _run_chunk(chunk).items():
+                result.add(key, downtime)
+        return result
+
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        futures = [pool.submit(_run_chunk, chunk) for chunk in chunks]
+        for future in as_completed(futures):
+            for key, downtime in future.result().items():
+                result.add(key, downtime)
+    return result
+
+
+def main() -> None:
+    """Command line entry point: backtest task profiles over hindcast files."""
+    parser = argparse.ArgumentParser(
+        description="Weather downtime statistics of task profiles over a hindcast"
+    )
+    parser.add_argument("hindcast", nargs="+", help="Hindcast files or directories")
+    parser.add_argument("profiles", help="JSON list of task profiles")
+    parser.add_argument("--lat", type=float, required=True, help="Site latitude")
+    parser.add_argument("--lon", type=float, required=True, help="Site longitude")
+    parser.add_argument("--step-minutes", type=int, default=30, help="Grid step")
+    parser.add_argument(
+        "--max-gap-minutes", type=int, default=180, help="Longest gap interpolated"
+    )
+    parser.add_argument(
+        "--horizon-hours", type=float, default=720.0, help="Longest wait counted"
+    )
+    parser.add_argument("--chunk-by", choices=CHUNK_BY, default="month")
+    parser.add_argument("--workers", type=int, default=os.cpu_count())
+    parser.add_argument("--output", help="Write the JSON here instead of stdout")
+    args = parser.parse_args()
+
+    series = load_hindcast(
+        args.hindcast,
+        args.lat,
+        args.lon,
+        args.step_minutes * 60,
+        args.max_gap_minutes * 60,
+    )
+    result = backtest(
+        series,
+        load_profiles(args.profiles),
+        args.step_minutes * 60,
+        horizon_hours=args.horizon_hours,
+        chunk_by=args.chunk_by,
+        workers=args.workers,
+    )
+    output = {
+        "location": {"lat": series.lat, "lon": series.lon},
+        "from_time": datetime.fromtimestamp(series.timestamps[0], UTC).isoformat(),
+        "to_time": datetime.fromtimestamp(series.timestamps[-1], UTC).isoformat(),
+        **result.to_dict(),
+    }
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(output, f, indent=2)
+    else:
+        json.dump(output, sys.stdout, indent=2)
+        print()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,256 @@
+"""Cross-worker cache invalidation over Postgres LISTEN/NOTIFY.
+
+In-process caches live in one worker, so a change committed by any worker (or
+pod) has to evict the copies held by all the others. Mutations stage
+invalidation keys on their session with ``add_invalidation``. The keys are sent
+with ``pg_notify`` inside the same transaction, so Postgres delivers them only
+once the change is committed, and never for a rolled back one. Every worker
+listens on the channel over one dedicated asyncpg connection and hands the keys
+to the caches subscribed to their prefix, its own notifications included. The
+worker that commits also evicts its own caches right after the commit, so it
+never serves its stale copy while its notification makes the round trip.
+
+Keys:
+    - ``task:<id>``: a task changed
+    - ``tasks``: tasks were added
+    - ``forecast``: a forecast issue was stored
+
+Notifications sent while a worker is disconnected are lost. Caches are
+therefore flushed every time the listener (re)connects, and
+``InvalidatedCache`` serves nothing while it is down.
+"""
+
+import asyncio
+import logging
+from collections.abc import Awaitable, Callable, Iterable
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import Any
+
+import asyncpg
+from sqlalchemy import event, func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from app.config import get_settings
+from app.metrics import record_cache
+
+logger = logging.getLogger(__name__)
+
+CHANNEL = "cache_invalidation"
+# NOTIFY payloads must stay under 8000 bytes
+MAX_PAYLOAD_BYTES = 7900
+
+_PENDING = "pending_invalidations"
+_COMMITTING = "committing_invalidations"
+
+
+def add_invalidation(db: AsyncSession, *keys: str) -> None:
+    """Stage invalidation keys on the session; they are sent when it commits."""
+    db.info.setdefault(_PENDING, set()).update(keys)
+
+
+def payloads(keys: Iterable[str]) -> list[str]:
+    """Space separated keys, split to fit the NOTIFY payload limit."""
+    batches: list[str] = []
+    current = ""
+    for key in keys:
+        if current and len(current) + 1 + len(key) > MAX_PAYLOAD_BYTES:
+            batches.append(current)
+            current = ""
+        current = f"{current} {key}" if current else key
+    if current:
+        batches.append(current)
+    return batches
+
+
+@event.listens_for(Session, "before_commit")
+def _send_invalidations(session: Session) -> None:
+    keys = session.info.pop(_PENDING, None)
+    if not keys:
+        return
+    session.info[_COMMITTING] = keys
+    if session.get_bind().dialect.name != "postgresql":
+        return
+    for payload in payloads(sorted(keys)):
+        session.execute(select(func.pg_notify(CHANNEL, payload)))
+
+
+@event.listens_for(Session, "after_commit")
+def _evict_committed(session: Session) -> None:
+    keys = session.info.pop(_COMMITTING, None)
+    bus = get_invalidation_bus() if keys else None
+    if bus is not None:
+        bus.deliver(keys)
+
+
+@event.listens_for(Session, "after_rollback")
+def _drop_invalidations(session: Session) -> None:
+    session.info.pop(_PENDING, None)
+    session.info.pop(_COMMITTING, None)
+
+
+@dataclass(frozen=True, slots=True)
+class _Subscriber:
+    prefix: str
+    evict: Callable[[set[str]], None]
+    flush: Callable[[], None]
+
+
+class InvalidationBus:
+    """Listens for invalidation keys on a dedicated connection and dispatches them."""
+
+    def __init__(
+        self,
+        dsn: str,
+        *,
+        channel: str = CHANNEL,
+        keepalive_seconds: float = 30.0,
+        min_backoff_seconds: float = 0.5,
+        max_backoff_seconds: float = 30.0,
+        connect: Callable[[str], Awaitable[Any]] = asyncpg.connect,
+    ):
+        self.dsn = dsn
+        self.channel = channel
+        self.keepalive_seconds = keepalive_seconds
+        self.min_backoff_seconds = min_backoff_seconds
+        self.max_backoff_seconds = max_backoff_seconds
+        self._connect = connect
+        self._subscribers: list[_Subscriber] = []
+        self.connected = False
+
+    def subscribe(
+        self, prefix: str, evict: Callable[[set[str]], None], flush: Callable[[], None]
+    ) -> None:
+        """
+        Register a cache.
+
+        Args:
+            prefix: Keys of interest (``"task"`` matches ``task:1`` and ``tasks``)
+            evict: Called with the matching keys of each notification
+            flush: Called to drop everything, on every (re)connect
+        """
+        self._subscribers.append(_Subscriber(prefix, evict, flush))
+
+    def dispatch(self, payload: str) -> None:
+        """Hand the keys of a notification to the interested subscribers."""
+        self.deliver(set(payload.split()))
+
+    def deliver(self, keys: set[str]) -> None:
+        """Hand invalidation keys to the interested subscribers."""
+        for subscriber in self._subscribers:
+            matching = {key for key in keys if key.startswith(subscriber.prefix)}
+            if matching:
+                try:
+                    subscriber.evict(matching)
+                except Exception:
+                    logger.exception("Cache eviction failed for %s", sorted(matching))
+
+    def flush(self) -> None:
+        """Drop the contents of every subscribed cache."""
+        for subscriber in self._subscribers:
+            subscriber.flush()
+
+    async def run(self) -> None:
+        """Listen until cancelled, reconnecting with exponential backoff."""
+        backoff = self.min_backoff_seconds
+        while True:
+            try:
+                await self._listen()
+            except (
+                OSError,
+                asyncpg.PostgresError,
+                asyncpg.InterfaceError,
+                TimeoutError,
+            ) as e:
+                logger.warning("Invalidation listener failed: %r", e)
+            if self.connected:
+                # Was up for a while: retry quickly
+                backoff = self.min_backoff_seconds
+            self.connected = False
+            await asyncio.sleep(backoff)
+            backoff = min(backoff * 2, self.max_backoff_seconds)
+
+    async def _listen(self) -> None:
+        """Listen on one connection until it is lost."""
+        connection = await self._connect(self.dsn)
+        lost = asyncio.Event()
+        connection.add_termination_listener(lambda _: lost.set())
+        try:
+            await connection.add_listener(
+                self.channel,
+                lambda _conn, _pid, _channel, payload: self.dispatch(payload),
+            )
+            # Changes made while we weren't listening went unnoticed
+            self.flush()
+            self.connected = True
+            logger.info("Listening for cache invalidations on %s", self.channel)
+            while not lost.is_set():
+                try:
+                    await asyncio.wait_for(lost.wait(), self.keepalive_seconds)
+                except TimeoutError:
+                    # A silently dropped connection only shows up when used
+                    await connection.execute("SELECT 1", timeout=self.keepalive_seconds)
+            logger.warning("Invalidation listener connection lost")
+        finally:
+            if not connection.is_closed():
+                connection.terminate()
+
+
+class InvalidatedCache:
+    """In-process cache whose entries are evicted by invalidation keys.
+
+    Lookups miss while the bus is disconnected, since evictions may be missed
+    then. ``set`` takes the ``token()`` read before computing the value and
+    drops it if anything was evicted meanwhile, so a value computed from data
+    older than an invalidation is never stored.
+    """
+
+    def __init__(self, name: str, bus: InvalidationBus | None):
+        self.name = name
+        self.bus = bus
+        self._entries: dict[str, Any] = {}
+        self._generation = 0
+
+    @property
+    def active(self) -> bool:
+        """Whether evictions are being received, so entries can be trusted."""
+        return self.bus is not None and self.bus.connected
+
+    def get(self, key: str) -> Any | None:
+        """Cached value of ``key``, None on a miss."""
+        value = self._entries.get(key) if self.active else None
+        record_cache(self.name, value is not None)
+        return value
+
+    def token(self) -> int:
+        """Take before computing a value to ``set``."""
+        return self._generation
+
+    def set(self, key: str, value: Any, token: int) -> None:
+        """Store ``value`` unless something was evicted since ``token``."""
+        if self.active and token == self._generation:
+            self._entries[key] = value
+
+    def evict(self, keys: Iterable[str]) -> None:
+        """Drop the entries of ``keys``."""
+        self._generation += 1
+        for key in keys:
+            self._entries.pop(key, None)
+
+    def clear(self) -> None:
+        """Drop every entry."""
+        self._generation += 1
+        self._entries.clear()
+
+
+@lru_cache
+def get_invalidation_bus() -> InvalidationBus | None:
+    """Process-wide invalidation bus, None when disabled."""
+    settings = get_settings()
+    if not settings.invalidation_enabled:
+        return None
+    return InvalidationBus(
+        str(settings.database_url),
+        keepalive_seconds=settings.invalidation_keepalive_seconds,
+    )
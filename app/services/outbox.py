@@ -0,0 +1,189 @@
+"""Transactional outbox and its relay.
+
+Services record events with ``add_event`` on the session that carries the change,
+so the event row commits (or rolls back) together with it and the request path
+pays for one extra INSERT only. The relay delivers them afterwards:
+
+1. claim a batch of pending rows with ``FOR UPDATE SKIP LOCKED`` (any number of
+   relays can run side by side without double-claiming),
+2. hand the batch to the event bus,
+3. mark it published, or record the failure and push ``next_attempt_at`` back
+   exponentially, in the same transaction that holds the row locks.
+
+Events that failed ``OUTBOX_MAX_ATTEMPTS`` times stay in the table, unpublished,
+for inspection.
+
+Run a standalone relay with:
+    python -m app.services.outbox
+"""
+
+import argparse
+import asyncio
+import logging
+from collections.abc import Sequence
+from typing import Any
+
+from sqlalchemy import func, literal_column, or_, select, update
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from app.config import get_settings
+from app.database import dispose_engine, get_sessionmaker
+from app.log import configure_logging
+from app.models.outbox import OutboxEvent
+from app.services.events import Event, EventBus, get_event_bus
+
+logger = logging.getLogger(__name__)
+
+MAX_BACKOFF_SECONDS = 300
+
+
+def add_event(db: AsyncSession, topic: str, payload: dict[str, Any]) -> OutboxEvent:
+    """Stage an event on the session; it commits with the caller's transaction."""
+    event = OutboxEvent(topic=topic, payload=payload)
+    db.add(event)
+    return event
+
+
+class OutboxRelay:
+    """Drains the outbox into an event bus in batches."""
+
+    def __init__(
+        self,
+        bus: EventBus,
+        sessionmaker: async_sessionmaker[AsyncSession],
+        batch_size: int = 500,
+        poll_interval: float = 0.5,
+        max_attempts: int = 10,
+    ):
+        self.bus = bus
+        self.sessionmaker = sessionmaker
+        self.batch_size = batch_size
+        self.poll_interval = poll_interval
+        self.max_attempts = max_attempts
+
+    async def relay_batch(self, db: AsyncSession) -> int:
+        """
+        Claim, deliver and settle one batch of pending events.
+
+        Returns:
+            Number of events delivered
+        """
+        result = await db.execute(
+            select(OutboxEvent)
+            .where(
+                OutboxEvent.published_at.is_(None),
+                OutboxEvent.attempts < self.max_attempts,
+                or_(
+                    OutboxEvent.next_attempt_at.is_(None),
+                    OutboxEvent.next_attempt_at <= func.now(),
+                ),
+            )
+            .order_by(OutboxEvent.id)
+            .limit(self.batch_size)
+            .with_for_update(skip_locked=True)
+        )
+        rows: Sequence[OutboxEvent] = result.scalars().all()
+        if not rows:
+            await db.rollback()
+            return 0
+
+        events = [
+            Event(
+                id=row.id,
+                topic=row.topic,
+                payload=row.payload,
+                created_at=row.created_at,
+            )
+            for row in rows
+        ]
+        failures = await self.bus.publish(events)
+
+        ids = [event.id for event in events]
+        if failures:
+            # At-least-once: the whole batch is retried, including for subscribers
+            # that already accepted it
+            error = "; ".join(f"{name}: {exc!r}" for name, exc in failures.items())
+            await db.execute(
+                update(OutboxEvent)
+                .where(OutboxEvent.id.in_(ids))
+                .values(
+                    attempts=OutboxEvent.attempts + 1,
+                    last_error=error[:2000],
+                    next_attempt_at=func.now()
+                    + literal_column("interval '1 second'")
+                    * func.least(
+                        func.power(2, OutboxEvent.attempts), MAX_BACKOFF_SECONDS
+                    ),
+                )
+            )
+            await db.commit()
+            return 0
+
+        await db.execute(
+            update(OutboxEvent)
+            .where(OutboxEvent.id.in_(ids))
+            .values(published_at=func.now())
+        )
+        await db.commit()
+        return len(rows)
+
+    async def drain(self) -> int:
+        """Relay full batches until the outbox runs dry or delivery fails."""
+        total = 0
+        while True:
+            async with self.sessionmaker() as db:
+                delivered = await self.relay_batch(db)
+            total += delivered
+            if delivered < self.batch_size:
+                return total
+
+    async def run(self) -> None:
+        """Relay forever, polling when idle and backing off while the database is down."""
+        delay = self.poll_interval
+        while True:
+            try:
+                await self.drain()
+                delay = self.poll_interval
+            except Exception:
+                logger.exception("Outbox relay failed, retrying in %.1fs", delay)
+                delay = min(delay * 2, 30.0)
+            await asyncio.sleep(delay)
+
+
+def get_outbox_relay() -> OutboxRelay:
+    """Build a relay from the settings."""
+    settings = get_settings()
+    return OutboxRelay(
+        get_event_bus(),
+        get_sessionmaker(),
+        batch_size=settings.outbox_batch_size,
+        poll_interval=settings.outbox_poll_interval_seconds,
+        max_attempts=settings.outbox_max_attempts,
+    )
+
+
+async def _relay(once: bool) -> None:
+    relay = get_outbox_relay()
+    try:
+        if once:
+            print(f"Relayed {await relay.drain()} event(s)")
+        else:
+            await relay.run()
+    finally:
+        await relay.bus.aclose()
+        await dispose_engine()
+
+
+def main() -> None:
+    """Command line entry point: run a standalone outbox relay."""
+    parser = argparse.ArgumentParser(description="Relay outbox events")
+    parser.add_argument(
+        "--once", action="store_true", help="Drain pending events and exit"
+    )
+    args = parser.parse_args()
+    configure_logging(get_settings())
+    asyncio.run(_relay(args.once))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,87 @@
+"""Vessel track geometry for route-aware WoW analysis.
+
+A route is a list of waypoints, each reached at an ETA (given, or derived from a
+transit speed over great-circle distances). The track is sampled on the
+canonical forecast grid: at every grid time from departure to arrival the vessel
+position is interpolated between the waypoints it is travelling between.
+"""
+
+import math
+from array import array
+from collections.abc import Sequence
+from itertools import pairwise
+
+from app.services.forecast_snapshot import TIMESTAMP_TYPECODE
+
+EARTH_RADIUS_NM = 3440.065
+
+
+def distance_nm(lat1: float, lon1: float, lat2: float, lon2: float) -> float:
+    """Great-circle (haversine) distance in nautical miles."""
+    phi1, phi2 = math.radians(lat1), math.radians(lat2)
+    dphi = phi2 - phi1
+    dlambda = math.radians(lon2 - lon1)
+    a = (
+        math.sin(dphi / 2) ** 2
+        + math.cos(phi1) * math.cos(phi2) * math.sin(dlambda / 2) ** 2
+    )
+    return 2 * EARTH_RADIUS_NM * math.asin(min(1.0, math.sqrt(a)))
+
+
+def route_distance_nm(waypoints: Sequence[tuple[float, float]]) -> float:
+    """Length of a route in nautical miles."""
+    return sum(distance_nm(*a, *b) for a, b in pairwise(waypoints))
+
+
+def waypoint_etas(
+    waypoints: Sequence[tuple[float, float]], departure: float, speed_knots: float
+) -> list[float]:
+    """ETAs (epoch seconds) of the waypoints at a constant speed from ``departure``."""
+    etas = [departure]
+    for a, b in pairwise(waypoints):
+        etas.append(etas[-1] + distance_nm(*a, *b) / speed_knots * 3600)
+    return etas
+
+
+def sample_track(
+    waypoints: Sequence[tuple[float, float]], etas: Sequence[float], step: int
+) -> tuple[array[int], array[float], array[float]]:
+    """
+    Positions along a route at the grid times covering the transit.
+
+    The first sample is the grid time at or before departure and the last the
+    grid time at or after arrival; the vessel waits at the first and last
+    waypoints outside the transit. Legs take the short way round, so longitudes
+    stay in [-180, 180] across the antimeridian.
+
+    Returns:
+        tuple: (timestamps, lats, lons)
+
+    Raises:
+        ValueError: Unless there is one ETA per waypoint
+    """
+    if not waypoints or len(etas) != len(waypoints):
+        raise ValueError(
+            f"A route needs one ETA per waypoint, got {len(etas)} ETA(s) "
+            f"for {len(waypoints)} waypoint(s)"
+        )
+    timestamps = array(TIMESTAMP_TYPECODE)
+    lats = array("d")
+    lons = array("d")
+    start = math.floor(etas[0] / step) * step
+    end = math.ceil(etas[-1] / step) * step
+    leg = 0
+    for time in range(start, end + 1, step):
+        # Advance to the leg the vessel is on at ``time``
+        while leg < len(etas) - 2 and etas[leg + 1] <= time:
+            leg += 1
+        following = min(leg + 1, len(waypoints) - 1)
+        (lat1, lon1), (lat2, lon2) = waypoints[leg], waypoints[following]
+        # The short way round, across the antimeridian if need be
+        dlon = math.remainder(lon2 - lon1, 360)
+        span = etas[following] - etas[leg]
+        fraction = min(max((time - etas[leg]) / span, 0.0), 1.0) if span > 0 else 0.0
+        timestamps.append(time)
+        lats.append(lat1 + (lat2 - lat1) * fraction)
+        lons.append(math.remainder(lon1 + dlon * fraction, 360))
+    return timestamps, lats, lons
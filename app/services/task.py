@@ -1,13 +1,44 @@
 """Task management service with dependency logic."""
 
+from functools import lru_cache
+
 from sqlalchemy import select
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from app.log import log_slow_calls
 from app.models.task import Task, TaskStatus
+from app.services.invalidation import (
+    InvalidatedCache,
+    add_invalidation,
+    get_invalidation_bus,
+)
+from app.services.outbox import add_event
 
 
 class TaskService:
-    """Service for managing tasks and their dependencies."""
+    """Service for managing tasks and their dependencies.
+
+    Every status transition stages a ``task.<status>`` outbox event and a
+    ``task:<id>`` cache invalidation on the same session, so both are committed
+    atomically with the change.
+    """
+
+    @staticmethod
+    def _transition(db: AsyncSession, task: Task, status: TaskStatus) -> None:
+        """Change a task's status and record the transition in the outbox."""
+        previous = task.status
+        task.status = status
+        add_invalidation(db, f"task:{task.id}")
+        add_event(
+            db,
+            f"task.{status.value.lower()}",
+            {
+                "task_id": task.id,
+                "name": task.name,
+                "from_status": TaskStatus(previous).value if previous else None,
+                "to_status": status.value,
+            },
+        )
 
     async def _check_task_should_be_blocked(self, task: Task, db: AsyncSession) -> bool:
         """Check if a task should be blocked based on its predecessor."""
@@ -30,6 +61,7 @@ class TaskService:
         is_blocked = await self._check_task_should_be_blocked(task, db)
         return not is_blocked and task.status == TaskStatus.READY
 
+    @log_slow_calls
     async def update_task_statuses(self, db: AsyncSession) -> None:
         """Update all task statuses based on dependencies."""
         # Get all tasks
@@ -45,12 +77,13 @@ class TaskService:
             should_be_blocked = await self._check_task_should_be_blocked(task, db)
 
             if should_be_blocked and task.status != TaskStatus.BLOCKED:
-                task.status = TaskStatus.BLOCKED
+                self._transition(db, task, TaskStatus.BLOCKED)
             elif not should_be_blocked and task.status == TaskStatus.BLOCKED:
-                task.status = TaskStatus.READY
+                self._transition(db, task, TaskStatus.READY)
 
         await db.commit()
 
+    @log_slow_calls
     async def complete_task(self, task_id: int, db: AsyncSession) -> Task:
         """Mark a task as completed and update dependent tasks."""
         # Get the task
@@ -66,7 +99,7 @@ class TaskService:
             )
 
         # Mark as completed
-        task.status = TaskStatus.COMPLETED
+        self._transition(db, task, TaskStatus.COMPLETED)
         await db.commit()
 
         # Update all task statuses to handle newly unblocked tasks
@@ -74,6 +107,7 @@ class TaskService:
 
         return task
 
+    @log_slow_calls
     async def start_task(self, task_id: int, db: AsyncSession) -> Task:
         """Mark a task as in progress if dependencies are met."""
         result = await db.execute(select(Task).where(Task.id == task_id))
@@ -90,11 +124,12 @@ class TaskService:
                 f"Task {task_id} cannot be started - dependencies not met or not in READY status"
             )
 
-        task.status = TaskStatus.IN_PROGRESS
+        self._transition(db, task, TaskStatus.IN_PROGRESS)
         await db.commit()
 
         return task
 
+    @log_slow_calls
     async def get_schedule_status(self, db: AsyncSession) -> dict:
         """Get overview of schedule status."""
         result = await db.execute(select(Task))
@@ -128,3 +163,13 @@ class TaskService:
 
 # Global task service instance
 task_service = TaskService()
+
+
+@lru_cache
+def get_schedule_cache() -> InvalidatedCache:
+    """Worker cache of the schedule status, dropped on any task change."""
+    bus = get_invalidation_bus()
+    cache = InvalidatedCache("schedule_status", bus)
+    if bus is not None:
+        bus.subscribe("task", lambda _keys: cache.clear(), cache.clear)
+    return cache
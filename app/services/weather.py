@@ -1,20 +1,478 @@
 """Simple weather service."""
 
-import json
+import asyncio
+import logging
+import math
+import os
+import threading
+from array import array
+from collections.abc import Callable, Sequence
 from datetime import UTC, datetime, timedelta
+from functools import lru_cache
+from pathlib import Path
+from typing import Any
 
-from app.schemas.weather import Location, WeatherDataPoint, WeatherForecast
+from app.config import get_settings
+from app.database import get_sessionmaker
+from app.metrics import FORECAST_LOAD_DURATION
+from app.schemas.weather import (
+    ColumnStats,
+    Location,
+    WeatherDataPoint,
+    WeatherForecast,
+    WeatherStats,
+)
+from app.services.forecast_binary import is_forecast_binary, open_forecast_binary
+from app.services.forecast_blend import Blender
+from app.services.forecast_parser import parse_forecast_file
+from app.services.forecast_resample import resample
+from app.services.forecast_snapshot import (
+    TIMESTAMP_TYPECODE,
+    VALUE_TYPECODE,
+    ForecastDelta,
+    ForecastSeries,
+    ForecastSnapshot,
+    apply_issue,
+    decode_value,
+    parse_timestamp,
+    series_from_points,
+    to_epoch,
+)
+from app.services.forecast_spatial import LocationIndex
+from app.services.forecast_stats import RangeIndex, SeriesStats
+from app.services.forecast_store import forecast_store
+
+logger = logging.getLogger(__name__)
 
 
 class WeatherService:
     """Simple weather service that loads JSON data.
     This won't look like this in a prod setup, here it's just reading from the json file.
+
+    Forecasts are kept as immutable snapshots versioned by issue time. A new issue
+    is merged as a delta and swapped in atomically; in-flight requests keep the
+    snapshot they started with. With further providers configured, their issues
+    are blended (see ``forecast_blend``) and the blend is ingested as the issue.
     """
 
-    def __init__(self):
-        """Load weather data from JSON file."""
-        with open("weather-forecast.json") as f:
-            self.data = json.load(f)
+    def __init__(
+        self,
+        path: str | Path,
+        source: str = "file",
+        *,
+        threshold_ladder: Sequence[float] = (),
+        step_seconds: int = 1800,
+        max_gap_seconds: int = 10800,
+        provider_paths: Sequence[str | Path] = (),
+        blender: Blender | None = None,
+    ):
+        """Configure the forecast file; it is loaded on first use or by ``warm_up``."""
+        self.path = path
+        self.source = source
+        # Further providers' files, blended with ``path`` by ``blender``
+        self.provider_paths = tuple(provider_paths)
+        self.blender = blender
+        # Wave height limits whose go/no-go masks are packed with the range indexes
+        self.threshold_ladder = tuple(threshold_ladder)
+        # Canonical grid the indexed series are resampled onto
+        self.step_seconds = step_seconds
+        self.max_gap_seconds = max_gap_seconds
+        self._snapshot: ForecastSnapshot | None = None
+        self._ingest_lock = threading.Lock()
+        # (mtime, size) of every file at the last complete read
+        self._loaded_state: tuple[tuple[int, int], ...] | None = None
+        self._listeners: list[Callable[[ForecastSnapshot, ForecastDelta], None]] = []
+        # Resampled and indexed series of the current version, keyed by location
+        self._stats: tuple[str | None, dict[tuple[float, float], SeriesStats]] = (
+            None,
+            {},
+        )
+        self._locations: tuple[str | None, LocationIndex[ForecastSeries] | None] = (
+            None,
+            None,
+        )
+
+    @property
+    def snapshot(self) -> ForecastSnapshot:
+        """The current forecast snapshot (grab once per request)."""
+        if self._snapshot is None:
+            self.reload_if_changed()
+        if self._snapshot is None:
+            raise RuntimeError("No forecast loaded")
+        return self._snapshot
+
+    def add_listener(
+        self, listener: Callable[[ForecastSnapshot, ForecastDelta], None]
+    ) -> None:
+        """
+        Call ``listener(snapshot, delta)`` after every swap to a new snapshot.
+
+        Listeners run on the thread that ingested the issue (possibly not the
+        event loop's), so they must be quick and thread-safe.
+        """
+        self._listeners.append(listener)
+
+    def remove_listener(
+        self, listener: Callable[[ForecastSnapshot, ForecastDelta], None]
+    ) -> None:
+        """Stop notifying ``listener``."""
+        self._listeners.remove(listener)
+
+    async def warm_up(self) -> None:
+        """Load the forecast off the event loop so the first request doesn't pay for it."""
+        await asyncio.to_thread(self.reload_if_changed)
+
+    def ingest(self, data: dict[str, Any]) -> ForecastDelta:
+        """
+        Ingest a forecast document and hot-swap it in if anything changed.
+
+        Args:
+            data: Forecast document (``issue_time``, ``location`` and ``forecast``)
+
+        Returns:
+            The delta between the current and the new issue
+        """
+        series = series_from_points(
+            data["location"]["lat"], data["location"]["lon"], data["forecast"]
+        )
+        issue_time = data.get("issue_time")
+        return self.ingest_series(
+            parse_timestamp(issue_time) if issue_time else None, [series]
+        )
+
+    def ingest_series(
+        self, issue_time: datetime | None, incoming: Sequence[ForecastSeries]
+    ) -> ForecastDelta:
+        """
+        Ingest parsed series of a forecast issue and hot-swap them in.
+
+        Args:
+            issue_time: Issue time, as stated by the forecast
+            incoming: One series per location in the issue
+
+        Returns:
+            The delta between the current and the new issue
+
+        Raises:
+            ValueError: When the issue has no issue time or no points, or is older
+                than the current one
+        """
+        if issue_time is None:
+            raise ValueError("Forecast issue has no issue_time")
+        if not any(len(s) for s in incoming):
+            raise ValueError("Forecast issue has no points")
+
+        with self._ingest_lock:
+            current = self._snapshot
+            if current is not None and issue_time < current.issue_time:
+                raise ValueError(
+                    f"Forecast issue {issue_time.isoformat()} is older than "
+                    f"the current issue {current.issue_time.isoformat()}"
+                )
+
+            snapshot, delta = apply_issue(current, issue_time, incoming)
+            swapped = current is None or snapshot.version != current.version
+            if swapped:
+                # Single reference assignment: readers see either version, never a mix
+                self._snapshot = snapshot
+
+        if swapped:
+            for listener in list(self._listeners):
+                listener(snapshot, delta)
+        return delta
+
+    @staticmethod
+    def _read_issue(
+        path: str | Path,
+    ) -> tuple[datetime | None, Sequence[ForecastSeries]]:
+        """Read the issue time and series of a forecast file."""
+        if is_forecast_binary(path):
+            # Columns stay in the shared page cache; nothing is copied per worker
+            with FORECAST_LOAD_DURATION.labels("binary").time():
+                return open_forecast_binary(path)
+        with FORECAST_LOAD_DURATION.labels("json").time():
+            parsed = parse_forecast_file(path)
+        return parsed.issue_time, parsed.series
+
+    @staticmethod
+    def _file_state(paths: Sequence[str | Path]) -> tuple[tuple[int, int], ...]:
+        """(mtime, size) of every file, to tell whether any changed."""
+        return tuple((stat.st_mtime_ns, stat.st_size) for stat in map(os.stat, paths))
+
+    def reload_if_changed(self) -> ForecastDelta | None:
+        """
+        Re-read the forecast files if any changed on disk since the last load.
+
+        A file that changes while it is read is still being written: the read is
+        dropped and retried on the next call. A complete read is not retried
+        until the files change again, even when its issue is rejected, so one
+        bad issue never blocks the ones written after it.
+
+        Raises:
+            ValueError: On a malformed, truncated, empty or outdated issue; the
+                current snapshot is kept
+        """
+        paths = [self.path, *self.provider_paths]
+        state = self._file_state(paths)
+        if state == self._loaded_state:
+            return None
+
+        try:
+            issues = [self._read_issue(path) for path in paths]
+        finally:
+            complete = self._file_state(paths) == state
+            if complete:
+                self._loaded_state = state
+        if not complete:
+            return None
+
+        if self.blender is None or len(issues) == 1:
+            issue_time, series = issues[0]
+        else:
+            # The blend is as recent as its most recent provider
+            issue_time = max(
+                (issue_time for issue_time, _ in issues if issue_time is not None),
+                default=None,
+            )
+            series = self.blender.blend([series for _, series in issues])
+        return self.ingest_series(issue_time, series)
+
+    async def watch(self, interval_seconds: float) -> None:
+        """Poll the forecast file and hot-swap new issues without blocking requests."""
+        while True:
+            await asyncio.sleep(interval_seconds)
+            try:
+                await asyncio.to_thread(self.reload_if_changed)
+            except (OSError, ValueError, KeyError) as e:
+                # Keep serving the current snapshot on a bad or partial file
+                logger.warning("Forecast issue not loaded: %s", e)
+
+    async def get_series(
+        self,
+        lat: float,
+        lon: float,
+        from_time: datetime | None = None,
+        to_time: datetime | None = None,
+        snapshot: ForecastSnapshot | None = None,
+    ) -> ForecastSeries | None:
+        """
+        Get the columns of the nearest location, limited to the time range.
+
+        Args:
+            snapshot: Snapshot to read from (defaults to the current one)
+
+        Returns:
+            The (possibly sliced) series, or None when there is no forecast data
+        """
+        if self.source == "database":
+            return await self._get_series_from_store(lat, lon, from_time, to_time)
+
+        series = (snapshot or self.snapshot).nearest(lat, lon)
+        if series is not None and from_time is not None and to_time is not None:
+            series = series.slice(
+                *series.index_range(to_epoch(from_time), to_epoch(to_time))
+            )
+        return series
+
+    def _index(self, series: ForecastSeries) -> SeriesStats:
+        """Resample a series onto the canonical grid and index it."""
+        return SeriesStats(
+            resample(series, self.step_seconds, self.max_gap_seconds),
+            self.threshold_ladder,
+        )
+
+    async def get_stats(
+        self, lat: float, lon: float, snapshot: ForecastSnapshot | None = None
+    ) -> SeriesStats | None:
+        """
+        Get the nearest location's series on the canonical grid, indexed.
+
+        The series is resampled to ``step_seconds`` (see ``forecast_resample``),
+        and its range indexes and the go/no-go masks of ``threshold_ladder`` are
+        built on first use and kept for the current forecast version.
+        Database-backed forecasts have no version and are indexed per call.
+
+        Args:
+            snapshot: Snapshot to read from (defaults to the current one)
+
+        Returns:
+            The indexed series, or None when there is no forecast data
+        """
+        if self.source == "database":
+            series = await self._get_series_from_store(lat, lon)
+            if series is None:
+                return None
+            return self._index(series)
+
+        snapshot = snapshot or self.snapshot
+        series = snapshot.nearest(lat, lon)
+        if series is None:
+            return None
+        return self._cached_stats(snapshot, series)
+
+    def _cached_stats(
+        self, snapshot: ForecastSnapshot, series: ForecastSeries
+    ) -> SeriesStats:
+        """The indexed series of a location of ``snapshot``, cached per version."""
+        version, cached = self._stats
+        if version != snapshot.version:
+            if snapshot is not self._snapshot:
+                # An older snapshot still held by a request: don't evict the current one
+                return self._index(series)
+            cached = {}
+            self._stats = (snapshot.version, cached)
+        key = (series.lat, series.lon)
+        stats = cached.get(key)
+        if stats is None:
+            stats = cached[key] = self._index(series)
+        return stats
+
+    async def group_by_location(
+        self,
+        points: Sequence[tuple[float, float]],
+        snapshot: ForecastSnapshot | None = None,
+    ) -> list[tuple[SeriesStats | None, list[int]]]:
+        """
+        Group points by their nearest forecast location, indexing each once.
+
+        Args:
+            points: (lat, lon) of each point
+            snapshot: Snapshot to read from (defaults to the current one)
+
+        Returns:
+            list: (stats, indices of ``points``) per forecast location, in order of
+            first appearance; stats is None for the points without forecast data
+        """
+        if self.source == "database":
+            # One query per distinct point, one index per forecast location
+            distinct: dict[tuple[float, float], ForecastSeries | None] = {}
+            for point in points:
+                if point not in distinct:
+                    distinct[point] = await self._get_series_from_store(*point)
+            nearest = [distinct[point] for point in points]
+            index = self._index
+        else:
+            current = snapshot or self.snapshot
+            locations = self._location_index(current)
+            nearest = [locations.nearest(lat, lon) for lat, lon in points]
+
+            def index(series: ForecastSeries) -> SeriesStats:
+                return self._cached_stats(current, series)
+
+        groups: dict[tuple[float, float] | None, list[int]] = {}
+        first: dict[tuple[float, float], ForecastSeries] = {}
+        for i, series in enumerate(nearest):
+            key = (series.lat, series.lon) if series is not None else None
+            if series is not None:
+                first.setdefault((series.lat, series.lon), series)
+            groups.setdefault(key, []).append(i)
+        return [
+            (index(first[key]) if key is not None else None, indices)
+            for key, indices in groups.items()
+        ]
+
+    def _location_index(
+        self, snapshot: ForecastSnapshot
+    ) -> LocationIndex[ForecastSeries]:
+        """Spatial index of the locations of ``snapshot``, cached per version."""
+        version, index = self._locations
+        if index is None or version != snapshot.version:
+            index = LocationIndex(snapshot.series)
+            if snapshot is self._snapshot:
+                self._locations = (snapshot.version, index)
+        return index
+
+    async def sample_track(
+        self,
+        timestamps: Sequence[int],
+        lats: Sequence[float],
+        lons: Sequence[float],
+        snapshot: ForecastSnapshot | None = None,
+    ) -> tuple[array[float], array[float]]:
+        """
+        Sample the forecast at every space-time point of a track in one pass.
+
+        Each point reads the nearest location (through the spatial index) at its
+        grid time (a direct offset into the resampled series), so the cost per
+        point does not grow with the number of locations.
+
+        Args:
+            timestamps: Epoch seconds on the ``step_seconds`` grid
+            snapshot: Snapshot to read from (defaults to the current one)
+
+        Returns:
+            tuple: (wave_height, wind_speed), NaN where the forecast has no data
+
+        Raises:
+            ValueError: For database-backed forecasts, which have no snapshot
+        """
+        if self.source == "database":
+            raise ValueError("Track sampling needs a file-backed forecast")
+
+        snapshot = snapshot or self.snapshot
+        locations = self._location_index(snapshot)
+        wave_height = array("d")
+        wind_speed = array("d")
+        for timestamp, lat, lon in zip(timestamps, lats, lons, strict=True):
+            series = locations.nearest(lat, lon)
+            stats = self._cached_stats(snapshot, series) if series is not None else None
+            grid = stats.series.timestamps if stats is not None else ()
+            i = (timestamp - grid[0]) // self.step_seconds if len(grid) else -1
+            if stats is not None and 0 <= i < len(grid) and grid[i] == timestamp:
+                wave_height.append(stats.wave_height.values[i])
+                wind_speed.append(stats.wind_speed.values[i])
+            else:
+                wave_height.append(math.nan)
+                wind_speed.append(math.nan)
+        return wave_height, wind_speed
+
+    async def get_range_stats(
+        self,
+        lat: float,
+        lon: float,
+        from_time: datetime | None = None,
+        to_time: datetime | None = None,
+        *,
+        wave_height_limit: float | None = None,
+        wind_speed_limit: float | None = None,
+        snapshot: ForecastSnapshot | None = None,
+    ) -> WeatherStats:
+        """Get max, mean and limit exceedances of the (resampled) forecast within a time range."""
+        stats = await self.get_stats(lat, lon, snapshot)
+        if stats is None:
+            return WeatherStats(
+                location=Location(lat=lat, lon=lon),
+                from_time=from_time,
+                to_time=to_time,
+                points=0,
+                missing_points=0,
+                wave_height=_column_stats(None, 0, 0, wave_height_limit),
+                wind_speed=_column_stats(None, 0, 0, wind_speed_limit),
+            )
+
+        series = stats.series
+        start, end = series.index_range(
+            to_epoch(from_time) if from_time is not None else None,
+            to_epoch(to_time) if to_time is not None else None,
+        )
+        present = stats.wave_height.count(start, end)
+        return WeatherStats.model_construct(
+            location=Location.model_construct(lat=series.lat, lon=series.lon),
+            from_time=(
+                datetime.fromtimestamp(series.timestamps[start], UTC)
+                if end > start
+                else None
+            ),
+            to_time=(
+                datetime.fromtimestamp(series.timestamps[end - 1], UTC)
+                if end > start
+                else None
+            ),
+            points=present,
+            missing_points=end - start - present,
+            wave_height=_column_stats(stats.wave_height, start, end, wave_height_limit),
+            wind_speed=_column_stats(stats.wind_speed, start, end, wind_speed_limit),
+        )
 
     async def get_forecast(
         self,
@@ -22,49 +480,161 @@ class WeatherService:
         lon: float,
         from_time: datetime | None = None,
         to_time: datetime | None = None,
+        snapshot: ForecastSnapshot | None = None,
     ) -> WeatherForecast:
         """Get weather forecast with optional time filtering."""
+        if self.source == "database":
+            return await self._get_forecast_from_store(lat, lon, from_time, to_time)
+
+        series = await self.get_series(lat, lon, from_time, to_time, snapshot)
+        if series is None:
+            return WeatherForecast(location=Location(lat=lat, lon=lon), forecast=[])
+
+        # Snapshot data is internal and already typed: skip per-point validation
+        forecast_points = [
+            WeatherDataPoint.model_construct(
+                timestamp=datetime.fromtimestamp(timestamp, UTC),
+                wind_speed=decode_value(wind_speed),
+                wave_height=decode_value(wave_height),
+                wave_period=decode_value(wave_period),
+            )
+            for timestamp, wave_height, wind_speed, wave_period in zip(
+                series.timestamps,
+                series.wave_height,
+                series.wind_speed,
+                series.wave_period,
+                strict=True,
+            )
+        ]
+
+        return WeatherForecast.model_construct(
+            location=Location.model_construct(lat=series.lat, lon=series.lon),
+            forecast=forecast_points,
+        )
+
+    async def _get_forecast_from_store(
+        self,
+        lat: float,
+        lon: float,
+        from_time: datetime | None = None,
+        to_time: datetime | None = None,
+    ) -> WeatherForecast:
+        """Get the latest stored forecast issue for the nearest location."""
+        async with get_sessionmaker()() as session:
+            location, rows = await forecast_store.get_latest(
+                session, lat, lon, from_time, to_time
+            )
+
+        if location is None:
+            return WeatherForecast(location=Location(lat=lat, lon=lon), forecast=[])
 
-        # Create location from JSON
-        location = Location(
-            lat=self.data["location"]["lat"], lon=self.data["location"]["lon"]
+        return WeatherForecast(
+            location=Location(lat=location[0], lon=location[1]),
+            forecast=[
+                WeatherDataPoint.model_construct(
+                    timestamp=row.forecast_time,
+                    wind_speed=row.wind_speed,
+                    wave_height=row.wave_height,
+                    wave_period=row.wave_period or 0.0,
+                )
+                for row in rows
+            ],
         )
 
-        # Convert all forecast points
-        forecast_points = []
-        for point in self.data["forecast"]:
-            # Parse the timestamp string to datetime
-            timestamp_str = point["timestamp"]
-            timestamp = datetime.fromisoformat(timestamp_str.replace("Z", "+00:00"))
-
-            # Apply time filtering if specified
-            if from_time is not None and to_time is not None:
-                # Ensure comparison datetimes are timezone-aware
-                if from_time.tzinfo is None:
-                    from_time = from_time.replace(tzinfo=UTC)
-                if to_time.tzinfo is None:
-                    to_time = to_time.replace(tzinfo=UTC)
-
-                # Skip if outside time range
-                if not (from_time <= timestamp <= to_time):
-                    continue
-
-            forecast_point = WeatherDataPoint(
-                timestamp=timestamp,
-                wind_speed=point["wind_speed"],
-                wave_height=point["wave_height"],
-                wave_period=point["wave_period"],
+    async def _get_series_from_store(
+        self,
+        lat: float,
+        lon: float,
+        from_time: datetime | None = None,
+        to_time: datetime | None = None,
+    ) -> ForecastSeries | None:
+        """Get the latest stored forecast issue for the nearest location as columns."""
+        async with get_sessionmaker()() as session:
+            location, rows = await forecast_store.get_latest(
+                session, lat, lon, from_time, to_time
             )
-            forecast_points.append(forecast_point)
 
-        return WeatherForecast(location=location, forecast=forecast_points)
+        if location is None:
+            return None
 
-    async def get_12_hour_forecast(self, lat: float, lon: float) -> WeatherForecast:
-        """Get 12-hour forecast from current time."""
-        now = datetime.now(UTC)
+        return ForecastSeries(
+            lat=location[0],
+            lon=location[1],
+            timestamps=array(
+                TIMESTAMP_TYPECODE, (int(row.forecast_time.timestamp()) for row in rows)
+            ),
+            wave_height=array(VALUE_TYPECODE, (row.wave_height for row in rows)),
+            wind_speed=array(VALUE_TYPECODE, (row.wind_speed for row in rows)),
+            wave_period=array(VALUE_TYPECODE, (row.wave_period or 0.0 for row in rows)),
+        )
+
+    async def get_12_hour_forecast(
+        self,
+        lat: float,
+        lon: float,
+        now: datetime | None = None,
+        snapshot: ForecastSnapshot | None = None,
+    ) -> WeatherForecast:
+        """Get 12-hour forecast from ``now`` (defaults to the current time)."""
+        now = now or datetime.now(UTC)
         end_time = now + timedelta(hours=12)
-        return await self.get_forecast(lat, lon, now, end_time)
+        return await self.get_forecast(lat, lon, now, end_time, snapshot)
 
 
-# Create global instance
-weather_service = WeatherService()
+def window_bucket(now: datetime, bucket_seconds: int) -> tuple[datetime, int]:
+    """
+    Start of the rolling-window bucket containing ``now``.
+
+    Args:
+        bucket_seconds: Bucket size (``FORECAST_WINDOW_BUCKET_SECONDS``)
+
+    Returns:
+        tuple: (bucket_start, seconds_until_bucket_end)
+    """
+    epoch = int(now.timestamp())
+    start = epoch - epoch % bucket_seconds
+    return datetime.fromtimestamp(start, UTC), start + bucket_seconds - epoch
+
+
+def _column_stats(
+    index: RangeIndex | None, start: int, end: int, limit: float | None
+) -> ColumnStats:
+    """Statistics of one indexed column over [start, end)."""
+    if index is None or index.count(start, end) <= 0:
+        return ColumnStats.model_construct(
+            max=None, mean=None, limit=limit, exceedances=None if limit is None else 0
+        )
+    return ColumnStats.model_construct(
+        max=index.max(start, end),
+        mean=round(index.mean(start, end), 3),
+        limit=limit,
+        exceedances=None if limit is None else index.exceedances(start, end, limit),
+    )
+
+
+@lru_cache
+def get_weather_service() -> WeatherService:
+    """Dependency providing the process-wide weather service."""
+    settings = get_settings()
+    step_seconds = settings.forecast_step_minutes * 60
+    max_gap_seconds = settings.forecast_max_gap_minutes * 60
+    providers = settings.weather_provider_files
+    blender = None
+    if providers:
+        blender = Blender(
+            settings.weather_provider_weights or [1.0] * (len(providers) + 1),
+            step_seconds=step_seconds,
+            max_gap_seconds=max_gap_seconds,
+            tolerance=settings.forecast_location_tolerance,
+            wave_height=settings.blend_wave_height,
+            budget_seconds=settings.blend_budget_seconds,
+        )
+    return WeatherService(
+        settings.weather_forecast_file,
+        source=settings.weather_source,
+        threshold_ladder=settings.wow_threshold_ladder,
+        step_seconds=step_seconds,
+        max_gap_seconds=max_gap_seconds,
+        provider_paths=providers,
+        blender=blender,
+    )
@@ -0,0 +1,409 @@
+"""Precomputed seasonal workability tables.
+
+Workability is the fraction of start times in a calendar month at which a task
+of a given duration has its window right away: every grid point of the next
+``duration`` within the wave height limit. Computing it from years of hindcast
+takes seconds per location, so ``build_tables`` does it offline for a ladder of
+limits and a ladder of durations at every hindcast location, and writes one
+compact binary file. The API maps the file and answers a lookup with a nearest
+location search and four table reads, interpolating bilinearly between ladder
+steps. A rebuilt file (renamed into place) is mapped again on the next lookup.
+
+Layout (little-endian)::
+
+    header          magic "ROOPWORK", format version u16, reserved u16,
+                    location count u32, limit count u16, duration count u16,
+                    grid step u32 (s), first and last hindcast point i64 (epoch s)
+    ladders         limits f64[limits], durations f64[durations] (hours)
+    location table  per location: lat f64, lon f64
+    cells           u16[locations][12 months][limits][durations], workability
+                    scaled to 0..SCALE, NO_DATA for a month without hindcast
+
+Build with:
+    python -m app.services.workability hindcast/ workability.bin
+"""
+
+import argparse
+import logging
+import math
+import mmap
+import os
+import struct
+import sys
+import threading
+from array import array
+from bisect import bisect_left
+from collections.abc import Sequence
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from datetime import UTC, datetime
+from functools import lru_cache
+from pathlib import Path
+from typing import Final
+
+from app.config import get_settings
+from app.services.forecast_resample import duration_points
+from app.services.forecast_snapshot import ForecastSeries, decode_value
+from app.services.forecast_spatial import LocationIndex
+from app.services.go_no_go import ThresholdMasks, pack_bits, window_starts
+from app.services.hindcast import load_hindcast_locations, month_spans
+
+logger = logging.getLogger(__name__)
+
+MAGIC = b"ROOPWORK"
+FORMAT_VERSION = 1
+
+HEADER = struct.Struct("<8sHHIHHIqq")
+LOCATION = struct.Struct("<dd")
+
+CELL_TYPECODE: Final = "H"
+SCALE = 65534
+NO_DATA = 65535
+
+DEFAULT_LIMITS = (1.0, 1.5, 2.0, 2.5, 3.0, 3.5, 4.0)
+DEFAULT_DURATIONS = (1.0, 2.0, 4.0, 6.0, 12.0, 24.0, 48.0, 72.0)
+
+
+@dataclass(frozen=True, slots=True)
+class Site:
+    """A location of the table."""
+
+    lat: float
+    lon: float
+    index: int
+
+
+def location_cells(
+    series: ForecastSeries,
+    limits: Sequence[float],
+    durations: Sequence[float],
+    step_seconds: int,
+) -> array[int]:
+    """
+    Workability of one location per month, limit and duration.
+
+    Args:
+        series: The location's hindcast, on the ``step_seconds`` grid
+
+    Returns:
+        ``12 * len(limits) * len(durations)`` cells, month-major
+    """
+    values = [decode_value(v) for v in series.wave_height]
+    present = pack_bits([not math.isnan(v) for v in values])
+    masks = ThresholdMasks(values)
+    # Bits of every month span, to count the starts it holds
+    spans = [
+        (month, begin, (1 << (end - begin)) - 1)
+        for _, month, begin, end in month_spans(series.timestamps)
+    ]
+    starts = [0] * 13
+    for month, begin, ones in spans:
+        starts[month] += (present >> begin & ones).bit_count()
+
+    cells = array(CELL_TYPECODE, [NO_DATA]) * (12 * len(limits) * len(durations))
+    for i, limit in enumerate(limits):
+        go = masks.go(limit)
+        for j, hours in enumerate(durations):
+            windows = window_starts(go, duration_points(hours, step_seconds))
+            workable = [0] * 13
+            for month, begin, ones in spans:
+                workable[month] += (windows >> begin & ones).bit_count()
+            for month in range(1, 13):
+                if starts[month]:
+                    cell = ((month - 1) * len(limits) + i) * len(durations) + j
+                    cells[cell] = round(workable[month] / starts[month] * SCALE)
+    return cells
+
+
+def _location_cells(
+    args: tuple[ForecastSeries, Sequence[float], Sequence[float], int],
+) -> array[int]:
+    """``location_cells`` for the process pool."""
+    return location_cells(*args)
+
+
+def build_tables(
+    path: str | Path,
+    series: Sequence[ForecastSeries],
+    limits: Sequence[float],
+    durations: Sequence[float],
+    step_seconds: int,
+    *,
+    workers: int | None = None,
+) -> None:
+    """
+    Compute the workability of every location and write the table file.
+
+    The file is written next to the target and renamed into place, so workers
+    that still map the previous table keep reading it untouched.
+
+    Args:
+        series: Hindcast of every location, on the ``step_seconds`` grid
+        limits: Wave height ladder (m), ascending
+        durations: Duration ladder (hours), ascending
+        workers: Worker processes (default: CPU count); 1 runs in process
+    """
+    if list(limits) != sorted(set(limits)) or list(durations) != sorted(set(durations)):
+        raise ValueError("Ladders must be strictly ascending")
+    series = [item for item in series if len(item)]
+    if not series:
+        raise ValueError("No hindcast data to build workability tables from")
+
+    jobs = [(item, limits, durations, step_seconds) for item in series]
+    if workers == 1:
+        tables = list(map(_location_cells, jobs))
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            tables = list(pool.map(_location_cells, jobs, chunksize=4))
+
+    header = HEADER.pack(
+        MAGIC,
+        FORMAT_VERSION,
+        0,
+        len(series),
+        len(limits),
+        len(durations),
+        step_seconds,
+        min(item.timestamps[0] for item in series),
+        max(item.timestamps[-1] for item in series),
+    )
+    ladders = array("d", [*limits, *durations])
+    locations = b"".join(LOCATION.pack(item.lat, item.lon) for item in series)
+    if sys.byteorder != "little":
+        ladders.byteswap()
+        for table in tables:
+            table.byteswap()
+
+    target = Path(path)
+    tmp = target.with_name(f".{target.name}.tmp")
+    with open(tmp, "wb") as f:
+        f.write(header)
+        ladders.tofile(f)
+        f.write(locations)
+        for table in tables:
+            table.tofile(f)
+    os.replace(tmp, target)
+
+
+def _bracket(
+    ladder: Sequence[float], value: float, name: str
+) -> tuple[int, int, float]:
+    """Ladder steps around ``value`` and its weight towards the upper one."""
+    if not ladder[0] <= value <= ladder[-1]:
+        raise ValueError(
+            f"{name} {value} is outside the workability table "
+            f"({ladder[0]} to {ladder[-1]})"
+        )
+    upper = bisect_left(ladder, value)
+    if ladder[upper] == value:
+        return upper, upper, 0.0
+    lower = upper - 1
+    return lower, upper, (value - ladder[lower]) / (ladder[upper] - ladder[lower])
+
+
+class WorkabilityTable:
+    """Memory-mapped workability table file."""
+
+    __slots__ = (
+        "_cells",
+        "_sites",
+        "durations",
+        "from_time",
+        "limits",
+        "step_seconds",
+        "to_time",
+        "tolerance",
+    )
+
+    def __init__(self, path: str | Path, tolerance: float | None = None):
+        """
+        Map a table file written by ``build_tables``.
+
+        Args:
+            tolerance: Max distance in degrees of the location serving a lookup
+                (default: any distance)
+        """
+        self.tolerance = tolerance
+        with open(path, "rb") as f:
+            mapping = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        view = memoryview(mapping)
+        (
+            magic,
+            version,
+            _,
+            locations,
+            limits,
+            durations,
+            self.step_seconds,
+            first,
+            last,
+        ) = HEADER.unpack_from(view, 0)
+        if magic != MAGIC:
+            raise ValueError(f"{path} is not a workability table file")
+        if version != FORMAT_VERSION:
+            raise ValueError(f"Unsupported workability table format version {version}")
+
+        offset = HEADER.size
+        ladders = struct.unpack_from(f"<{limits + durations}d", view, offset)
+        self.limits = ladders[:limits]
+        self.durations = ladders[limits:]
+        offset += 8 * (limits + durations)
+        sites = []
+        for i in range(locations):
+            lat, lon = LOCATION.unpack_from(view, offset + i * LOCATION.size)
+            sites.append(Site(lat, lon, i))
+        self._sites = LocationIndex(sites)
+        offset += locations * LOCATION.size
+        cells = view[offset : offset + locations * 12 * limits * durations * 2]
+        self._cells: Sequence[int]
+        if sys.byteorder == "little":
+            self._cells = cells.cast(CELL_TYPECODE)
+        else:
+            # Big-endian hosts cannot use the mapping directly: fall back to a copy
+            values = array(CELL_TYPECODE, cells.tobytes())
+            values.byteswap()
+            self._cells = values
+        self.from_time = datetime.fromtimestamp(first, UTC)
+        self.to_time = datetime.fromtimestamp(last, UTC)
+
+    def nearest(self, lat: float, lon: float) -> Site | None:
+        """The table location closest to (lat, lon), None if none is in range."""
+        site = self._sites.nearest(lat, lon)
+        if site is None or self.tolerance is None:
+            return site
+        if abs(site.lat - lat) > self.tolerance or abs(site.lon - lon) > self.tolerance:
+            return None
+        return site
+
+    def _cell(self, site: Site, month: int, limit: int, duration: int) -> float | None:
+        row = (site.index * 12 + month - 1) * len(self.limits) + limit
+        value = self._cells[row * len(self.durations) + duration]
+        return None if value == NO_DATA else value / SCALE
+
+    def workability(
+        self, site: Site, month: int, wave_height_limit: float, duration_hours: float
+    ) -> float | None:
+        """
+        Workability at a site in a month, interpolated between ladder steps.
+
+        Returns:
+            The fraction of workable starts, or None without hindcast for the month
+
+        Raises:
+            ValueError: When the limit or duration is outside the ladders
+        """
+        i, i2, u = _bracket(self.limits, wave_height_limit, "Wave height limit")
+        j, j2, v = _bracket(self.durations, duration_hours, "Duration")
+        corners = [
+            self._cell(site, month, i, j),
+            self._cell(site, month, i2, j),
+            self._cell(site, month, i, j2),
+            self._cell(site, month, i2, j2),
+        ]
+        a, b, c, d = corners
+        if a is None or b is None or c is None or d is None:
+            return None
+        return round((a * (1 - u) + b * u) * (1 - v) + (c * (1 - u) + d * u) * v, 4)
+
+
+class WorkabilityTableFile:
+    """A table file, mapped again whenever it is replaced or rewritten on disk."""
+
+    def __init__(self, path: str | Path, tolerance: float | None = None):
+        self.path = path
+        self.tolerance = tolerance
+        self._table: WorkabilityTable | None = None
+        self._state: tuple[int, int, int] | None = None
+        self._lock = threading.Lock()
+
+    def current(self) -> WorkabilityTable | None:
+        """
+        The table of the file as it is now.
+
+        A file that is missing or fails to map keeps the previous table in
+        service (None before the first good one).
+        """
+        try:
+            stat = os.stat(self.path)
+        except OSError as e:
+            logger.warning("Workability table unavailable: %s", e)
+            return self._table
+        state = (stat.st_ino, stat.st_mtime_ns, stat.st_size)
+        if state == self._state:
+            return self._table
+        with self._lock:
+            if state != self._state:
+                try:
+                    self._table = WorkabilityTable(self.path, self.tolerance)
+                except (OSError, ValueError, struct.error) as e:
+                    logger.warning("Workability table not loaded: %s", e)
+                # Not retried until the file changes again
+                self._state = state
+        return self._table
+
+
+@lru_cache
+def get_workability_file() -> WorkabilityTableFile | None:
+    """Process-wide workability table file, None when not configured."""
+    settings = get_settings()
+    path = settings.workability_table_file
+    if path is None:
+        return None
+    return WorkabilityTableFile(path, settings.workability_location_tolerance)
+
+
+def get_workability_table() -> WorkabilityTable | None:
+    """Dependency providing the current workability table, if configured."""
+    source = get_workability_file()
+    return source.current() if source is not None else None
+
+
+def main() -> None:
+    """Command line entry point: build workability tables from hindcast files."""
+    parser = argparse.ArgumentParser(
+        description="Precompute seasonal workability tables from a hindcast"
+    )
+    parser.add_argument("hindcast", nargs="+", help="Hindcast files or directories")
+    parser.add_argument("target", help="Workability table file to write")
+    parser.add_argument(
+        "--limits",
+        type=float,
+        nargs="+",
+        default=DEFAULT_LIMITS,
+        help="Wave height ladder (m)",
+    )
+    parser.add_argument(
+        "--durations",
+        type=float,
+        nargs="+",
+        default=DEFAULT_DURATIONS,
+        help="Duration ladder (hours)",
+    )
+    parser.add_argument("--step-minutes", type=int, default=30, help="Grid step")
+    parser.add_argument(
+        "--max-gap-minutes", type=int, default=180, help="Longest gap interpolated"
+    )
+    parser.add_argument("--workers", type=int, default=os.cpu_count())
+    args = parser.parse_args()
+
+    step_seconds = args.step_minutes * 60
+    series = load_hindcast_locations(
+        args.hindcast, step_seconds, args.max_gap_minutes * 60
+    )
+    build_tables(
+        args.target,
+        series,
+        sorted(args.limits),
+        sorted(args.durations),
+        step_seconds,
+        workers=args.workers,
+    )
+    print(
+        f"Wrote workability of {len(series)} location(s) x 12 months x "
+        f"{len(args.limits)} limits x {len(args.durations)} durations "
+        f"to {args.target} ({os.path.getsize(args.target)} bytes)"
+    )
+
+
+if __name__ == "__main__":
+    main()
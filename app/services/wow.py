@@ -1,9 +1,29 @@
 """Wait on Weather (WoW) analysis service."""
 
+import math
+from collections.abc import Sequence
+from dataclasses import dataclass
 from datetime import UTC, datetime, timedelta
+from functools import lru_cache
+from typing import Any
 
-from app.models.task import Task
-from app.services.weather import weather_service
+from app.log import log_slow_calls
+from app.metrics import WOW_ANALYSIS_DURATION
+from app.models.task import Task, TaskStatus
+from app.services.forecast_resample import duration_points
+from app.services.forecast_snapshot import ForecastSeries
+from app.services.forecast_stats import RangeIndex, SeriesStats
+from app.services.go_no_go import (
+    ThresholdMasks,
+    set_bits,
+    unpack_bits,
+    window_starts,
+)
+from app.services.route import route_distance_nm, sample_track
+from app.services.weather import WeatherService, get_weather_service
+
+# Upper bound on the grid points of a route analysis
+MAX_TRACK_POINTS = 20000
 
 
 def wow_analysis(
@@ -47,9 +67,80 @@ def wow_analysis(
     return go_no_go_signals, start_indices
 
 
+@dataclass(frozen=True, slots=True)
+class WoWEvaluation:
+    """Raw result of evaluating a task against the forecast of a location.
+
+    Signals and window starts are packed masks (see ``app.services.go_no_go``).
+    """
+
+    series: ForecastSeries | None
+    wave_heights: Sequence[float]
+    go_mask: int
+    start_mask: int
+    task_duration_points: int
+    # Range indexes of ``series``, for per-window statistics
+    stats: SeriesStats | None = None
+
+    @property
+    def go_no_go_signals(self) -> list[bool]:
+        """Whether conditions are met at each point."""
+        return unpack_bits(self.go_mask, len(self.wave_heights))
+
+    @property
+    def start_indices(self) -> list[int]:
+        """Indices where the task can start (beginning of valid windows)."""
+        return set_bits(self.start_mask)
+
+
 class WoWAnalysisService:
     """Service for performing Wait on Weather analysis."""
 
+    def __init__(self, weather_service: WeatherService):
+        self.weather_service = weather_service
+
+    def duration_points(self, task: Task) -> int:
+        """Task duration in points of the canonical grid forecasts are resampled to."""
+        return duration_points(task.duration_hours, self.weather_service.step_seconds)
+
+    @log_slow_calls
+    async def evaluate_task(self, task: Task, lat: float, lon: float) -> WoWEvaluation:
+        """
+        Run the WoW algorithm for a task on the nearest forecast location.
+
+        Args:
+            task: The task to evaluate
+            lat: Latitude for weather data
+            lon: Longitude for weather data
+
+        Returns:
+            WoWEvaluation with the forecast columns, signals and window starts
+        """
+        stats = await self.weather_service.get_stats(lat, lon)
+        return self._evaluate(task, stats)
+
+    def _evaluate(self, task: Task, stats: SeriesStats | None) -> WoWEvaluation:
+        """Run the WoW algorithm for a task on an indexed series."""
+        task_duration_points = self.duration_points(task)
+
+        if stats is None or not len(stats.series):
+            series = stats.series if stats is not None else None
+            return WoWEvaluation(series, [], 0, 0, task_duration_points, stats)
+
+        # Same result as ``wow_analysis``, from the masks packed with the forecast
+        with WOW_ANALYSIS_DURATION.time():
+            go_mask = stats.wave_height_go.go(task.wave_height_limit)
+            start_mask = window_starts(go_mask, task_duration_points)
+        return WoWEvaluation(
+            stats.series,
+            stats.wave_height.values,
+            go_mask,
+            start_mask,
+            task_duration_points,
+            stats,
+        )
+
+    @log_slow_calls
     async def analyze_task(
         self, task: Task, lat: float, lon: float, forecast_hours: int = 12
     ) -> dict:
@@ -65,13 +156,14 @@ class WoWAnalysisService:
         Returns:
             Dictionary with analysis results
         """
-        # Get weather forecast
-        weather_forecast = await weather_service.get_forecast(lat, lon)
-
-        # Extract wave height series from forecast
-        wave_heights = [point.wave_height for point in weather_forecast.forecast]
+        evaluation = await self.evaluate_task(task, lat, lon)
+        series = evaluation.series
+        wave_heights = evaluation.wave_heights
+        start_indices = evaluation.start_indices
+        task_duration_points = evaluation.task_duration_points
+        stats = evaluation.stats
 
-        if not wave_heights:
+        if series is None or stats is None or not wave_heights:
             return {
                 "task_id": task.id,
                 "task_name": task.name,
@@ -82,31 +174,17 @@ class WoWAnalysisService:
                 "operational_windows": [],
             }
 
-        # Calculate task duration in data points (assuming 30-minute intervals)
-        task_duration_points = max(1, int(task.duration_hours * 2))
-
-        # Perform WoW analysis
-        go_no_go_signals, start_indices = wow_analysis(
-            wave_heights, task_duration_points, task.wave_height_limit
-        )
-
         # Build operational windows
         operational_windows = []
         for start_idx in start_indices:
-            if start_idx < len(weather_forecast.forecast):
-                start_time = weather_forecast.forecast[start_idx].timestamp
+            if start_idx < len(series):
+                start_time = datetime.fromtimestamp(series.timestamps[start_idx], UTC)
                 end_time = start_time + timedelta(hours=task.duration_hours)
 
-                # Calculate window statistics
-                window_wave_heights = wave_heights[
-                    start_idx : start_idx + task_duration_points
-                ]
-                max_wave_height = max(window_wave_heights) if window_wave_heights else 0
-                avg_wave_height = (
-                    sum(window_wave_heights) / len(window_wave_heights)
-                    if window_wave_heights
-                    else 0
-                )
+                # Window statistics in O(1) from the precomputed indexes
+                end_idx = min(start_idx + task_duration_points, len(series))
+                max_wave_height = stats.wave_height.max(start_idx, end_idx)
+                avg_wave_height = stats.wave_height.mean(start_idx, end_idx)
 
                 operational_windows.append(
                     {
@@ -124,7 +202,9 @@ class WoWAnalysisService:
         can_proceed = len(start_indices) > 0
 
         if can_proceed:
-            earliest_start = weather_forecast.forecast[start_indices[0]].timestamp
+            earliest_start = datetime.fromtimestamp(
+                series.timestamps[start_indices[0]], UTC
+            )
             recommendation = f"GO - {len(start_indices)} suitable weather window(s) found. Earliest start: {earliest_start.isoformat()}"
         else:
             recommendation = f"NO-GO - No suitable weather windows found. Wave height limit: {task.wave_height_limit}m"
@@ -140,13 +220,184 @@ class WoWAnalysisService:
             "forecast_data_points": len(wave_heights),
             "suitable_windows_count": len(start_indices),
             "operational_windows": operational_windows,
-            "go_no_go_signals": go_no_go_signals,
+            "go_no_go_signals": evaluation.go_no_go_signals,
             "weather_location": {
-                "lat": weather_forecast.location.lat,
-                "lon": weather_forecast.location.lon,
+                "lat": series.lat,
+                "lon": series.lon,
+            },
+        }
+
+    @log_slow_calls
+    async def sweep(self, tasks: Sequence[Task]) -> dict[str, Any]:
+        """
+        Evaluate many tasks, grouped by the forecast location of their work site.
+
+        Each location's series is resolved and indexed once, however many tasks
+        share it; tasks without coordinates are reported but not evaluated.
+
+        Args:
+            tasks: Tasks to evaluate (typically all READY and IN_PROGRESS ones)
+
+        Returns:
+            Dictionary with a summary per task, grouped by forecast location
+        """
+        located = [task for task in tasks if task.has_location]
+        groups = await self.weather_service.group_by_location(
+            [(task.latitude, task.longitude) for task in located]  # type: ignore[misc]
+        )
+
+        cells = []
+        for stats, indices in groups:
+            summaries = []
+            for i in indices:
+                task = located[i]
+                evaluation = self._evaluate(task, stats)
+                starts = evaluation.start_indices
+                earliest = (
+                    datetime.fromtimestamp(
+                        evaluation.series.timestamps[starts[0]], UTC
+                    ).isoformat()
+                    if evaluation.series is not None and starts
+                    else None
+                )
+                summaries.append(
+                    {
+                        "task_id": task.id,
+                        "task_name": task.name,
+                        "status": TaskStatus(task.status).value,
+                        "site_id": task.site_id,
+                        "can_proceed": bool(starts),
+                        "suitable_windows_count": len(starts),
+                        "earliest_start": earliest,
+                    }
+                )
+            cells.append(
+                {
+                    "weather_location": (
+                        {"lat": stats.series.lat, "lon": stats.series.lon}
+                        if stats is not None
+                        else None
+                    ),
+                    "forecast_data_points": (
+                        len(stats.series) if stats is not None else 0
+                    ),
+                    "tasks": summaries,
+                }
+            )
+
+        return {
+            "analysis_time": datetime.now(UTC).isoformat(),
+            "tasks_analyzed": len(located),
+            "forecast_locations": sum(stats is not None for stats, _ in groups),
+            "unlocated_task_ids": [task.id for task in tasks if not task.has_location],
+            "locations": cells,
+        }
+
+    @log_slow_calls
+    async def analyze_route(
+        self,
+        task: Task,
+        waypoints: Sequence[tuple[float, float]],
+        etas: Sequence[float],
+    ) -> dict[str, Any]:
+        """
+        Perform WoW analysis for a task along a vessel transit.
+
+        The forecast is sampled where the vessel is at every grid time of the
+        transit, and the window analysis runs on that along-track series.
+
+        Args:
+            task: The task to analyze
+            waypoints: (lat, lon) of the route, in order of passage
+            etas: Epoch seconds at which each waypoint is reached
+
+        Returns:
+            Dictionary with analysis results
+
+        Raises:
+            ValueError: When the track is too long or can't be sampled
+        """
+        step = self.weather_service.step_seconds
+        if (etas[-1] - etas[0]) / step >= MAX_TRACK_POINTS:
+            raise ValueError(
+                f"Transit too long: at most {MAX_TRACK_POINTS} track points of {step}s"
+            )
+        timestamps, lats, lons = sample_track(waypoints, etas, step)
+        wave_heights, _ = await self.weather_service.sample_track(
+            timestamps, lats, lons
+        )
+        task_duration_points = self.duration_points(task)
+
+        with WOW_ANALYSIS_DURATION.time():
+            # NaN (no forecast there and then) is no-go
+            go_mask = ThresholdMasks(wave_heights).go(task.wave_height_limit)
+            start_mask = window_starts(go_mask, task_duration_points)
+        index = RangeIndex(wave_heights)
+        start_indices = set_bits(start_mask)
+
+        operational_windows = []
+        for start_idx in start_indices:
+            start_time = datetime.fromtimestamp(timestamps[start_idx], UTC)
+            end_idx = min(start_idx + task_duration_points, len(timestamps))
+            operational_windows.append(
+                {
+                    "start_index": start_idx,
+                    "start_time": start_time.isoformat(),
+                    "end_time": (
+                        start_time + timedelta(hours=task.duration_hours)
+                    ).isoformat(),
+                    "duration_hours": task.duration_hours,
+                    "start_position": {
+                        "lat": round(lats[start_idx], 5),
+                        "lon": round(lons[start_idx], 5),
+                    },
+                    "max_wave_height": index.max(start_idx, end_idx),
+                    "avg_wave_height": round(index.mean(start_idx, end_idx), 2),
+                    "is_suitable": True,
+                }
+            )
+
+        transit_clear = go_mask == (1 << len(timestamps)) - 1
+        if start_indices:
+            recommendation = (
+                f"GO - {len(start_indices)} suitable weather window(s) along the route. "
+                f"Earliest start: {operational_windows[0]['start_time']}"
+            )
+        else:
+            recommendation = (
+                "NO-GO - No suitable weather windows along the route. "
+                f"Wave height limit: {task.wave_height_limit}m"
+            )
+
+        return {
+            "task_id": task.id,
+            "task_name": task.name,
+            "task_duration_hours": task.duration_hours,
+            "wave_height_limit": task.wave_height_limit,
+            "can_proceed": bool(start_indices),
+            "transit_within_limit": transit_clear,
+            "recommendation": recommendation,
+            "analysis_time": datetime.now(UTC).isoformat(),
+            "departure_time": datetime.fromtimestamp(etas[0], UTC).isoformat(),
+            "arrival_time": datetime.fromtimestamp(etas[-1], UTC).isoformat(),
+            "distance_nm": round(route_distance_nm(waypoints), 1),
+            "track_points": len(timestamps),
+            "suitable_windows_count": len(start_indices),
+            "operational_windows": operational_windows,
+            "track": {
+                "timestamp": [
+                    datetime.fromtimestamp(t, UTC).isoformat() for t in timestamps
+                ],
+                "lat": [round(lat, 5) for lat in lats],
+                "lon": [round(lon, 5) for lon in lons],
+                # No forecast there and then: null
+                "wave_height": [None if math.isnan(v) else v for v in wave_heights],
+                "go_no_go": unpack_bits(go_mask, len(timestamps)),
             },
         }
 
 
-# Global WoW analysis service instance
-wow_service = WoWAnalysisService()
+@lru_cache
+def get_wow_service() -> WoWAnalysisService:
+    """Dependency providing the process-wide WoW analysis service."""
+    return WoWAnalysisService(get_weather_service())
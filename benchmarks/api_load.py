@@ -0,0 +1,126 @@
+"""HTTP API load scenario.
+
+Runs ``benchmarks.loadgen`` against every main endpoint of a running server in
+turn, and saves throughput and p50/p95/p99 latency per endpoint as a result
+file (compare runs with ``python -m benchmarks.results``).
+
+The server should use the same database as this script (e.g. a local Postgres
+seeded with ``--seed``), ideally with ``RATE_LIMIT_ENABLED=false`` so the
+numbers measure the service rather than the limiter. The task analysed by
+``/wow/analyze`` is the first READY or IN_PROGRESS task the API lists.
+
+Run with: python -m benchmarks.api_load http://localhost:8000 --seed 2000 --duration 10
+"""
+
+import argparse
+import asyncio
+from pathlib import Path
+from typing import Any
+
+import httpx
+
+from app.database import dispose_engine, get_sessionmaker
+from benchmarks.dataset import ORIGIN, clean_tasks, generate_dag, seed_tasks
+from benchmarks.loadgen import percentile, run_load
+from benchmarks.results import save_results
+
+# (name, method, path template)
+ENDPOINTS = [
+    ("health", "GET", "/health"),
+    ("tasks", "GET", "/tasks"),
+    ("task", "GET", "/tasks/{task_id}"),
+    ("schedule_status", "GET", "/schedule/status"),
+    ("weather", "GET", "/weather?lat={lat}&lon={lon}"),
+    ("weather_12h", "GET", "/weather/12h?lat={lat}&lon={lon}"),
+    ("wow_analyze", "POST", "/wow/analyze?task_id={task_id}&lat={lat}&lon={lon}"),
+]
+
+
+async def pick_task(client: httpx.AsyncClient) -> int:
+    """ID of a task ``/wow/analyze`` accepts."""
+    response = await client.get("/tasks")
+    response.raise_for_status()
+    for task in response.json()["tasks"]:
+        if task["status"] in ("READY", "IN_PROGRESS"):
+            return int(task["id"])
+    raise SystemExit("No READY or IN_PROGRESS task to analyse; use --seed")
+
+
+async def run(args: argparse.Namespace) -> dict[str, dict[str, Any]]:
+    """Seed if asked, then load each selected endpoint for ``--duration`` seconds."""
+    if args.seed:
+        sessionmaker = get_sessionmaker()
+        await clean_tasks(sessionmaker)
+        await seed_tasks(sessionmaker, generate_dag(args.seed))
+        await dispose_engine()
+
+    headers = {"X-API-Key": args.api_key} if args.api_key else None
+    async with httpx.AsyncClient(
+        base_url=args.base_url,
+        headers=headers,
+        timeout=30.0,
+        limits=httpx.Limits(max_connections=args.concurrency),
+    ) as client:
+        values = {"task_id": await pick_task(client), "lat": args.lat, "lon": args.lon}
+        cases = {}
+        for name, method, path in ENDPOINTS:
+            if args.only and name not in args.only:
+                continue
+            result = await run_load(
+                path.format(**values),
+                method,
+                concurrency=args.concurrency,
+                duration=args.duration,
+                rate=args.rate,
+                client=client,
+            )
+            cases[name] = {
+                "params": {
+                    "method": method,
+                    "path": path,
+                    "concurrency": args.concurrency,
+                    "rate": args.rate,
+                    "duration": args.duration,
+                },
+                "metrics": result.summary(),
+                "statuses": {str(k): v for k, v in result.statuses.items()},
+            }
+            ok = result.latencies.get("2xx", [])
+            print(
+                f"{name:<16} {result.total / result.elapsed:9,.0f} req/s  "
+                + "  ".join(
+                    f"p{q} {percentile(ok, q) * 1000:7.1f}ms" if ok else f"p{q}      -"
+                    for q in (50, 95, 99)
+                )
+                + f"  {dict(result.statuses)}"
+            )
+    return cases
+
+
+def main() -> None:
+    """Command line entry point."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("base_url", help="e.g. http://localhost:8000")
+    parser.add_argument("--only", nargs="+", choices=[name for name, _, _ in ENDPOINTS])
+    parser.add_argument("--concurrency", type=int, default=20)
+    parser.add_argument(
+        "--duration", type=float, default=10.0, help="Seconds per endpoint"
+    )
+    parser.add_argument(
+        "--rate", type=float, default=None, help="Open loop arrival rate (req/s)"
+    )
+    parser.add_argument(
+        "--seed", type=int, default=0, help="Reseed this many tasks first"
+    )
+    parser.add_argument("--lat", type=float, default=ORIGIN[0])
+    parser.add_argument("--lon", type=float, default=ORIGIN[1])
+    parser.add_argument("--api-key", default=None, help="Sent as X-API-Key")
+    parser.add_argument("--output", type=Path, default=None, help="Result file")
+    args = parser.parse_args()
+
+    cases = asyncio.run(run(args))
+    print(f"results written to {save_results('api', cases, args.output)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,246 @@
+"""Benchmark dataset generator.
+
+Seeds the database with task DAGs shaped like offshore campaigns and writes
+multi-location forecasts, both reproducible from a seed:
+
+- Tasks come in campaigns. Each is a main chain (mobilise, lift, install, ...)
+  with short side branches hanging off it. The first tasks of a campaign are
+  COMPLETED and the next one is IN_PROGRESS, so the statuses match a schedule
+  that is partly done.
+- Forecasts are a grid of locations starting at the sample file's location
+  (61.5N 4.8E), with 30-minute points. Wave height is a swell that changes
+  slowly, plus a tidal term and autocorrelated noise. Wind follows the waves.
+  This gives the runs of workable and unworkable weather that WoW analysis
+  cares about, rather than independent noise.
+
+Seeded tasks are named ``bench-...`` and are removed with ``--clean``.
+
+Run with: python -m benchmarks.dataset --tasks 2000 --forecast /tmp/forecast.json
+"""
+
+import argparse
+import asyncio
+import json
+import math
+import random
+from dataclasses import dataclass
+from datetime import UTC, datetime, timedelta
+from pathlib import Path
+from typing import Any
+
+from sqlalchemy import delete, func, insert, select, update
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from app.database import dispose_engine, get_sessionmaker
+from app.models.task import Task, TaskStatus
+
+TASK_PREFIX = "bench-"
+ORIGIN = (61.5, 4.8)
+GRID_STEP = 0.25
+FORECAST_START = datetime(2025, 8, 20, 12, tzinfo=UTC)
+# Share of campaign tasks that branch off the chain instead of extending it
+BRANCH_SHARE = 0.3
+
+_STEPS = ["mobilise", "survey", "lift", "install", "connect", "test", "demobilise"]
+
+
+@dataclass(frozen=True, slots=True)
+class TaskSpec:
+    """A task to seed; ``predecessor`` indexes an earlier spec."""
+
+    name: str
+    wave_height_limit: float
+    duration_hours: float
+    predecessor: int | None
+    status: TaskStatus
+
+
+def generate_dag(tasks: int, campaign_size: int = 25, seed: int = 42) -> list[TaskSpec]:
+    """Campaigns of ``campaign_size`` tasks: a chain with side branches."""
+    rng = random.Random(seed)
+    specs: list[TaskSpec] = []
+    while len(specs) < tasks:
+        campaign = len(specs) // campaign_size
+        size = min(campaign_size, tasks - len(specs))
+        first = len(specs)
+        chain: list[int] = []
+        done = rng.randint(0, size // 3)
+        for k in range(size):
+            index = first + k
+            if chain and rng.random() < BRANCH_SHARE:
+                # Side branch off a recent chain task
+                predecessor: int | None = rng.choice(chain[-3:])
+            else:
+                predecessor = chain[-1] if chain else None
+                chain.append(index)
+            if k < done:
+                status = TaskStatus.COMPLETED
+            elif k == done:
+                status = TaskStatus.IN_PROGRESS
+            else:
+                status = TaskStatus.READY
+            specs.append(
+                TaskSpec(
+                    name=f"{TASK_PREFIX}{campaign}-{k}-{_STEPS[k % len(_STEPS)]}",
+                    wave_height_limit=round(rng.uniform(1.0, 3.5), 1),
+                    duration_hours=float(rng.choice([1, 2, 3, 4, 6, 8, 12, 24])),
+                    predecessor=predecessor,
+                    status=status,
+                )
+            )
+    return specs
+
+
+async def seed_tasks(
+    sessionmaker: async_sessionmaker[AsyncSession], specs: list[TaskSpec]
+) -> list[int]:
+    """Insert ``specs`` and return their IDs in order."""
+    async with sessionmaker() as db:
+        # Insert first, then link predecessors once every ID is known
+        result = await db.execute(
+            insert(Task).returning(Task.id, sort_by_parameter_order=True),
+            [
+                {
+                    "name": spec.name,
+                    "wave_height_limit": spec.wave_height_limit,
+                    "duration_hours": spec.duration_hours,
+                    "status": spec.status.value,
+                    "created_at": datetime.utcnow(),
+                }
+                for spec in specs
+            ],
+        )
+        ids = list(result.scalars())
+        links = [
+            {"id": ids[i], "predecessor_id": ids[spec.predecessor]}
+            for i, spec in enumerate(specs)
+            if spec.predecessor is not None
+        ]
+        if links:
+            # ORM bulk UPDATE by primary key, one executemany
+            await db.execute(update(Task), links)
+        await db.commit()
+    return ids
+
+
+async def clean_tasks(sessionmaker: async_sessionmaker[AsyncSession]) -> int:
+    """Delete every seeded task, returning how many there were."""
+    async with sessionmaker() as db:
+        result = await db.execute(
+            delete(Task).where(Task.name.startswith(TASK_PREFIX)).returning(Task.id)
+        )
+        deleted = len(result.all())
+        await db.commit()
+    return deleted
+
+
+async def count_tasks(sessionmaker: async_sessionmaker[AsyncSession]) -> int:
+    """Number of tasks in the database, seeded or not."""
+    async with sessionmaker() as db:
+        return await db.scalar(select(func.count()).select_from(Task)) or 0
+
+
+def location_grid(locations: int) -> list[tuple[float, float]]:
+    """``locations`` points of a square grid starting at ``ORIGIN``."""
+    side = math.ceil(math.sqrt(locations))
+    return [
+        (
+            round(ORIGIN[0] + (i // side) * GRID_STEP, 4),
+            round(ORIGIN[1] + (i % side) * GRID_STEP, 4),
+        )
+        for i in range(locations)
+    ]
+
+
+def wave_series(points: int, rng: random.Random) -> list[float]:
+    """Wave heights at 30-minute spacing: swell, tide and AR(1) noise."""
+    swell = rng.uniform(0.8, 2.5)
+    noise = 0.0
+    heights = []
+    for i in range(points):
+        # Swell drifts over days, the tide has a 12.4 h period (24.8 points)
+        swell = min(4.5, max(0.3, swell + rng.gauss(0, 0.05)))
+        noise = 0.85 * noise + rng.gauss(0, 0.12)
+        tide = 0.25 * math.sin(2 * math.pi * i / 24.8)
+        heights.append(round(max(0.1, swell + tide + noise), 2))
+    return heights
+
+
+def forecast_document(locations: int, points: int, seed: int = 42) -> dict[str, Any]:
+    """Multi-location forecast in the ``{"issue_time", "locations"}`` shape."""
+    rng = random.Random(seed)
+    timestamps = [
+        (FORECAST_START + timedelta(minutes=30 * i)).strftime("%Y-%m-%dT%H:%M:%SZ")
+        for i in range(points)
+    ]
+    documents = []
+    for lat, lon in location_grid(locations):
+        heights = wave_series(points, rng)
+        documents.append(
+            {
+                "location": {"lat": lat, "lon": lon},
+                "forecast": [
+                    {
+                        "timestamp": timestamp,
+                        "wind_speed": round(
+                            max(0.0, 4.5 * height + rng.gauss(0, 1.5)), 1
+                        ),
+                        "wave_height": height,
+                        "wave_period": round(5.5 + 1.8 * height + rng.gauss(0, 0.5), 1),
+                    }
+                    for timestamp, height in zip(timestamps, heights, strict=True)
+                ],
+            }
+        )
+    issue_time = (FORECAST_START - timedelta(hours=6)).strftime("%Y-%m-%dT%H:%M:%SZ")
+    return {"issue_time": issue_time, "locations": documents}
+
+
+def write_forecast(path: Path, locations: int, points: int, seed: int = 42) -> None:
+    """Write a multi-location forecast file (see ``forecast_document``)."""
+    path.write_text(json.dumps(forecast_document(locations, points, seed)))
+
+
+async def run(args: argparse.Namespace) -> None:
+    """Seed and/or clean according to the command line."""
+    sessionmaker = get_sessionmaker()
+    try:
+        if args.clean:
+            print(f"deleted {await clean_tasks(sessionmaker):,} seeded tasks")
+        if args.tasks:
+            specs = generate_dag(args.tasks, args.campaign_size, args.seed)
+            ids = await seed_tasks(sessionmaker, specs)
+            print(f"seeded {len(ids):,} tasks (IDs {ids[0]}-{ids[-1]})")
+    finally:
+        await dispose_engine()
+
+
+def main() -> None:
+    """Command line entry point."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--tasks", type=int, default=0, help="Tasks to seed")
+    parser.add_argument("--campaign-size", type=int, default=25)
+    parser.add_argument(
+        "--clean", action="store_true", help="Delete seeded tasks first"
+    )
+    parser.add_argument(
+        "--forecast", type=Path, default=None, help="Forecast file to write"
+    )
+    parser.add_argument("--locations", type=int, default=50)
+    parser.add_argument(
+        "--points", type=int, default=336, help="Points per location (30 min)"
+    )
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    if args.forecast is not None:
+        write_forecast(args.forecast, args.locations, args.points, args.seed)
+        print(
+            f"wrote {args.locations} locations x {args.points} points to {args.forecast}"
+        )
+    if args.tasks or args.clean:
+        asyncio.run(run(args))
+
+
+if __name__ == "__main__":
+    main()
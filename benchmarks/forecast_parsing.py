@@ -0,0 +1,114 @@
+"""Forecast parsing throughput benchmark.
+
+Generates a synthetic multi-location forecast dump and compares the streaming
+columnar parser with ``json.load`` and with mapping the binary format, reporting
+points per second and peak memory.
+
+Run with: python -m benchmarks.forecast_parsing --locations 200 --points 2000
+"""
+
+import argparse
+import json
+import random
+import tempfile
+import time
+import tracemalloc
+from collections.abc import Callable
+from datetime import UTC, datetime, timedelta
+from pathlib import Path
+from typing import Any
+
+from app.services.forecast_binary import open_forecast_binary, write_forecast_binary
+from app.services.forecast_parser import parse_forecast_file
+
+
+def write_dump(path: Path, locations: int, points: int, seed: int = 42) -> None:
+    """Write a ``{"locations": [...]}`` dump with 30-minute spacing."""
+    rng = random.Random(seed)
+    start = datetime(2025, 8, 20, 12, tzinfo=UTC)
+    with open(path, "w") as f:
+        f.write('{"issue_time": "2025-08-20T06:00:00Z", "locations": [')
+        for loc in range(locations):
+            if loc:
+                f.write(",")
+            document = {
+                "location": {"lat": 55 + loc * 0.25 % 10, "lon": 2 + loc * 0.25 // 10},
+                "forecast": [
+                    {
+                        "timestamp": (start + timedelta(minutes=30 * i)).strftime(
+                            "%Y-%m-%dT%H:%M:%SZ"
+                        ),
+                        "wind_speed": round(rng.uniform(0, 25), 1),
+                        "wave_height": round(rng.uniform(0, 5), 1),
+                        "wave_period": round(rng.uniform(4, 14), 1),
+                    }
+                    for i in range(points)
+                ],
+            }
+            f.write(json.dumps(document))
+        f.write("]}")
+
+
+def measure(
+    label: str, func: Callable[[], object], total_points: int
+) -> dict[str, Any]:
+    """Time ``func``, then run it again under tracemalloc for its peak memory."""
+    started = time.perf_counter()
+    result = func()
+    elapsed = time.perf_counter() - started
+
+    tracemalloc.start()
+    func()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    print(
+        f"{label:<12} {elapsed:8.3f}s  {total_points / elapsed:12,.0f} points/s  "
+        f"peak {peak / 1e6:8.1f} MB"
+    )
+    return {"result": result, "seconds": elapsed, "peak_bytes": peak}
+
+
+def main() -> None:
+    """Run the parsing benchmark."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--locations", type=int, default=200)
+    parser.add_argument("--points", type=int, default=2000)
+    args = parser.parse_args()
+    total = args.locations * args.points
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = Path(tmp) / "dump.json"
+        write_dump(path, args.locations, args.points)
+        print(f"{total:,} points, {path.stat().st_size / 1e6:.1f} MB on disk")
+
+        def load_json() -> Any:
+            with open(path) as f:
+                return json.load(f)
+
+        measure("json.load", load_json, total)
+        streaming = measure("streaming", lambda: parse_forecast_file(path), total)
+
+        parsed = streaming["result"]
+        binary_path = Path(tmp) / "dump.bin"
+        write_forecast_binary(binary_path, parsed.issue_time, parsed.series)
+        print(f"binary file {binary_path.stat().st_size / 1e6:.1f} MB")
+        measure("mmap open", lambda: open_forecast_binary(binary_path), total)
+
+    array_bytes = sum(
+        column.itemsize * len(column)
+        for series in parsed.series
+        for column in (
+            series.timestamps,
+            series.wave_height,
+            series.wind_speed,
+            series.wave_period,
+        )
+    )
+    print(
+        f"final arrays {array_bytes / 1e6:.1f} MB, "
+        f"streaming peak / arrays = {streaming['peak_bytes'] / array_bytes:.2f}x"
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,201 @@
+"""HTTP load generator.
+
+Drives a running API and reports throughput, status codes and latency
+percentiles, e.g. to watch admission control shed load with 429/503.
+
+Closed loop (each worker sends its next request when the previous one returned):
+    python -m benchmarks.loadgen http://localhost:8000/tasks --concurrency 50
+
+Open loop (a fixed arrival rate, which keeps pushing when the server slows down):
+    python -m benchmarks.loadgen "http://localhost:8000/wow/analyze?task_id=1&lat=61.5&lon=4.8" \\
+        --method POST --rate 500 --duration 10
+"""
+
+import argparse
+import asyncio
+import time
+from collections import Counter
+from dataclasses import dataclass, field
+
+import httpx
+
+
+@dataclass
+class LoadResult:
+    """Outcome of a load run."""
+
+    elapsed: float = 0.0
+    statuses: Counter[int | str] = field(default_factory=Counter)
+    # Latency in seconds of every completed request, by status class ("2xx", ...)
+    latencies: dict[str, list[float]] = field(default_factory=dict)
+    retry_after: Counter[str] = field(default_factory=Counter)
+
+    def record(
+        self, status: int | str, latency: float, retry_after: str | None
+    ) -> None:
+        """Record one response (or a transport error as ``status``)."""
+        self.statuses[status] += 1
+        group = f"{status // 100}xx" if isinstance(status, int) else "error"
+        self.latencies.setdefault(group, []).append(latency)
+        if retry_after is not None:
+            self.retry_after[retry_after] += 1
+
+    @property
+    def total(self) -> int:
+        """Number of requests sent."""
+        return sum(self.statuses.values())
+
+    def summary(self) -> dict[str, float]:
+        """Throughput, error ratio and 2xx latency percentiles, for result files."""
+        metrics = {
+            "requests_per_s": self.total / self.elapsed if self.elapsed else 0.0,
+            "non_2xx_ratio": (
+                1 - len(self.latencies.get("2xx", [])) / max(self.total, 1)
+            ),
+        }
+        if ok := self.latencies.get("2xx"):
+            for q in (50, 95, 99):
+                metrics[f"p{q}_s"] = percentile(ok, q)
+        return metrics
+
+
+def percentile(samples: list[float], q: float) -> float:
+    """Nearest-rank percentile of ``samples`` (q in 0-100)."""
+    ordered = sorted(samples)
+    rank = max(0, min(len(ordered) - 1, round(q / 100 * len(ordered)) - 1))
+    return ordered[rank]
+
+
+async def _send(
+    client: httpx.AsyncClient, method: str, url: str, result: LoadResult
+) -> None:
+    started = time.perf_counter()
+    try:
+        response = await client.request(method, url)
+        status: int | str = response.status_code
+        retry_after = response.headers.get("retry-after")
+    except httpx.HTTPError as e:
+        status, retry_after = type(e).__name__, None
+    result.record(status, time.perf_counter() - started, retry_after)
+
+
+async def run_load(
+    url: str,
+    method: str = "GET",
+    *,
+    concurrency: int = 50,
+    duration: float = 10.0,
+    rate: float | None = None,
+    headers: dict[str, str] | None = None,
+    client: httpx.AsyncClient | None = None,
+) -> LoadResult:
+    """
+    Send requests for ``duration`` seconds.
+
+    Args:
+        url: Target URL
+        method: HTTP method
+        concurrency: Closed loop: number of workers; open loop: max requests in flight
+        duration: Seconds to keep sending
+        rate: Requests per second for an open loop, None for a closed loop
+        headers: Extra request headers (e.g. ``X-API-Key``)
+        client: HTTP client to use (e.g. bound to an in-process app)
+    """
+    result = LoadResult()
+    own_client = client is None
+    if client is None:
+        client = httpx.AsyncClient(
+            timeout=30.0,
+            limits=httpx.Limits(max_connections=concurrency),
+        )
+    if headers:
+        client.headers.update(headers)
+
+    started = time.perf_counter()
+    deadline = started + duration
+    try:
+        if rate is None:
+
+            async def worker() -> None:
+                while time.perf_counter() < deadline:
+                    await _send(client, method, url, result)
+
+            await asyncio.gather(*(worker() for _ in range(concurrency)))
+        else:
+            in_flight = asyncio.Semaphore(concurrency)
+            pending: set[asyncio.Task[None]] = set()
+
+            async def bounded() -> None:
+                try:
+                    await _send(client, method, url, result)
+                finally:
+                    in_flight.release()
+
+            sent = 0
+            while (now := time.perf_counter()) < deadline:
+                due = started + sent / rate
+                if due > now:
+                    await asyncio.sleep(due - now)
+                if in_flight.locked():
+                    # Client side saturation, counted rather than queued
+                    result.statuses["client-saturated"] += 1
+                else:
+                    await in_flight.acquire()
+                    task = asyncio.create_task(bounded())
+                    pending.add(task)
+                    task.add_done_callback(pending.discard)
+                sent += 1
+            await asyncio.gather(*pending)
+    finally:
+        result.elapsed = time.perf_counter() - started
+        if own_client:
+            await client.aclose()
+    return result
+
+
+def report(result: LoadResult) -> None:
+    """Print a summary of a load run."""
+    print(
+        f"{result.total:,} requests in {result.elapsed:.1f}s "
+        f"({result.total / result.elapsed:,.0f} req/s)"
+    )
+    for status, count in sorted(result.statuses.items(), key=lambda item: str(item[0])):
+        print(f"  {status}: {count:,} ({count / result.total:.1%})")
+    print(f"  {'latency':>8} {'p50':>9} {'p95':>9} {'p99':>9} {'max':>9}")
+    for group, samples in sorted(result.latencies.items()):
+        cells = [percentile(samples, q) * 1000 for q in (50, 95, 99, 100)]
+        print(f"  {group:>8} " + " ".join(f"{cell:>7.1f}ms" for cell in cells))
+    if result.retry_after:
+        values = ", ".join(f"{v}s x{n}" for v, n in sorted(result.retry_after.items()))
+        print(f"  Retry-After: {values}")
+
+
+def main() -> None:
+    """Command line entry point."""
+    parser = argparse.ArgumentParser(description="HTTP load generator")
+    parser.add_argument("url")
+    parser.add_argument("--method", default="GET")
+    parser.add_argument("--concurrency", type=int, default=50)
+    parser.add_argument("--duration", type=float, default=10.0)
+    parser.add_argument(
+        "--rate", type=float, default=None, help="Open loop arrival rate (req/s)"
+    )
+    parser.add_argument("--api-key", default=None, help="Sent as X-API-Key")
+    args = parser.parse_args()
+
+    headers = {"X-API-Key": args.api_key} if args.api_key else None
+    result = asyncio.run(
+        run_load(
+            args.url,
+            args.method,
+            concurrency=args.concurrency,
+            duration=args.duration,
+            rate=args.rate,
+            headers=headers,
+        )
+    )
+    report(result)
+
+
+if __name__ == "__main__":
+    main()
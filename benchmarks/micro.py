@@ -0,0 +1,254 @@
+"""Micro-benchmarks of the service functions.
+
+Parameter grids (``--quick`` runs the smaller corner of each):
+
+- ``wow``: ``wow_analysis`` and its packed-mask equivalent (masks built
+  beforehand, as per forecast version) by series length and task duration
+  (in points)
+- ``parse``: ``parse_forecast_file`` by locations and points per location
+- ``resample``: hourly series onto the 30-minute grid by points: the weights of
+  the time axis (``grid_weights``, once per axis) and ``resample`` of a series
+  on an axis seen before (once per location)
+- ``tasks``: ``TaskService.update_task_statuses`` by task count, against the
+  database. It seeds ``benchmarks.dataset`` DAGs, so tasks already in the table
+  are included in every pass (their number is recorded with the results).
+
+Inputs come from ``benchmarks.dataset``. Results are written as JSON for
+``python -m benchmarks.results`` to compare against a baseline.
+
+Run with: python -m benchmarks.micro --quick
+"""
+
+import argparse
+import asyncio
+import logging
+import statistics
+import tempfile
+import time
+import timeit
+from array import array
+from collections.abc import Awaitable, Callable
+from functools import partial
+from pathlib import Path
+from random import Random
+from typing import Any
+
+from app.config import get_settings
+from app.database import dispose_engine, get_sessionmaker
+from app.log import configure_logging
+from app.services.forecast_parser import parse_forecast_file
+from app.services.forecast_resample import grid_weights, resample
+from app.services.forecast_snapshot import (
+    TIMESTAMP_TYPECODE,
+    VALUE_TYPECODE,
+    ForecastSeries,
+)
+from app.services.go_no_go import ThresholdMasks, window_starts
+from app.services.task import TaskService
+from app.services.wow import wow_analysis
+from benchmarks.dataset import (
+    clean_tasks,
+    count_tasks,
+    generate_dag,
+    seed_tasks,
+    wave_series,
+    write_forecast,
+)
+from benchmarks.results import case_name, save_results
+
+WAVE_HEIGHT_LIMIT = 2.0
+# 2025-08-20T00:00:00Z, 30-minute grid and the default longest interpolated gap
+START_EPOCH = 1755648000
+STEP_SECONDS = 1800
+MAX_GAP_SECONDS = 3 * 3600
+
+GRIDS = {
+    "wow": {"n": [48, 336, 2000, 10000], "duration": [1, 12, 48]},
+    "parse": {"locations": [10, 100], "points": [336, 2000]},
+    "resample": {"points": [336, 2000, 10000]},
+    "tasks": {"tasks": [100, 1000, 5000]},
+}
+QUICK_GRIDS = {
+    "wow": {"n": [48, 336], "duration": [1, 12]},
+    "parse": {"locations": [10], "points": [336]},
+    "resample": {"points": [336]},
+    "tasks": {"tasks": [100]},
+}
+
+
+def summarize(samples: list[float], items: int, unit: str) -> dict[str, float]:
+    """Per-call timings of ``samples`` and the rate of ``unit`` per second."""
+    median = statistics.median(samples)
+    return {
+        "min_s": min(samples),
+        "median_s": median,
+        f"{unit}_per_s": items / median,
+    }
+
+
+def time_sync(func: Callable[[], object], repeat: int) -> list[float]:
+    """Seconds per call, over ``repeat`` rounds of enough calls to fill ~0.2 s."""
+    timer = timeit.Timer(func)
+    number, _ = timer.autorange()
+    return [total / number for total in timer.repeat(repeat, number)]
+
+
+async def time_async(func: Callable[[], Awaitable[object]], repeat: int) -> list[float]:
+    """Seconds per call of ``repeat`` calls."""
+    samples = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        await func()
+        samples.append(time.perf_counter() - started)
+    return samples
+
+
+def masked_window_starts(masks: ThresholdMasks, duration: int) -> int:
+    """``window_starts`` of the packed go mask at ``WAVE_HEIGHT_LIMIT``."""
+    return window_starts(masks.go(WAVE_HEIGHT_LIMIT), duration)
+
+
+def bench_wow(
+    grid: dict[str, list[int]], repeat: int, cases: dict[str, dict[str, Any]]
+) -> None:
+    """``wow_analysis`` and packed masks over realistic wave series."""
+    for n in grid["n"]:
+        series = wave_series(n, Random(n))
+        masks = ThresholdMasks(series, ladder=[WAVE_HEIGHT_LIMIT])
+        for duration in grid["duration"]:
+            params = {"n": n, "duration": duration}
+            samples = time_sync(
+                partial(wow_analysis, series, duration, WAVE_HEIGHT_LIMIT), repeat
+            )
+            cases[case_name("wow_analysis", **params)] = {
+                "params": params,
+                "metrics": summarize(samples, n, "points"),
+            }
+            samples = time_sync(partial(masked_window_starts, masks, duration), repeat)
+            cases[case_name("wow_masks", **params)] = {
+                "params": params,
+                "metrics": summarize(samples, n, "points"),
+            }
+
+
+def bench_parse(
+    grid: dict[str, list[int]], repeat: int, cases: dict[str, dict[str, Any]]
+) -> None:
+    """``parse_forecast_file`` on generated multi-location forecasts."""
+    with tempfile.TemporaryDirectory() as tmp:
+        for locations in grid["locations"]:
+            for points in grid["points"]:
+                path = Path(tmp) / f"{locations}x{points}.json"
+                write_forecast(path, locations, points)
+                samples = time_sync(partial(parse_forecast_file, path), repeat)
+                params = {"locations": locations, "points": points}
+                cases[case_name("parse_forecast_file", **params)] = {
+                    "params": params,
+                    "metrics": summarize(samples, locations * points, "points"),
+                }
+
+
+def bench_resample(
+    grid: dict[str, list[int]], repeat: int, cases: dict[str, dict[str, Any]]
+) -> None:
+    """``grid_weights`` and ``resample`` of hourly series onto the 30-minute grid."""
+    for points in grid["points"]:
+        heights = array(VALUE_TYPECODE, wave_series(points, Random(points)))
+        series = ForecastSeries(
+            lat=61.5,
+            lon=4.8,
+            timestamps=array(
+                TIMESTAMP_TYPECODE,
+                range(START_EPOCH, START_EPOCH + points * 3600, 3600),
+            ),
+            wave_height=heights,
+            wind_speed=heights,
+            wave_period=heights,
+        )
+        params = {"points": points}
+        for name, func in (
+            ("grid_weights", partial(grid_weights, series.timestamps)),
+            ("resample", partial(resample, series)),
+        ):
+            samples = time_sync(partial(func, STEP_SECONDS, MAX_GAP_SECONDS), repeat)
+            cases[case_name(name, **params)] = {
+                "params": params,
+                "metrics": summarize(samples, points, "points"),
+            }
+
+
+async def bench_tasks(
+    grid: dict[str, list[int]], repeat: int, cases: dict[str, dict[str, Any]]
+) -> None:
+    """``update_task_statuses`` on seeded DAGs (the first pass does the transitions)."""
+    sessionmaker = get_sessionmaker()
+    service = TaskService()
+
+    async def update() -> None:
+        async with sessionmaker() as db:
+            await service.update_task_statuses(db)
+
+    await clean_tasks(sessionmaker)
+    try:
+        for tasks in grid["tasks"]:
+            await seed_tasks(sessionmaker, generate_dag(tasks))
+            in_table = await count_tasks(sessionmaker)
+            (first,) = await time_async(update, 1)
+            samples = await time_async(update, repeat)
+            params = {"tasks": tasks}
+            cases[case_name("update_task_statuses", **params)] = {
+                "params": {**params, "tasks_in_table": in_table},
+                "metrics": {
+                    "first_s": first,
+                    **summarize(samples, in_table, "tasks"),
+                },
+            }
+            await clean_tasks(sessionmaker)
+    finally:
+        await clean_tasks(sessionmaker)
+        await dispose_engine()
+
+
+def report(cases: dict[str, dict[str, Any]]) -> None:
+    """Print one line per case."""
+    for name, entry in cases.items():
+        metrics = entry["metrics"]
+        rate = next(key for key in metrics if key.endswith("_per_s"))
+        print(
+            f"{name:<48} median {metrics['median_s'] * 1000:10.3f}ms  "
+            f"{metrics[rate]:14,.0f} {rate.removesuffix('_per_s')}/s"
+        )
+
+
+def main() -> None:
+    """Run the selected benchmarks and save the results."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument(
+        "--only", nargs="+", choices=sorted(GRIDS), default=sorted(GRIDS)
+    )
+    parser.add_argument("--quick", action="store_true", help="Small parameter grids")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--output", type=Path, default=None, help="Result file")
+    args = parser.parse_args()
+
+    configure_logging(get_settings())
+    # Every large case is slower than SLOW_CALL_MS; that's expected here
+    logging.getLogger("app.slow").setLevel(logging.ERROR)
+
+    grids = QUICK_GRIDS if args.quick else GRIDS
+    cases: dict[str, dict[str, Any]] = {}
+    if "wow" in args.only:
+        bench_wow(grids["wow"], args.repeat, cases)
+    if "parse" in args.only:
+        bench_parse(grids["parse"], args.repeat, cases)
+    if "resample" in args.only:
+        bench_resample(grids["resample"], args.repeat, cases)
+    if "tasks" in args.only:
+        asyncio.run(bench_tasks(grids["tasks"], args.repeat, cases))
+
+    report(cases)
+    print(f"results written to {save_results('micro', cases, args.output)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,89 @@
+"""Outbox publish and relay throughput benchmark (needs the database).
+
+Phase 1 writes events the way services do: staged on a session with
+``add_event`` and committed in transactions of ``--per-transaction`` events.
+Phase 2 drains them with the relay into an event bus whose webhook subscriber
+posts to the in-process stub from ``benchmarks.webhook_stub``.
+
+Run with: python -m benchmarks.outbox --events 20000
+"""
+
+import argparse
+import asyncio
+import time
+
+import httpx
+from sqlalchemy import delete
+
+from app.config import get_settings
+from app.database import dispose_engine, get_sessionmaker
+from app.models.outbox import OutboxEvent
+from app.services.events import EventBus, WebhookSubscriber
+from app.services.outbox import OutboxRelay, add_event
+from benchmarks.webhook_stub import create_stub_app
+
+TOPIC = "benchmark.event"
+
+
+async def run(events: int, per_transaction: int, batch_size: int) -> None:
+    """Publish then relay ``events`` events and report the rates."""
+    sessionmaker = get_sessionmaker()
+
+    started = time.perf_counter()
+    for first in range(0, events, per_transaction):
+        async with sessionmaker() as db:
+            for i in range(first, min(first + per_transaction, events)):
+                add_event(db, TOPIC, {"sequence": i})
+            await db.commit()
+    published = time.perf_counter() - started
+
+    stub = create_stub_app()
+    client = httpx.AsyncClient(
+        transport=httpx.ASGITransport(app=stub), base_url="http://stub"
+    )
+    bus = EventBus()
+    bus.subscribe(
+        "webhook", TOPIC, WebhookSubscriber("http://stub/events", client=client)
+    )
+    relay = OutboxRelay(bus, sessionmaker, batch_size=batch_size)
+
+    started = time.perf_counter()
+    relayed = await relay.drain()
+    drained = time.perf_counter() - started
+
+    async with sessionmaker() as db:
+        await db.execute(delete(OutboxEvent).where(OutboxEvent.topic == TOPIC))
+        await db.commit()
+    await client.aclose()
+
+    print(
+        f"published {events:,} events in {published:.2f}s ({events / published:,.0f}/s)"
+    )
+    print(
+        f"relayed   {relayed:,} events in {drained:.2f}s ({relayed / drained:,.0f}/s), "
+        f"{stub.state.batches} webhook batches, "
+        f"{len(stub.state.event_ids):,} unique events received"
+    )
+
+
+def main() -> None:
+    """Run the outbox benchmark."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--events", type=int, default=20000)
+    parser.add_argument("--per-transaction", type=int, default=100)
+    parser.add_argument(
+        "--batch-size", type=int, default=get_settings().outbox_batch_size
+    )
+    args = parser.parse_args()
+
+    async def _main() -> None:
+        try:
+            await run(args.events, args.per_transaction, args.batch_size)
+        finally:
+            await dispose_engine()
+
+    asyncio.run(_main())
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,161 @@
+"""Benchmark result files and regression checks.
+
+A result file is JSON with the run's environment and one entry per case::
+
+    {"suite": "micro", "created_at": ..., "git_commit": ..., "python": ...,
+     "cases": {"wow_analysis[n=336,duration=12]": {"params": {...},
+                                                    "metrics": {"median_s": ...}}}}
+
+Metrics ending in ``_per_s`` (throughput) are better when higher, every other
+metric (seconds, latencies) when lower. Comparing two files flags the metrics
+that got worse by more than a threshold.
+
+Compare with: python -m benchmarks.results baseline.json current.json --threshold 0.1
+"""
+
+import argparse
+import json
+import platform
+import subprocess
+import sys
+from dataclasses import dataclass
+from datetime import UTC, datetime
+from pathlib import Path
+from typing import Any
+
+RESULTS_DIR = Path(__file__).parent / "results"
+
+
+def case_name(name: str, **params: object) -> str:
+    """Key of a parameterised case, e.g. ``wow_analysis[n=336,duration=12]``."""
+    return f"{name}[{','.join(f'{k}={v}' for k, v in params.items())}]"
+
+
+def _git_commit() -> str | None:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            capture_output=True,
+            text=True,
+            check=True,
+            cwd=Path(__file__).parent,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def save_results(
+    suite: str, cases: dict[str, dict[str, Any]], path: Path | None = None
+) -> Path:
+    """
+    Write a result file.
+
+    Args:
+        suite: Benchmark suite name
+        cases: ``{case name: {"params": {...}, "metrics": {...}}}``
+        path: Output file, by default ``benchmarks/results/<suite>-<timestamp>.json``
+
+    Returns:
+        Path: The written file
+    """
+    created_at = datetime.now(UTC)
+    if path is None:
+        path = RESULTS_DIR / f"{suite}-{created_at:%Y%m%dT%H%M%S}.json"
+    path.parent.mkdir(parents=True, exist_ok=True)
+    document = {
+        "suite": suite,
+        "created_at": created_at.isoformat(),
+        "git_commit": _git_commit(),
+        "python": platform.python_version(),
+        "machine": platform.machine(),
+        "cases": cases,
+    }
+    path.write_text(json.dumps(document, indent=2) + "\n")
+    return path
+
+
+def load_results(path: Path) -> dict[str, Any]:
+    """Read a result file."""
+    document: dict[str, Any] = json.loads(path.read_text())
+    return document
+
+
+@dataclass(frozen=True, slots=True)
+class Change:
+    """Relative change of one metric between two runs."""
+
+    case: str
+    metric: str
+    baseline: float
+    current: float
+
+    @property
+    def higher_is_better(self) -> bool:
+        return self.metric.endswith("_per_s")
+
+    @property
+    def ratio(self) -> float:
+        """How much worse (positive) or better (negative) the current run is."""
+        if self.baseline == 0:
+            return 0.0
+        change = (self.current - self.baseline) / self.baseline
+        return -change if self.higher_is_better else change
+
+
+def compare(baseline: dict[str, Any], current: dict[str, Any]) -> list[Change]:
+    """Changes of every metric present in both result documents."""
+    changes = []
+    for case, entry in current["cases"].items():
+        previous = baseline["cases"].get(case)
+        if previous is None:
+            continue
+        for metric, value in entry["metrics"].items():
+            if metric in previous["metrics"]:
+                changes.append(Change(case, metric, previous["metrics"][metric], value))
+    return changes
+
+
+def regressions(changes: list[Change], threshold: float) -> list[Change]:
+    """Changes worse than ``threshold`` (0.1 = 10%)."""
+    return [change for change in changes if change.ratio > threshold]
+
+
+def main() -> None:
+    """Compare two result files; exits with status 1 on regressions."""
+    parser = argparse.ArgumentParser(description="Compare benchmark result files")
+    parser.add_argument("baseline", type=Path)
+    parser.add_argument("current", type=Path)
+    parser.add_argument(
+        "--threshold",
+        type=float,
+        default=0.1,
+        help="Flag metrics worse by more than this",
+    )
+    args = parser.parse_args()
+
+    baseline, current = load_results(args.baseline), load_results(args.current)
+    print(
+        f"baseline {baseline.get('git_commit')} ({baseline['created_at']}) vs "
+        f"current {current.get('git_commit')} ({current['created_at']})"
+    )
+    changes = compare(baseline, current)
+    flagged = regressions(changes, args.threshold)
+    for change in changes:
+        marker = "REGRESSION" if change in flagged else ""
+        delta = (
+            (change.current - change.baseline) / change.baseline
+            if change.baseline
+            else 0.0
+        )
+        print(
+            f"  {change.case} {change.metric}: {change.baseline:.6g} -> "
+            f"{change.current:.6g} ({delta:+.1%}) {marker}".rstrip()
+        )
+    print(
+        f"{len(flagged)} regression(s) over {args.threshold:.0%} in {len(changes)} metrics"
+    )
+    sys.exit(1 if flagged else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,157 @@
+"""Response serialization benchmark.
+
+Compares, per endpoint payload, FastAPI's default path (``jsonable_encoder`` +
+``JSONResponse``) with the fast path used by the routes (``model_dump_json`` for
+models, ``FastJSONResponse`` for plain dicts), on a synthetic long forecast.
+It then compares fetching and rendering the JSON and the columnar
+representations end to end, with their body sizes.
+
+Run with: python -m benchmarks.serialization --points 2000
+"""
+
+import argparse
+import asyncio
+import json
+import tempfile
+import time
+from collections.abc import Callable
+from datetime import UTC, datetime, timedelta
+from pathlib import Path
+
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse, Response
+
+from app.api.columnar import columnar_response, forecast_columns, wow_columns
+from app.api.responses import FastJSONResponse, model_response
+from app.models.task import Task, TaskStatus
+from app.schemas.task import TaskListResponse, TaskResponse
+from app.services.weather import WeatherService
+from app.services.wow import WoWAnalysisService
+
+
+def write_forecast(path: Path, points: int) -> None:
+    """Write a single-location forecast with 30-minute spacing."""
+    start = datetime(2025, 8, 20, 12, tzinfo=UTC)
+    document = {
+        "location": {"lat": 61.5, "lon": 4.8},
+        "forecast": [
+            {
+                "timestamp": (start + timedelta(minutes=30 * i)).strftime(
+                    "%Y-%m-%dT%H:%M:%SZ"
+                ),
+                "wind_speed": 10.0 + i % 7,
+                "wave_height": 1.0 + (i % 11) / 5,
+                "wave_period": 8.0,
+            }
+            for i in range(points)
+        ],
+    }
+    path.write_text(json.dumps(document))
+
+
+def throughput(func: Callable[[], object], seconds: float = 1.0) -> float:
+    """Calls per second of ``func`` over roughly ``seconds``."""
+    calls = 0
+    started = time.perf_counter()
+    while (elapsed := time.perf_counter() - started) < seconds:
+        func()
+        calls += 1
+    return calls / elapsed
+
+
+def main() -> None:
+    """Run the serialization benchmark."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--points", type=int, default=2000)
+    parser.add_argument("--tasks", type=int, default=1000)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = Path(tmp) / "forecast.json"
+        write_forecast(path, args.points)
+        weather_service = WeatherService(path)
+        weather_service.reload_if_changed()
+
+    wow_service = WoWAnalysisService(weather_service)
+    loop = asyncio.new_event_loop()
+    run = loop.run_until_complete
+    forecast = run(weather_service.get_forecast(61.5, 4.8))
+    task = Task(id=1, name="Cable lay", duration_hours=4.0, wave_height_limit=2.0)
+    analysis = run(wow_service.analyze_task(task, 61.5, 4.8))
+
+    now = datetime.now(UTC)
+    tasks = TaskListResponse(
+        tasks=[
+            TaskResponse(
+                id=i,
+                name=f"Task {i}",
+                status=TaskStatus.READY,
+                wave_height_limit=2.0,
+                duration_hours=4.0,
+                predecessor_id=None,
+                created_at=now,
+                can_start=True,
+                should_be_blocked=False,
+            )
+            for i in range(args.tasks)
+        ]
+    )
+
+    cases = {
+        "/weather": (
+            lambda: JSONResponse(jsonable_encoder(forecast)),
+            lambda: model_response(forecast),
+        ),
+        "/wow/analyze": (
+            lambda: JSONResponse(jsonable_encoder(analysis)),
+            lambda: FastJSONResponse(analysis),
+        ),
+        "/tasks": (
+            lambda: JSONResponse(jsonable_encoder(tasks)),
+            lambda: model_response(tasks),
+        ),
+    }
+
+    print(f"{'endpoint':<14} {'default/s':>12} {'fast/s':>12} {'speedup':>8}")
+    for endpoint, (default, fast) in cases.items():
+        default_rate = throughput(default)
+        fast_rate = throughput(fast)
+        print(
+            f"{endpoint:<14} {default_rate:12,.0f} {fast_rate:12,.0f} "
+            f"{fast_rate / default_rate:7.1f}x"
+        )
+
+    representations: dict[
+        str, tuple[Callable[[], Response], Callable[[], Response]]
+    ] = {
+        "/weather": (
+            lambda: model_response(run(weather_service.get_forecast(61.5, 4.8))),
+            lambda: columnar_response(
+                *forecast_columns(run(weather_service.get_series(61.5, 4.8)), 61.5, 4.8)
+            ),
+        ),
+        "/wow/analyze": (
+            lambda: FastJSONResponse(run(wow_service.analyze_task(task, 61.5, 4.8))),
+            lambda: columnar_response(
+                *wow_columns(task, run(wow_service.evaluate_task(task, 61.5, 4.8)))
+            ),
+        ),
+    }
+
+    print(
+        f"\n{'endpoint':<14} {'json/s':>12} {'columnar/s':>12} {'speedup':>8} "
+        f"{'json B':>10} {'columnar B':>10}"
+    )
+    for endpoint, (as_json, as_columnar) in representations.items():
+        json_rate = throughput(as_json)
+        columnar_rate = throughput(as_columnar)
+        print(
+            f"{endpoint:<14} {json_rate:12,.0f} {columnar_rate:12,.0f} "
+            f"{columnar_rate / json_rate:7.1f}x "
+            f"{len(as_json().body):10,} {len(as_columnar().body):10,}"
+        )
+    loop.close()
+
+
+if __name__ == "__main__":
+    main()
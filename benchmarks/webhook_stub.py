@@ -0,0 +1,55 @@
+"""Local webhook receiver for trying out event delivery.
+
+Accepts ``POST /events`` batches from the webhook subscriber and counts them.
+
+Run with: python -m benchmarks.webhook_stub --port 9000
+and point the API at it with WEBHOOK_URL=http://localhost:9000/events
+"""
+
+import argparse
+import time
+
+import uvicorn
+from fastapi import FastAPI, Request
+
+
+def create_stub_app() -> FastAPI:
+    """Create a receiver keeping delivery counters in ``app.state``."""
+    stub = FastAPI(title="Webhook stub")
+    stub.state.batches = 0
+    stub.state.events = 0
+    stub.state.event_ids = set()
+    stub.state.started = time.perf_counter()
+
+    @stub.post("/events")
+    async def receive(request: Request) -> dict[str, int]:
+        body = await request.json()
+        ids = [event["id"] for event in body["events"]]
+        stub.state.batches += 1
+        stub.state.events += len(ids)
+        stub.state.event_ids.update(ids)
+        return {"received": len(ids)}
+
+    @stub.get("/stats")
+    async def stats() -> dict[str, float]:
+        elapsed = time.perf_counter() - stub.state.started
+        return {
+            "batches": stub.state.batches,
+            "events": stub.state.events,
+            "unique_events": len(stub.state.event_ids),
+            "events_per_second": stub.state.events / elapsed if elapsed else 0.0,
+        }
+
+    return stub
+
+
+def main() -> None:
+    """Run the stub receiver."""
+    parser = argparse.ArgumentParser(description="Webhook stub receiver")
+    parser.add_argument("--port", type=int, default=9000)
+    args = parser.parse_args()
+    uvicorn.run(create_stub_app(), host="127.0.0.1", port=args.port)
+
+
+if __name__ == "__main__":
+    main()